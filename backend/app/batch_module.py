@@ -0,0 +1,90 @@
+# app/batch_module.py
+"""
+Generación de convocatorias en lote.
+
+Todas las peticiones de un lote se resuelven sobre la misma instantánea de
+datos: cada (nacionalidad, lesionados) se lee y prepara una sola vez antes de
+repartir el trabajo, y los resultados se entregan en cuanto terminan.
+
+La búsqueda local es Python puro, así que con hilos no habría paralelismo (GIL):
+por defecto las peticiones se resuelven una tras otra y, con BATCH_WORKERS > 1,
+en un pool de procesos (como los estilos del seleccionador).
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from app import selector_module
+from app.selector_module import STYLE_TASK_COLUMNS, generar_convocatoria, obtener_tabla
+
+# Procesos para el lote (0 o 1: en serie, en este proceso). Solo compensa con varios núcleos libres
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "0"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _batch_executor(max_workers: int):
+    """Pool de procesos compartido para los lotes (None si no está activado)."""
+    global _executor
+    if max_workers <= 1:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            # spawn: el proceso del servidor tiene hilos (driver, threadpool) y fork no es seguro
+            _executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def _clave(params: dict) -> tuple:
+    return params["nationality"], bool(params.get("injured_allowed", False))
+
+
+def claves_lote(peticiones: list) -> list:
+    """(nacionalidad, lesionados) distintos de un lote, en orden de aparición."""
+    return list(dict.fromkeys(_clave(params) for params in peticiones))
+
+
+def _convocatoria_en_proceso(params: dict, tabla: tuple):
+    """Una petición del lote en un proceso del pool: sus estilos van en serie (sin pools anidados)."""
+    selector_module.SELECTOR_STYLE_WORKERS = 0
+    return generar_convocatoria(**params, tabla=tabla)
+
+
+def generar_lote(peticiones: list, max_workers: int = None, snapshot: dict = None):
+    """
+    Genera las convocatorias de `peticiones` (lista de dicts con los parámetros
+    de `generar_convocatoria`) y las va devolviendo en orden de finalización
+    como dicts {"index", "params", "result"} o {"index", "params", "error"}.
+    `snapshot` permite pasar las tablas ya leídas (p. ej. con `obtener_tabla_async`).
+    """
+    # Instantánea compartida: una tabla por (nacionalidad, lesionados)
+    snapshot = dict(snapshot or {})
+    for key in claves_lote(peticiones):
+        if key not in snapshot:
+            snapshot[key] = obtener_tabla(*key)
+
+    executor = _batch_executor(BATCH_WORKERS if max_workers is None else max_workers)
+    if executor is None:
+        for i, params in enumerate(peticiones):
+            try:
+                result = generar_convocatoria(**params, tabla=snapshot[_clave(params)])
+                yield {"index": i, "params": params, "result": result}
+            except Exception as e:
+                yield {"index": i, "params": params, "error": str(e)}
+        return
+
+    # A los procesos solo viajan las columnas que usa la optimización
+    shipped = {key: (df if df.empty else df[STYLE_TASK_COLUMNS], chemistry)
+               for key, (df, chemistry) in snapshot.items()}
+    futures = {
+        executor.submit(_convocatoria_en_proceso, params, shipped[_clave(params)]): i
+        for i, params in enumerate(peticiones)
+    }
+    for future in as_completed(futures):
+        i = futures[future]
+        try:
+            yield {"index": i, "params": peticiones[i], "result": future.result()}
+        except Exception as e:
+            yield {"index": i, "params": peticiones[i], "error": str(e)}
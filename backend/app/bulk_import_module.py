@@ -0,0 +1,150 @@
+# app/bulk_import_module.py
+"""
+Carga inicial masiva: genera los ficheros de `neo4j-admin database import`.
+
+Convierte el CSV de jugadores en ficheros de nodos (Player, Team, League,
+Country) y de relaciones (PLAYS_FOR, PART_OF, REPRESENTS, TEAMMATE_OF) con la
+misma forma de grafo que deja `create-graph`. El CSV se recorre una sola vez:
+los jugadores y sus relaciones directas se escriben según se leen y solo se
+guardan en memoria los identificadores por equipo para generar TEAMMATE_OF.
+
+Los jugadores quedan con `content_hash` y `graph_dirty = false`, así que las
+importaciones incrementales y create-graph posteriores siguen funcionando. Las
+restricciones e índices los crea el backend al arrancar (app/schema_module.py).
+
+Uso (desde backend/, con la base de datos de destino parada):
+    python -m app.bulk_import_module --csv datasets/jugadores_futbol_realistas.csv --out datasets/bulk
+"""
+import argparse
+import csv
+import os
+import time
+
+from app.importer_module import FLOAT_FIELDS, INTEGER_FIELDS, PLAYER_FIELDS, leer_jugadores_csv
+
+FILES = {
+    "players": "players.csv",
+    "teams": "teams.csv",
+    "leagues": "leagues.csv",
+    "countries": "countries.csv",
+    "plays_for": "plays_for.csv",
+    "part_of": "part_of.csv",
+    "represents": "represents.csv",
+    "teammate_of": "teammate_of.csv",
+}
+
+
+def _cabecera_jugador() -> list:
+    """Cabecera de Player con los tipos de neo4j-admin (player_id es el ID del espacio Player)."""
+    header = []
+    for field in PLAYER_FIELDS:
+        if field == "player_id":
+            header.append("player_id:ID(Player)")
+        elif field in INTEGER_FIELDS:
+            header.append(f"{field}:long")
+        elif field in FLOAT_FIELDS:
+            header.append(f"{field}:double")
+        else:
+            header.append(field)
+    return header + ["content_hash", "graph_dirty:boolean"]
+
+
+def _valor(value):
+    return "" if value is None else value
+
+
+def generar_ficheros(rows, out_dir: str) -> dict:
+    """
+    Escribe los ficheros de importación en `out_dir` a partir de jugadores ya
+    tipados (los de `leer_jugadores_csv`). Devuelve cuántos nodos y relaciones
+    de cada tipo se han generado.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {key: os.path.join(out_dir, name) for key, name in FILES.items()}
+    handles = {key: open(path, "w", newline="", encoding="utf-8") for key, path in paths.items()}
+    try:
+        writers = {key: csv.writer(f) for key, f in handles.items()}
+        writers["players"].writerow(_cabecera_jugador())
+        writers["plays_for"].writerow([":START_ID(Player)", ":END_ID(Team)"])
+        writers["represents"].writerow([":START_ID(Player)", ":END_ID(Country)"])
+
+        members = {}           # equipo -> player_id (lo único que se guarda en memoria)
+        team_leagues = set()
+        leagues, countries = set(), set()
+        counts = {key: 0 for key in FILES}
+
+        for r in rows:
+            writers["players"].writerow([_valor(r.get(f)) for f in PLAYER_FIELDS] + [r.get("content_hash", ""), "false"])
+            counts["players"] += 1
+            team, league, nationality = r.get("team"), r.get("league"), r.get("nationality")
+            # Igual que create-graph: sin equipo, liga o nacionalidad no hay estructura
+            if team is None or league is None or nationality is None:
+                continue
+            members.setdefault(team, []).append(r["player_id"])
+            team_leagues.add((team, league))
+            leagues.add(league)
+            countries.add(nationality)
+            writers["plays_for"].writerow([r["player_id"], team])
+            writers["represents"].writerow([r["player_id"], nationality])
+            counts["plays_for"] += 1
+            counts["represents"] += 1
+
+        writers["teams"].writerow(["name:ID(Team)"])
+        writers["teams"].writerows([t] for t in sorted(members))
+        writers["leagues"].writerow(["name:ID(League)"])
+        writers["leagues"].writerows([l] for l in sorted(leagues))
+        writers["countries"].writerow(["name:ID(Country)"])
+        writers["countries"].writerows([c] for c in sorted(countries))
+        writers["part_of"].writerow([":START_ID(Team)", ":END_ID(League)"])
+        writers["part_of"].writerows(sorted(team_leagues))
+        counts.update(teams=len(members), leagues=len(leagues), countries=len(countries), part_of=len(team_leagues))
+
+        # Compañeros en ambos sentidos, como create-graph: suma de los cuadrados de los tamaños de equipo
+        writers["teammate_of"].writerow([":START_ID(Player)", ":END_ID(Player)"])
+        for ids in members.values():
+            for a in ids:
+                writers["teammate_of"].writerows([a, b] for b in ids if b != a)
+                counts["teammate_of"] += len(ids) - 1
+    finally:
+        for f in handles.values():
+            f.close()
+    return counts
+
+
+def comando_importacion(out_dir: str, database: str = "neo4j") -> str:
+    """Comando `neo4j-admin database import full` para los ficheros generados."""
+    path = lambda key: os.path.join(os.path.abspath(out_dir), FILES[key])
+    return " ".join([
+        "neo4j-admin database import full",
+        f"--nodes=Player={path('players')}",
+        f"--nodes=Team={path('teams')}",
+        f"--nodes=League={path('leagues')}",
+        f"--nodes=Country={path('countries')}",
+        f"--relationships=PLAYS_FOR={path('plays_for')}",
+        f"--relationships=PART_OF={path('part_of')}",
+        f"--relationships=REPRESENTS={path('represents')}",
+        f"--relationships=TEAMMATE_OF={path('teammate_of')}",
+        "--ignore-empty-strings=true",
+        "--overwrite-destination=true",
+        database,
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera los ficheros de neo4j-admin import a partir del CSV de jugadores")
+    parser.add_argument("--csv", default=os.path.join("datasets", "jugadores_futbol_realistas.csv"))
+    parser.add_argument("--out", default=os.path.join("datasets", "bulk"))
+    parser.add_argument("--database", default="neo4j")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = generar_ficheros(leer_jugadores_csv(args.csv), args.out)
+    print(f"✅ Ficheros generados en {args.out} ({time.perf_counter() - start:.2f}s)")
+    for key, value in counts.items():
+        print(f"   {key}: {value}")
+    print("\n👉 Con la base de datos parada:")
+    print(comando_importacion(args.out, args.database))
+
+
+if __name__ == "__main__":
+    main()
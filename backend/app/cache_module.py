@@ -0,0 +1,321 @@
+# app/cache_module.py
+"""
+Cachés en memoria del backend.
+
+Los datos del grafo solo cambian cuando se ejecutan los endpoints de
+administración (importación de jugadores / creación del grafo). Esos endpoints
+incrementan un contador de generación de datos y cualquier entrada cacheada con
+una generación anterior deja de ser válida.
+
+Este contador es de cada proceso: solo lo incrementa el worker que atiende el
+endpoint. Las cachés que deben ver cambios hechos por otros workers o procesos
+lo combinan con una versión compartida (el almacén columnar, o el nodo
+`(:Meta {name: 'data'})` de Neo4j en la caché de resultados Cypher).
+
+Si el cambio afecta solo a algunos ámbitos (p. ej. una importación incremental
+que toca unas pocas nacionalidades), las cachés por ámbito conservan las
+entradas de los ámbitos no afectados.
+
+Lo que no depende de los datos (p. ej. las traducciones de preguntas a Cypher)
+usa `TTLCache`: caduca por tiempo y puede persistirse en disco.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# -----------------------------------------------------------
+# 🔢 GENERACIÓN DE DATOS
+# -----------------------------------------------------------
+
+_generation = 0          # cualquier cambio
+_full_generation = 0     # cambios que afectan a todos los ámbitos
+_scoped_generations = {}
+_generation_lock = threading.Lock()
+
+
+def data_generation(scope=None):
+    """
+    Generación actual de los datos del grafo. Con `scope` devuelve la generación
+    vista desde ese ámbito, que solo cambia con modificaciones globales o de ese ámbito.
+    """
+    if scope is None:
+        return _generation
+    return _full_generation, _scoped_generations.get(scope, 0)
+
+
+def bump_generation(scopes=None) -> int:
+    """
+    Marca los datos como modificados (tras una importación o reconstrucción del
+    grafo). Con `scopes` solo se invalidan esos ámbitos en las cachés por ámbito.
+    """
+    global _generation, _full_generation
+    with _generation_lock:
+        _generation += 1
+        if scopes is None:
+            _full_generation += 1
+        else:
+            for scope in scopes:
+                _scoped_generations[scope] = _scoped_generations.get(scope, 0) + 1
+        return _generation
+
+
+# -----------------------------------------------------------
+# 🗃️ CACHÉ LRU CON ESTADÍSTICAS
+# -----------------------------------------------------------
+
+class LRUCache:
+    """
+    Caché LRU acotada en número de entradas y segura entre hilos.
+    Cada entrada guarda la generación de datos con la que se calculó. Si se
+    indica `scope` (función clave -> ámbito), las entradas solo caducan con
+    cambios globales o de su ámbito.
+
+    Opcionalmente se acota también en memoria: `max_bytes` para el total y
+    `max_entry_bytes` por entrada (el tamaño lo indica quien llama en `put`),
+    y en tiempo: con `ttl` las entradas caducan a los `ttl` segundos aunque no
+    cambie la generación (p. ej. si otro proceso modifica los datos).
+    """
+
+    def __init__(self, name: str, max_entries: int = 32, scope=None,
+                 max_bytes: int = None, max_entry_bytes: int = None, ttl: float = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.scope = scope
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.ttl = ttl
+        self._data = OrderedDict()   # clave -> (generación, valor, bytes, guardado_en)
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.rejected = 0
+        self.expirations = 0
+
+    def generation(self, key):
+        """Generación de datos que corresponde a `key` (leerla antes de calcular el valor)."""
+        return data_generation(self.scope(key) if self.scope is not None else None)
+
+    def get(self, key, generation=None):
+        """
+        Devuelve el valor cacheado o None si no existe, es de otra generación o ha
+        caducado. `generation` sustituye a la de `self.generation(key)` si quien
+        llama compone la suya (p. ej. con una generación compartida entre procesos).
+        """
+        generation = self.generation(key) if generation is None else generation
+        with self._lock:
+            entry = self._data.get(key)
+            expired = entry is not None and self.ttl is not None and time.monotonic() - entry[3] >= self.ttl
+            if entry is None or entry[0] != generation or expired:
+                if entry is not None:
+                    self._quitar(key)
+                    self.expirations += int(expired)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def _quitar(self, key):
+        """Elimina una entrada (llamar con el lock tomado)."""
+        self._bytes -= self._data.pop(key)[2]
+
+    def put(self, key, value, generation: int = None, size: int = 0) -> bool:
+        """
+        Guarda `value`; `generation` es la generación leída antes de calcularlo y
+        `size` su tamaño aproximado en bytes. Devuelve False si no cabe por entrada.
+        """
+        generation = self.generation(key) if generation is None else generation
+        if self.max_entry_bytes is not None and size > self.max_entry_bytes:
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            if key in self._data:
+                self._quitar(key)
+            self._data[key] = (generation, value, size, time.monotonic())
+            self._bytes += size
+            while len(self._data) > self.max_entries or (
+                    self.max_bytes is not None and self._bytes > self.max_bytes and len(self._data) > 1):
+                self._quitar(next(iter(self._data)))
+                self.evictions += 1
+        return True
+
+    def invalidate(self, predicate=None):
+        """Elimina todas las entradas, o solo aquellas cuya clave cumple `predicate`."""
+        with self._lock:
+            if predicate is None:
+                self._data.clear()
+                self._bytes = 0
+                return
+            for key in [k for k in self._data if predicate(k)]:
+                self._quitar(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "rejected": self.rejected,
+                "expirations": self.expirations,
+                "ttl_s": self.ttl,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "generation": data_generation(),
+            }
+
+
+# -----------------------------------------------------------
+# ⏳ CACHÉ LRU CON CADUCIDAD Y PERSISTENCIA EN DISCO
+# -----------------------------------------------------------
+
+class TTLCache:
+    """
+    Caché LRU acotada cuyas entradas caducan `ttl` segundos después de guardarse.
+    Con `path` se carga del fichero JSON al crearse y sobrevive a reinicios del
+    backend: los cambios se vuelcan (de forma atómica) como mucho cada
+    `flush_interval` segundos y al terminar el proceso, desde una copia tomada
+    con el lock y escribiendo fuera de él. El `fingerprint` identifica lo que
+    produce los valores (modelo, prompt...): un fichero con otro fingerprint se
+    descarta entero. Claves y valores deben ser JSON.
+    """
+
+    def __init__(self, name: str, max_entries: int = 1024, ttl: float = 7 * 24 * 3600,
+                 path: str = None, fingerprint: str = "", flush_interval: float = 30.0):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.fingerprint = fingerprint
+        self.flush_interval = flush_interval
+        self._data = OrderedDict()   # clave -> (guardado_en, valor, coste_ms)
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._dirty = False
+        self._flushed_at = time.monotonic()
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.saved_ms = 0.0
+        self.flushes = 0
+        self._cargar()
+        if self.path:
+            atexit.register(self.flush)
+
+    def _cargar(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                content = json.load(f)
+        except (OSError, ValueError):
+            return
+        if content.get("fingerprint") != self.fingerprint:
+            return
+        now = time.time()
+        for key, stored_at, value, cost_ms in content.get("entries", []):
+            if now - stored_at < self.ttl:
+                self._data[key] = (stored_at, value, cost_ms)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def flush(self) -> bool:
+        """
+        Vuelca el contenido a `path` si ha cambiado desde el último volcado.
+        Solo la copia se hace con el lock: las lecturas no esperan a la escritura.
+        """
+        if not self.path:
+            return False
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty:
+                    return False
+                snapshot = {
+                    "fingerprint": self.fingerprint,
+                    "entries": [[k, *entry] for k, entry in self._data.items()],
+                }
+                self._dirty = False
+                self._flushed_at = time.monotonic()
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                tmp = f"{self.path}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(snapshot, f, ensure_ascii=False)
+                os.replace(tmp, self.path)
+            except OSError:
+                # La persistencia es opcional: la caché en memoria sigue siendo válida
+                with self._lock:
+                    self._dirty = True
+                return False
+            self.flushes += 1
+            return True
+
+    def _flush_si_toca(self):
+        if self._dirty and time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+
+    def get(self, key):
+        """Devuelve el valor cacheado o None si no existe o ha caducado."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and time.time() - entry[0] >= self.ttl:
+                del self._data[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            self.saved_ms += entry[2]
+            return entry[1]
+
+    def put(self, key, value, cost_ms: float = 0.0):
+        """Guarda `value`; `cost_ms` es lo que costó obtenerlo (se suma como ahorro en cada acierto)."""
+        with self._lock:
+            previous = self._data.get(key)
+            self._data[key] = (time.time(), value, cost_ms)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+            # Volver a guardar el mismo valor solo renueva su caducidad: no hace falta volcar
+            if previous is None or previous[1] != value:
+                self._dirty = True
+        self._flush_si_toca()
+
+    def invalidate(self):
+        with self._lock:
+            self._dirty = self._dirty or bool(self._data)
+            self._data.clear()
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": self.name,
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl,
+                "persistent": bool(self.path),
+                "pending_flush": self._dirty,
+                "flushes": self.flushes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "saved_ms": round(self.saved_ms, 1),
+            }
@@ -0,0 +1,138 @@
+# app/chemistry_module.py
+"""
+Química de equipo en forma cerrada.
+
+La química entre dos jugadores vale 1.0 si comparten club y 0.5 si solo
+comparten liga. La suma sobre todas las parejas de una convocatoria se obtiene
+a partir de los recuentos por club, por liga y por (club, liga):
+
+    suma = T + 0.5 * (L - P)
+
+donde T, L y P son el número de parejas que comparten club, liga y ambos.
+Así no hace falta construir la matriz de parejas (O(n²)).
+"""
+from collections import Counter
+
+import numpy as np
+
+CHEM_SAME_TEAM = 1.0
+CHEM_SAME_LEAGUE = 0.5
+
+
+def _pares(counts) -> float:
+    """Número de parejas dentro de cada grupo: Σ C(n, 2)."""
+    return float(sum(n * (n - 1) // 2 for n in counts))
+
+
+def codificar(values) -> np.ndarray:
+    """Codifica etiquetas (club, liga...) como enteros consecutivos por orden de aparición."""
+    codes = {}
+    return np.fromiter(
+        (codes.setdefault(v, len(codes)) for v in values),
+        dtype=np.int64,
+        count=len(values),
+    )
+
+
+def quimica_media(teams, leagues) -> float:
+    """Química media de una convocatoria a partir de sus listas de clubes y ligas."""
+    teams, leagues = list(teams), list(leagues)
+    k = len(teams)
+    if k < 2:
+        return 0.0
+    same_team = _pares(Counter(teams).values())
+    same_league = _pares(Counter(leagues).values())
+    same_both = _pares(Counter(zip(teams, leagues)).values())
+    chem_sum = CHEM_SAME_TEAM * same_team + CHEM_SAME_LEAGUE * (same_league - same_both)
+    return chem_sum / (k * (k - 1) / 2)
+
+
+class SquadChemistry:
+    """
+    Química incremental de una convocatoria sobre un pool de jugadores.
+
+    Mantiene vectores de recuentos por club, liga y (club, liga) de los
+    jugadores seleccionados, de modo que añadir, quitar o evaluar un cambio
+    cuesta O(1) y la química media sale directamente de la suma acumulada.
+    """
+
+    def __init__(self, teams, leagues):
+        self.team_codes = codificar(list(teams))
+        self.league_codes = codificar(list(leagues))
+        self.pair_codes = codificar(list(zip(self.team_codes.tolist(), self.league_codes.tolist())))
+
+        self.team_counts = np.zeros(int(self.team_codes.max(initial=-1)) + 1, dtype=np.int64)
+        self.league_counts = np.zeros(int(self.league_codes.max(initial=-1)) + 1, dtype=np.int64)
+        self.pair_counts = np.zeros(int(self.pair_codes.max(initial=-1)) + 1, dtype=np.int64)
+
+        self.size = 0
+        self.chem_sum = 0.0
+
+    def fresh(self) -> "SquadChemistry":
+        """Copia vacía que comparte la codificación de clubes y ligas (sin recuentos)."""
+        clone = object.__new__(SquadChemistry)
+        clone.team_codes = self.team_codes
+        clone.league_codes = self.league_codes
+        clone.pair_codes = self.pair_codes
+        clone.team_counts = np.zeros_like(self.team_counts)
+        clone.league_counts = np.zeros_like(self.league_counts)
+        clone.pair_counts = np.zeros_like(self.pair_counts)
+        clone.size = 0
+        clone.chem_sum = 0.0
+        return clone
+
+    def contribution(self, i: int, member: bool = False) -> float:
+        """Química acumulada del jugador `i` con los seleccionados (sin contarse a sí mismo)."""
+        t = self.team_counts[self.team_codes[i]] - int(member)
+        l = self.league_counts[self.league_codes[i]] - int(member)
+        p = self.pair_counts[self.pair_codes[i]] - int(member)
+        return CHEM_SAME_TEAM * t + CHEM_SAME_LEAGUE * (l - p)
+
+    def contributions(self, candidates: np.ndarray) -> np.ndarray:
+        """Versión vectorizada de `contribution` para jugadores no seleccionados."""
+        t = self.team_counts[self.team_codes[candidates]]
+        l = self.league_counts[self.league_codes[candidates]]
+        p = self.pair_counts[self.pair_codes[candidates]]
+        return CHEM_SAME_TEAM * t + CHEM_SAME_LEAGUE * (l - p)
+
+    def pair(self, i, j):
+        """Química entre dos jugadores concretos (admite arrays en `j`)."""
+        same_team = self.team_codes[i] == self.team_codes[j]
+        same_league = self.league_codes[i] == self.league_codes[j]
+        return np.where(same_team, CHEM_SAME_TEAM, np.where(same_league, CHEM_SAME_LEAGUE, 0.0))
+
+    def add(self, i: int):
+        self.chem_sum += self.contribution(i)
+        self.team_counts[self.team_codes[i]] += 1
+        self.league_counts[self.league_codes[i]] += 1
+        self.pair_counts[self.pair_codes[i]] += 1
+        self.size += 1
+
+    def remove(self, i: int):
+        self.team_counts[self.team_codes[i]] -= 1
+        self.league_counts[self.league_codes[i]] -= 1
+        self.pair_counts[self.pair_codes[i]] -= 1
+        self.size -= 1
+        self.chem_sum -= self.contribution(i)
+
+    def add_delta(self, i: int) -> float:
+        """Variación de la suma de química al añadir `i`."""
+        return self.contribution(i)
+
+    def remove_delta(self, i: int) -> float:
+        """Variación de la suma de química al quitar `i` (que debe estar seleccionado)."""
+        return -self.contribution(i, member=True)
+
+    def swap_delta(self, out_i: int, in_i):
+        """Variación de la suma de química al cambiar `out_i` por `in_i` (escalar o array)."""
+        if np.ndim(in_i) == 0:
+            gain = self.contribution(in_i)
+        else:
+            gain = self.contributions(np.asarray(in_i))
+        # `gain` incluye la pareja con `out_i`, que deja de existir tras el cambio
+        return gain - self.contribution(out_i, member=True) - self.pair(out_i, in_i)
+
+    def mean(self, size: int = None) -> float:
+        """Química media por pareja de la convocatoria actual."""
+        k = self.size if size is None else size
+        return self.chem_sum / (k * (k - 1) / 2) if k > 1 else 0.0
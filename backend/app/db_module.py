@@ -0,0 +1,120 @@
+# app/db_module.py
+"""
+Proveedor único de drivers de Neo4j (síncrono y asíncrono) para todo el backend.
+
+Los drivers (y el propio paquete neo4j, que arrastra pandas) se cargan en el
+primer uso, no al importar: arrancar la API o importar un módulo no abre
+conexiones ni espera a la base de datos. Si Neo4j
+está disponible se comprueba aparte (`comprobar_conexion`) y el resultado queda
+en `estado_conexion()`.
+
+Los endpoints async usan el driver asíncrono: mientras esperan la respuesta de
+Bolt no ocupan un hilo del threadpool, así que la concurrencia queda limitada
+por el pool de conexiones (configurable) y no por el número de hilos de Python.
+"""
+import os
+import threading
+import time
+
+NEO4J_URI = os.getenv("NEO4J_URI", "bolt://sibi-neo4j:7687")
+NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
+NEO4J_PASS = os.getenv("NEO4J_PASS", "recovery123")
+
+# Pool de conexiones (segundos para los tiempos)
+NEO4J_POOL_SIZE = int(os.getenv("NEO4J_POOL_SIZE", "100"))
+NEO4J_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "60"))
+NEO4J_MAX_LIFETIME = float(os.getenv("NEO4J_MAX_CONNECTION_LIFETIME", "3600"))
+
+
+def pool_config() -> dict:
+    """Parámetros del pool de conexiones comunes a los drivers."""
+    return {
+        "max_connection_pool_size": NEO4J_POOL_SIZE,
+        "connection_acquisition_timeout": NEO4J_ACQUISITION_TIMEOUT,
+        "max_connection_lifetime": NEO4J_MAX_LIFETIME,
+    }
+
+
+_driver = None
+_async_driver = None
+_driver_lock = threading.Lock()
+
+
+def obtener_driver():
+    """Driver síncrono compartido por el proceso (se crea en el primer uso)."""
+    global _driver
+    if _driver is None:
+        with _driver_lock:
+            if _driver is None:
+                from neo4j import GraphDatabase
+                _driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASS), **pool_config())
+    return _driver
+
+
+def obtener_driver_async():
+    """Driver asíncrono del proceso (se crea en el primer uso, dentro del event loop)."""
+    global _async_driver
+    if _async_driver is None:
+        from neo4j import AsyncGraphDatabase
+        _async_driver = AsyncGraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASS), **pool_config())
+    return _async_driver
+
+
+async def _leer(tx, query, parameters):
+    result = await tx.run(query, parameters)
+    return await result.data()
+
+
+async def consultar(query: str, parameters: dict = None, reintentar: bool = True, **kwargs) -> list:
+    """
+    Ejecuta una consulta de lectura y devuelve las filas como dicts. Con
+    `reintentar=False` (comprobaciones de salud) falla en cuanto Neo4j no responde
+    en lugar de reintentar durante el tiempo máximo del driver.
+    """
+    params = dict(parameters or {}, **kwargs)
+    async with obtener_driver_async().session() as s:
+        if not reintentar:
+            result = await s.run(query, params)
+            return await result.data()
+        return await s.execute_read(_leer, query, params)
+
+
+async def consultar_uno(query: str, parameters: dict = None, reintentar: bool = True, **kwargs):
+    """Como `consultar`, pero devuelve solo la primera fila (o None)."""
+    rows = await consultar(query, parameters, reintentar, **kwargs)
+    return rows[0] if rows else None
+
+
+# -----------------------------------------------------------
+# 🚦 DISPONIBILIDAD (independiente de la importación)
+# -----------------------------------------------------------
+
+_estado = {"ready": False, "checked_at": None, "error": None}
+
+
+def estado_conexion() -> dict:
+    """Resultado de la última comprobación de conexión con Neo4j."""
+    return dict(_estado)
+
+
+async def comprobar_conexion() -> dict:
+    """Comprueba que Neo4j responde y actualiza el estado de disponibilidad."""
+    try:
+        await obtener_driver_async().verify_connectivity()
+        _estado.update(ready=True, error=None)
+    except Exception as e:
+        _estado.update(ready=False, error=f"{type(e).__name__}: {e}")
+    _estado["checked_at"] = time.time()
+    return estado_conexion()
+
+
+async def cerrar_drivers():
+    """Cierra los drivers que se hayan llegado a crear."""
+    global _driver, _async_driver
+    if _async_driver is not None:
+        await _async_driver.close()
+        _async_driver = None
+    with _driver_lock:
+        if _driver is not None:
+            _driver.close()
+            _driver = None
@@ -0,0 +1,207 @@
+# app/exact_module.py
+"""
+Modo exacto del seleccionador: programación lineal entera mixta (MILP).
+
+Variables:
+  x_i ∈ {0, 1}      jugador i convocado
+  y_{g,m} ∈ {0, 1}  el grupo g (club, liga o club+liga) tiene al menos m convocados
+
+La química de un grupo con n convocados aporta C(n, 2) parejas, que se escribe
+de forma lineal como Σ_m (m - 1)·y_{g,m} con n = Σ_m y_{g,m} e y_{g,m} ≥ y_{g,m+1}.
+Con eso la función objetivo ALPHA·rendimiento medio + BETA·química media es
+lineal y la resuelve HiGHS (vía scipy) hasta el óptimo o hasta el límite de
+tiempo, informando de la mejor cota y del gap.
+
+Las plazas por posición salen de `specific_positions_config` (cupos_por_posicion),
+no de la convocatoria heurística, así que el óptimo y el gap son los del problema
+que pide el usuario.
+"""
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from app.chemistry_module import CHEM_SAME_LEAGUE, CHEM_SAME_TEAM, codificar
+
+
+def _grupos_quimica(team_codes, league_codes):
+    """
+    Grupos con su coeficiente en la suma de química: T + 0.5·(L - P).
+    Si un club juega en una única liga su grupo club+liga coincide con el del
+    club, y ambos términos se combinan en uno solo (1.0 - 0.5).
+    """
+    teams = defaultdict(list)
+    leagues = defaultdict(list)
+    pairs = defaultdict(list)
+    for i, (t, l) in enumerate(zip(team_codes, league_codes)):
+        teams[t].append(i)
+        leagues[l].append(i)
+        pairs[(t, l)].append(i)
+
+    leagues_of_team = defaultdict(set)
+    for t, l in pairs:
+        leagues_of_team[t].add(l)
+
+    grupos = []
+    for t, members in teams.items():
+        coef = CHEM_SAME_TEAM
+        if len(leagues_of_team[t]) == 1:
+            coef -= CHEM_SAME_LEAGUE
+        grupos.append((members, coef))
+    for members in leagues.values():
+        grupos.append((members, CHEM_SAME_LEAGUE))
+    for (t, _), members in pairs.items():
+        if len(leagues_of_team[t]) > 1:
+            grupos.append((members, -CHEM_SAME_LEAGUE))
+    return [(m, c) for m, c in grupos if len(m) > 1 and c != 0]
+
+
+def cupos_por_posicion(specific_positions, pos_codes, config: dict, general_of: dict,
+                       k: int, fixed=()) -> list:
+    """
+    Restricciones de plazas (miembros, mínimo, máximo) de `config` (posición
+    específica -> plazas), con las mismas reglas que la convocatoria voraz:
+
+      - Si las plazas suman k o menos, cada posición tiene al menos sus plazas y
+        el resto de la convocatoria es libre (el relleno).
+      - Si suman más de k, cada posición tiene como mucho sus plazas y solo se
+        convoca de las posiciones de `config` (además de los fijos).
+      - Si una posición no tiene candidatos suficientes, sus plazas se cubren con
+        su posición general (`general_of[pos]`, código de `pos_codes`): la
+        restricción pasa a ser sobre el grupo general completo.
+    """
+    spec = np.asarray(specific_positions, dtype=object)
+    gen = np.asarray(pos_codes)
+    n = len(spec)
+    is_fixed = np.zeros(n, dtype=bool)
+    is_fixed[np.asarray(list(fixed), dtype=np.int64)] = True
+    at_most = sum(config.values()) > k
+
+    def cupo(members, quota):
+        if at_most:
+            # Los fijos ocupan su plaza aunque la posición ya esté completa
+            return members, 0, max(quota, int(is_fixed[members].sum()))
+        return members, min(quota, len(members)), n
+
+    by_general = defaultdict(list)
+    for pos, quota in config.items():
+        by_general[general_of[pos]].append((np.flatnonzero(spec == pos), quota))
+
+    quotas = []
+    covered = np.zeros(n, dtype=bool)
+    for general, items in by_general.items():
+        for members, quota in items:
+            covered[members] = True
+        if any(len(members) < quota for members, quota in items):
+            members = np.flatnonzero(gen == general)
+            covered[members] = True
+            quotas.append(cupo(members, sum(q for _, q in items)))
+            if at_most:
+                continue  # los jugadores del grupo cubren plazas de otras posiciones
+        quotas.extend(cupo(members, quota) for members, quota in items)
+
+    if at_most:
+        others = np.flatnonzero(~covered & ~is_fixed)
+        if len(others):
+            quotas.append((others, 0, 0))
+    return quotas
+
+
+def resolver_exacto(scores, teams, leagues, quotas: list, fixed, k: int,
+                    alpha: float, beta: float, time_limit_s: float = 30.0,
+                    incumbent=None) -> dict:
+    """
+    Resuelve la selección de `k` jugadores con las restricciones de plazas
+    `quotas` (ver cupos_por_posicion), obligando a incluir los índices de `fixed`.
+
+    `incumbent` es una convocatoria (índices) ya conocida, p. ej. la heurística:
+    se usa para el gap si el solver no encuentra solución en el tiempo dado.
+    Devuelve un dict con squad, objective, bound, gap, optimal y status.
+    """
+    try:
+        from scipy.optimize import Bounds, LinearConstraint, milp
+        from scipy.sparse import coo_matrix
+    except ImportError as e:
+        raise RuntimeError("El modo exacto requiere scipy (pip install scipy).") from e
+
+    scores = np.asarray(scores, dtype=np.float64)
+    n = len(scores)
+    pairs_total = k * (k - 1) / 2 if k > 1 else 1.0
+
+    grupos = _grupos_quimica(codificar(list(teams)).tolist(), codificar(list(leagues)).tolist())
+
+    # Columnas: primero x_i, luego y_{g,m} de cada grupo
+    c = list(-alpha / k * scores)  # milp minimiza
+    integrality = [1] * n
+    lb = np.zeros(n)
+    lb[np.asarray(list(fixed), dtype=np.int64)] = 1.0
+    lower, upper = list(lb), [1.0] * n
+
+    rows, cols, vals = [], [], []
+    b_lo, b_hi = [], []
+
+    def add_row(entries, lo, hi):
+        r = len(b_lo)
+        for col, val in entries:
+            rows.append(r)
+            cols.append(col)
+            vals.append(val)
+        b_lo.append(lo)
+        b_hi.append(hi)
+
+    # Tamaño de la convocatoria y plazas por posición
+    add_row([(i, 1.0) for i in range(n)], k, k)
+    for members, lo, hi in quotas:
+        add_row([(int(i), 1.0) for i in members], lo, hi)
+
+    # Linealización de C(n_g, 2) para cada grupo de química
+    for members, coef in grupos:
+        depth = min(len(members), k)
+        start = len(c)
+        for m in range(1, depth + 1):
+            c.append(-beta / pairs_total * coef * (m - 1))
+            # Los términos negativos (coef < 0) no necesitan orden ni integralidad
+            integrality.append(1 if coef > 0 else 0)
+            lower.append(0.0)
+            upper.append(1.0)
+        add_row([(i, 1.0) for i in members] + [(start + m, -1.0) for m in range(depth)], 0, 0)
+        if coef > 0:
+            for m in range(depth - 1):
+                add_row([(start + m, 1.0), (start + m + 1, -1.0)], 0, np.inf)
+
+    n_vars = len(c)
+    A = coo_matrix((vals, (rows, cols)), shape=(len(b_lo), n_vars)).tocsr()
+
+    t0 = time.perf_counter()
+    res = milp(
+        c=np.asarray(c),
+        constraints=LinearConstraint(A, b_lo, b_hi),
+        integrality=np.asarray(integrality),
+        bounds=Bounds(lower, upper),
+        options={"time_limit": time_limit_s, "disp": False},
+    )
+    elapsed = time.perf_counter() - t0
+
+    bound = -res.mip_dual_bound if getattr(res, "mip_dual_bound", None) is not None else None
+    if res.x is not None:
+        squad = np.flatnonzero(res.x[:n] > 0.5)
+        objective = float(-res.fun)
+    elif incumbent is not None:
+        squad = np.asarray(incumbent, dtype=np.int64)
+        objective = None
+    else:
+        squad, objective = None, None
+
+    gap = None
+    if objective is not None and bound is not None:
+        gap = max(0.0, (bound - objective) / abs(bound)) if bound else 0.0
+
+    return {
+        "squad": squad,
+        "objective": objective,
+        "bound": bound,
+        "gap": gap,
+        "optimal": res.status == 0,
+        "status": res.message,
+        "tiempo_s": round(elapsed, 3),
+    }
@@ -0,0 +1,102 @@
+# app/graph_module.py
+"""
+Construcción incremental de la estructura del grafo a partir de los Player.
+
+El importador marca con `graph_dirty = true` los jugadores nuevos o cuyo equipo,
+liga o nacionalidad han cambiado. Aquí solo se recalculan esos jugadores, por
+bloques y cada bloque en su propia transacción:
+
+  1. Se borran sus relaciones antiguas (PLAYS_FOR, REPRESENTS y TEAMMATE_OF en
+     ambos sentidos) y se enlazan con su Team, League y Country.
+  2. Los compañeros se obtienen recorriendo su nodo Team, no comparando todos
+     los jugadores entre sí: el coste es la suma de los cuadrados de los tamaños
+     de los equipos afectados, no el cuadrado del número de jugadores.
+
+Los jugadores sin la marca (grafos creados antes de existir) se tratan como pendientes.
+"""
+import logging
+import time
+
+from app.importer_module import BUMP_DATA_GENERATION, escribir_con_reintentos, leer_en_bloques
+
+DEFAULT_BATCH_SIZE = 1000
+
+PENDING_PLAYERS = """
+MATCH (p:Player)
+WHERE p.graph_dirty IS NULL OR p.graph_dirty = true
+RETURN p.player_id AS player_id
+"""
+
+MARK_ALL_DIRTY = "MATCH (p:Player) SET p.graph_dirty = true"
+
+LINK_STRUCTURE = """
+UNWIND $ids AS id
+MATCH (p:Player {player_id: id})
+OPTIONAL MATCH (p)-[old:PLAYS_FOR|REPRESENTS|TEAMMATE_OF]-()
+DELETE old
+WITH DISTINCT p
+WHERE p.team IS NOT NULL AND p.league IS NOT NULL AND p.nationality IS NOT NULL
+MERGE (t:Team {name: p.team})
+MERGE (l:League {name: p.league})
+MERGE (c:Country {name: p.nationality})
+MERGE (p)-[:PLAYS_FOR]->(t)
+MERGE (t)-[:PART_OF]->(l)
+MERGE (p)-[:REPRESENTS]->(c)
+"""
+
+LINK_TEAMMATES = """
+UNWIND $ids AS id
+MATCH (p:Player {player_id: id})
+SET p.graph_dirty = false
+WITH p
+MATCH (p)-[:PLAYS_FOR]->(:Team)<-[:PLAYS_FOR]-(o:Player)
+WHERE o <> p
+MERGE (p)-[:TEAMMATE_OF]->(o)
+MERGE (o)-[:TEAMMATE_OF]->(p)
+"""
+
+
+def _ejecutar(tx, rows):
+    query, ids = rows
+    tx.run(query, ids=ids).consume()
+    tx.run(BUMP_DATA_GENERATION).consume()
+
+
+def jugadores_pendientes(driver) -> list:
+    """player_id de los jugadores cuyo entorno en el grafo hay que recalcular."""
+    with driver.session() as s:
+        return [r["player_id"] for r in s.run(PENDING_PLAYERS)]
+
+
+def construir_grafo(driver, batch_size: int = DEFAULT_BATCH_SIZE, full: bool = False) -> dict:
+    """
+    Enlaza los jugadores pendientes con Team/League/Country y con sus compañeros.
+    Con `full=True` se recalcula todo el grafo. Devuelve un resumen de la ejecución.
+    """
+    start = time.perf_counter()
+    if full:
+        with driver.session() as s:
+            s.run(MARK_ALL_DIRTY).consume()
+
+    pending = jugadores_pendientes(driver)
+    batches = list(leer_en_bloques(pending, batch_size))
+
+    # Primero toda la estructura: un compañero pendiente de un bloque posterior
+    # ya tiene su PLAYS_FOR cuando se enlazan los compañeros.
+    for ids in batches:
+        escribir_con_reintentos(driver, _ejecutar, (LINK_STRUCTURE, ids))
+    structure_s = time.perf_counter() - start
+
+    for ids in batches:
+        escribir_con_reintentos(driver, _ejecutar, (LINK_TEAMMATES, ids))
+
+    elapsed = time.perf_counter() - start
+    logging.info(f"Grafo actualizado: {len(pending)} jugadores en {len(batches)} bloques ({elapsed:.2f}s)")
+    return {
+        "players_updated": len(pending),
+        "batches": len(batches),
+        "batch_size": batch_size,
+        "full": full,
+        "structure_s": round(structure_s, 3),
+        "elapsed_s": round(elapsed, 3),
+    }
@@ -0,0 +1,380 @@
+# app/importer_module.py
+"""
+Importación de jugadores a Neo4j por bloques.
+
+El CSV se lee en streaming, cada fila se convierte a sus tipos una sola vez en
+Python y cada bloque se confirma en su propia transacción de escritura, con
+reintentos ante errores transitorios. La memoria usada depende del tamaño del
+bloque, no del tamaño del fichero.
+
+La importación es incremental: cada fila lleva una huella de su contenido
+(`content_hash`, guardada en el Player) y solo se escriben las filas nuevas o
+cuya huella ha cambiado. Opcionalmente se borran los jugadores que ya no están
+en el fichero. El resumen indica qué nacionalidades han cambiado para invalidar
+solo sus cachés.
+"""
+import asyncio
+import csv
+import hashlib
+import json
+import logging
+import time
+
+DEFAULT_CHUNK_SIZE = 5000
+MAX_RETRIES = 5
+
+TEXT_FIELDS = ["player_id", "name", "nationality", "team", "league", "position", "specific_position", "injured"]
+INTEGER_FIELDS = [
+    "age", "height_cm", "weight_kg", "stamina", "matches_played", "minutes_played",
+    "yellow_cards", "red_cards", "goals", "assists", "clean_sheets", "goals_conceded",
+]
+FLOAT_FIELDS = [
+    "shots_per_game", "key_passes_per_game", "dribbles_per_game", "tackles_per_game",
+    "interceptions_per_game", "clearances_per_game", "aerial_duels_won_pct", "fouls_per_game",
+    "pass_accuracy_pct", "passes_per_game", "long_balls_per_game", "crosses_per_game",
+    "saves_per_game", "penalty_save_pct",
+]
+PLAYER_FIELDS = TEXT_FIELDS + INTEGER_FIELDS + FLOAT_FIELDS
+NUMERIC_FIELDS = INTEGER_FIELDS + FLOAT_FIELDS
+GLOBAL_STATS_SCOPE = "__global__"
+
+# Las filas llegan ya tipadas: no hay conversiones por fila en Cypher.
+# Solo se escriben las filas nuevas o con otra huella; se devuelven para contarlas.
+# Si cambia lo que determina la estructura del grafo (equipo, liga o nacionalidad),
+# el jugador queda marcado para que create-graph recalcule sus relaciones.
+UPSERT_PLAYERS = """
+UNWIND $rows AS row
+OPTIONAL MATCH (old:Player {player_id: row.player_id})
+WITH row, old
+WHERE old IS NULL OR old.content_hash IS NULL OR old.content_hash <> row.content_hash
+MERGE (p:Player {player_id: row.player_id})
+WITH p, row, old IS NULL AS inserted, p.nationality AS previous_nationality,
+     coalesce(p.team, '') <> coalesce(row.team, '')
+     OR coalesce(p.league, '') <> coalesce(row.league, '')
+     OR coalesce(p.nationality, '') <> coalesce(row.nationality, '') AS moved
+SET p += row
+SET p.graph_dirty = coalesce(p.graph_dirty, true) OR moved
+RETURN inserted, row.nationality AS nationality, previous_nationality
+"""
+
+ALL_PLAYER_IDS = "MATCH (p:Player) RETURN p.player_id AS player_id, p.nationality AS nationality"
+
+# Generación de datos compartida por todos los workers (y por cualquier otro
+# proceso que escriba con este módulo): se incrementa en la misma transacción
+# que cada escritura y las cachés de resultados la comparan con la suya
+BUMP_DATA_GENERATION = """
+MERGE (m:Meta {name: 'data'})
+SET m.generation = coalesce(m.generation, 0) + 1
+"""
+
+DATA_GENERATION = "MATCH (m:Meta {name: 'data'}) RETURN m.generation AS generation"
+
+DELETE_PLAYERS = """
+UNWIND $ids AS id
+MATCH (p:Player {player_id: id})
+DETACH DELETE p
+"""
+
+
+# Mínimo y máximo de cada estadística por nacionalidad (y global), para que el
+# seleccionador normalice con una transformación afín sin recorrer el pool
+NATIONALITY_STATS = f"""
+MATCH (p:Player)
+WHERE p.nationality IN $nationalities
+RETURN p.nationality AS scope,
+       {", ".join(f"min(p.{f}) AS min_{f}, max(p.{f}) AS max_{f}" for f in NUMERIC_FIELDS)}
+"""
+
+SAVE_STATS = """
+UNWIND $stats AS s
+MERGE (n:PlayerStats {scope: s.scope})
+SET n = s
+SET n.updated_at = datetime()
+"""
+
+DELETE_STATS = "MATCH (n:PlayerStats) WHERE n.scope IN $scopes DETACH DELETE n"
+
+GLOBAL_STATS = f"""
+MATCH (n:PlayerStats)
+WHERE n.scope <> $global_scope
+RETURN {", ".join(f"min(n.min_{f}) AS min_{f}, max(n.max_{f}) AS max_{f}" for f in NUMERIC_FIELDS)}
+"""
+
+ALL_NATIONALITIES = "MATCH (p:Player) WHERE p.nationality IS NOT NULL RETURN DISTINCT p.nationality AS nationality"
+
+
+def errores_transitorios() -> tuple:
+    """Errores de Neo4j tras los que merece la pena reintentar un bloque (neo4j se importa al usarse)."""
+    from neo4j.exceptions import ServiceUnavailable, SessionExpired, TransientError
+    return TransientError, ServiceUnavailable, SessionExpired
+
+
+def _to_int(value):
+    """Igual que toInteger de Cypher: trunca decimales y devuelve None si no es numérico."""
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def huella_fila(typed: dict) -> str:
+    """Huella estable del contenido de un jugador (sobre los valores ya tipados)."""
+    payload = json.dumps([typed.get(f) for f in PLAYER_FIELDS], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def convertir_fila(row: dict) -> dict:
+    """Convierte una fila del CSV (todo texto) a los tipos de las propiedades de Player y añade su huella."""
+    typed = {f: (row.get(f) or None) for f in TEXT_FIELDS}
+    typed.update({f: _to_int(row.get(f)) for f in INTEGER_FIELDS})
+    typed.update({f: _to_float(row.get(f)) for f in FLOAT_FIELDS})
+    typed["content_hash"] = huella_fila(typed)
+    return typed
+
+
+def leer_jugadores_csv(path: str):
+    """Recorre el CSV fila a fila devolviendo jugadores ya tipados."""
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            yield convertir_fila(row)
+
+
+def leer_en_bloques(rows, chunk_size: int):
+    """Agrupa un iterable de filas en listas de como mucho `chunk_size` elementos."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ProgresoImportacion:
+    """
+    Contadores de una importación incremental y su resumen por bloque. Los
+    player_id leídos solo se guardan con `delete_missing` (hacen falta para
+    saber qué borrar); sin él la memoria no depende del tamaño del fichero.
+    """
+
+    def __init__(self, delete_missing: bool = False):
+        self.start = time.perf_counter()
+        self.chunks = 0
+        self.imported = 0
+        self.inserted = 0
+        self.updated = 0
+        self.removed = 0
+        self.nationalities = set()
+        self.seen_ids = set() if delete_missing else None
+
+    def bloque(self, rows, changed) -> dict:
+        """Registra un bloque escrito (`changed` son las filas devueltas por UPSERT_PLAYERS)."""
+        self.chunks += 1
+        self.imported += len(rows)
+        if self.seen_ids is not None:
+            self.seen_ids.update(r["player_id"] for r in rows)
+        for c in changed:
+            if c["inserted"]:
+                self.inserted += 1
+            else:
+                self.updated += 1
+            self.nationalities.update(n for n in (c["nationality"], c["previous_nationality"]) if n)
+        info = self.info()
+        logging.info(
+            f"Bloque {self.chunks}: {self.imported} filas "
+            f"({self.inserted} nuevas, {self.updated} actualizadas, {info['rows_per_s']} filas/s)"
+        )
+        return info
+
+    def ausentes(self, existing) -> list:
+        """player_id de `existing` (filas de ALL_PLAYER_IDS) que no estaban en el fichero."""
+        missing = [r for r in existing if r["player_id"] not in self.seen_ids]
+        self.removed += len(missing)
+        self.nationalities.update(r["nationality"] for r in missing if r["nationality"])
+        return [r["player_id"] for r in missing]
+
+    def info(self, done: bool = False) -> dict:
+        elapsed = time.perf_counter() - self.start
+        info = {
+            "chunk": self.chunks,
+            "imported": self.imported,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "unchanged": self.imported - self.inserted - self.updated,
+            "removed": self.removed,
+            "elapsed_s": round(elapsed, 3),
+            "rows_per_s": round(self.imported / elapsed, 1) if elapsed > 0 else None,
+        }
+        if done:
+            info["done"] = True
+            info["nationalities"] = sorted(self.nationalities)
+        return info
+
+
+def _escribir_bloque(tx, rows):
+    changed = tx.run(UPSERT_PLAYERS, rows=rows).data()
+    if changed:
+        tx.run(BUMP_DATA_GENERATION).consume()
+    return changed
+
+
+def _borrar_jugadores(tx, ids):
+    tx.run(DELETE_PLAYERS, ids=ids).consume()
+    tx.run(BUMP_DATA_GENERATION).consume()
+
+
+def escribir_con_reintentos(driver, work, rows, max_retries: int = MAX_RETRIES):
+    """
+    Ejecuta `work(tx, rows)` en una transacción de escritura. `execute_write` ya
+    reintenta los errores transitorios; si aun así se agota, repetimos con espera exponencial.
+    """
+    transient = errores_transitorios()
+    for attempt in range(1, max_retries + 1):
+        try:
+            with driver.session() as s:
+                return s.execute_write(work, rows)
+        except transient as e:
+            if attempt == max_retries:
+                raise
+            wait = min(2 ** attempt, 30)
+            logging.warning(f"Error transitorio en el bloque (intento {attempt}/{max_retries}): {e}. Reintento en {wait}s")
+            time.sleep(wait)
+
+
+def importar_por_bloques(driver, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, delete_missing: bool = False):
+    """
+    Importa el CSV de jugadores por bloques de `chunk_size` filas y va
+    devolviendo el progreso tras cada bloque confirmado (filas nuevas,
+    actualizadas y sin cambios, tiempo, filas/s). Con `delete_missing` borra
+    después los jugadores que no aparecen en el fichero. El último elemento
+    lleva `done` y las nacionalidades modificadas.
+    """
+    progress = ProgresoImportacion(delete_missing)
+    for chunk in leer_en_bloques(leer_jugadores_csv(path), chunk_size):
+        changed = escribir_con_reintentos(driver, _escribir_bloque, chunk)
+        yield progress.bloque(chunk, changed)
+
+    if delete_missing:
+        with driver.session() as s:
+            missing = progress.ausentes(s.run(ALL_PLAYER_IDS).data())
+        for ids in leer_en_bloques(missing, chunk_size):
+            escribir_con_reintentos(driver, _borrar_jugadores, ids)
+        if missing:
+            logging.info(f"Eliminados {len(missing)} jugadores que ya no están en {path}")
+    yield progress.info(done=True)
+
+
+# -----------------------------------------------------------
+# ⚡ VERSIÓN ASÍNCRONA (driver AsyncGraphDatabase)
+# -----------------------------------------------------------
+
+async def _escribir_bloque_async(tx, rows):
+    result = await tx.run(UPSERT_PLAYERS, rows=rows)
+    changed = await result.data()
+    if changed:
+        await (await tx.run(BUMP_DATA_GENERATION)).consume()
+    return changed
+
+
+async def _borrar_jugadores_async(tx, ids):
+    result = await tx.run(DELETE_PLAYERS, ids=ids)
+    await result.consume()
+    await (await tx.run(BUMP_DATA_GENERATION)).consume()
+
+
+async def escribir_con_reintentos_async(driver, work, rows, max_retries: int = MAX_RETRIES):
+    """Igual que `escribir_con_reintentos`, sin bloquear el event loop durante la escritura ni las esperas."""
+    transient = errores_transitorios()
+    for attempt in range(1, max_retries + 1):
+        try:
+            async with driver.session() as s:
+                return await s.execute_write(work, rows)
+        except transient as e:
+            if attempt == max_retries:
+                raise
+            wait = min(2 ** attempt, 30)
+            logging.warning(f"Error transitorio en el bloque (intento {attempt}/{max_retries}): {e}. Reintento en {wait}s")
+            await asyncio.sleep(wait)
+
+
+async def importar_por_bloques_async(driver, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                     delete_missing: bool = False):
+    """Versión asíncrona de `importar_por_bloques` (mismo progreso por bloque)."""
+    progress = ProgresoImportacion(delete_missing)
+    for chunk in leer_en_bloques(leer_jugadores_csv(path), chunk_size):
+        changed = await escribir_con_reintentos_async(driver, _escribir_bloque_async, chunk)
+        yield progress.bloque(chunk, changed)
+
+    if delete_missing:
+        async with driver.session() as s:
+            result = await s.run(ALL_PLAYER_IDS)
+            missing = progress.ausentes(await result.data())
+        for ids in leer_en_bloques(missing, chunk_size):
+            await escribir_con_reintentos_async(driver, _borrar_jugadores_async, ids)
+        if missing:
+            logging.info(f"Eliminados {len(missing)} jugadores que ya no están en {path}")
+    yield progress.info(done=True)
+
+
+def _resumen(last: dict, chunk_size: int) -> dict:
+    return {**{k: v for k, v in last.items() if k != "done"}, "chunks": last["chunk"], "chunk_size": chunk_size}
+
+
+def importar_jugadores(driver, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, delete_missing: bool = False) -> dict:
+    """
+    Importa el CSV completo y devuelve el resumen: filas leídas, nuevas,
+    actualizadas, sin cambios y eliminadas, nacionalidades modificadas, bloques y filas/s.
+    """
+    last = {}
+    for last in importar_por_bloques(driver, path, chunk_size, delete_missing):
+        pass
+    return _resumen(last, chunk_size)
+
+
+async def importar_jugadores_async(driver, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                   delete_missing: bool = False) -> dict:
+    """Versión asíncrona de `importar_jugadores`."""
+    last = {}
+    async for last in importar_por_bloques_async(driver, path, chunk_size, delete_missing):
+        pass
+    return _resumen(last, chunk_size)
+
+
+# -----------------------------------------------------------
+# 📐 ESTADÍSTICAS DE NORMALIZACIÓN
+# -----------------------------------------------------------
+
+def _guardar_estadisticas(tx, nationalities):
+    found = [{k: v for k, v in r.items() if v is not None}
+             for r in tx.run(NATIONALITY_STATS, nationalities=nationalities).data()]
+    gone = sorted(set(nationalities) - {r["scope"] for r in found})
+    if found:
+        tx.run(SAVE_STATS, stats=found).consume()
+    if gone:
+        tx.run(DELETE_STATS, scopes=gone).consume()
+    overall = tx.run(GLOBAL_STATS, global_scope=GLOBAL_STATS_SCOPE).single()
+    overall = {k: v for k, v in (overall.data() if overall else {}).items() if v is not None}
+    tx.run(SAVE_STATS, stats=[{**overall, "scope": GLOBAL_STATS_SCOPE}]).consume()
+    tx.run(BUMP_DATA_GENERATION).consume()
+    return len(found)
+
+
+def actualizar_estadisticas(driver, nationalities=None) -> int:
+    """
+    Recalcula y guarda en nodos PlayerStats el mínimo y máximo de cada
+    estadística de las nacionalidades indicadas (todas si es None) y el global.
+    Tras una importación incremental basta con pasar las nacionalidades modificadas.
+    """
+    if nationalities is None:
+        with driver.session() as s:
+            nationalities = [r["nationality"] for r in s.run(ALL_NATIONALITIES)]
+    return escribir_con_reintentos(driver, _guardar_estadisticas, list(nationalities))
+
@@ -1,31 +1,42 @@
+import asyncio
+import hashlib
 import os
 import re
+import threading
 import time
-from neo4j import GraphDatabase
+import unicodedata
+
+from app.cache_module import TTLCache
+from app.llm_module import GROQ_API_KEY, GROQ_BASE_URL, GROQ_MODEL, LLM_TIMEOUT
 
 # ------------------------------
 # 🧠 GROQ - LLM EN LA NUBE
 # ------------------------------
-from groq import Groq
+# El cliente (y el paquete groq) se cargan en la primera consulta, no al importar.
+# Los endpoints async usan el cliente asíncrono de app/llm_module.py.
+
+_groq_client = None
+_groq_lock = threading.Lock()
 
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
 
-groq_client = None
-llm = None
+def obtener_cliente_groq():
+    """Cliente de Groq compartido (None si no hay GROQ_API_KEY o no se pudo crear)."""
+    global _groq_client
+    if _groq_client is None and GROQ_API_KEY:
+        with _groq_lock:
+            if _groq_client is None:
+                try:
+                    from groq import Groq
+                    _groq_client = Groq(api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL, timeout=LLM_TIMEOUT)
+                    print(f"✅ Modelo Groq configurado correctamente: {GROQ_MODEL}")
+                except Exception as e:
+                    print(f"❌ Error inicializando Groq: {e}")
+    return _groq_client
 
-try:
-    if GROQ_API_KEY:
-        groq_client = Groq(api_key=GROQ_API_KEY)
-        print(f"✅ Modelo Groq configurado correctamente: {GROQ_MODEL}")
-    else:
-        print("⚠️ No se encontró GROQ_API_KEY. El LLM estará desactivado.")
-except Exception as e:
-    print(f"❌ Error inicializando Groq: {e}")
-    groq_client = None
 
 # Función simple de completado (igual que antes, pero usando Groq)
 def groq_complete(prompt: str):
+    groq_client = obtener_cliente_groq()
     if not groq_client:
         raise Exception("Groq no está configurado.")
 
@@ -41,29 +52,6 @@ def groq_complete(prompt: str):
         return f"❌ Error Groq: {str(e)}"
 
 
-# -----------------------------------------------------------
-# 🧠 CONEXIÓN A NEO4J CON RETRY
-# -----------------------------------------------------------
-
-NEO4J_URI = os.getenv("NEO4J_URI", "bolt://sibi-neo4j:7687")
-NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
-NEO4J_PASS = os.getenv("NEO4J_PASS", "recovery123")
-
-driver = None
-for attempt in range(5):
-    try:
-        driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASS))
-        with driver.session() as session:
-            total = session.run("MATCH (n) RETURN count(n) AS total").single()["total"]
-            print(f"✅ Conectado correctamente a Neo4j ({total} nodos detectados)")
-        break
-    except Exception as e:
-        print(f"⏳ Intento {attempt + 1}/5: Error conectando con Neo4j: {e}")
-        time.sleep(5)
-else:
-    print("❌ No se pudo conectar con Neo4j después de varios intentos.")
-
-
 # -----------------------------------------------------------
 # 📘 ESQUEMA DEL GRAFO
 # -----------------------------------------------------------
@@ -88,15 +76,90 @@ Relaciones:
 (Player)-[:TEAMMATE_OF]->(Player)
 """
 
+CYPHER_PROMPT = """
+Eres un generador estricto de consultas Cypher para Neo4j.
+
+REGLAS OBLIGATORIAS:
+- Devuelve SOLO la consulta Cypher.
+- La consulta DEBE empezar por MATCH.
+- NO devuelvas RETURN p, RETURN t, RETURN l → usa SIEMPRE una propiedad.
+- SIEMPRE incluye ORDER BY rand().
+- SIEMPRE incluye LIMIT {numero}.
+- NO generes CREATE, DELETE, SET, MERGE, DROP.
+- NO devuelvas nodos completos.
+
+CUANDO EL USUARIO PIDE:
+- Jugadores → MATCH (p:Player) RETURN p.name ORDER BY rand() LIMIT {numero}
+- Equipos → MATCH (t:Team) RETURN t.name ORDER BY rand() LIMIT {numero}
+- Ligas → MATCH (l:League) RETURN l.name ORDER BY rand() LIMIT {numero}
+- Nacionalidades → MATCH (p:Player) RETURN DISTINCT p.nationality ORDER BY rand() LIMIT {numero}
+
+Esquema del grafo:
+{schema}
+
+Pregunta del usuario:
+{pregunta}
+
+Devuelve SOLO la consulta Cypher válida:
+"""
+
 
 # -----------------------------------------------------------
-# 🧩 IMPORTS DE MÓDULOS INTERNOS
+# 🗂️ CACHÉ DE TRADUCCIONES PREGUNTA → CYPHER
 # -----------------------------------------------------------
+# La traducción solo depende de la pregunta, del modelo y del prompt (no de los
+# datos), así que se cachea por tiempo. La clave es la pregunta normalizada con
+# el número del LIMIT abstraído: "5 jugadores del Barcelona" y "10 jugadores del
+# barcelona" comparten la misma consulta, que se guarda con LIMIT $limit.
+
+CYPHER_CACHE_SIZE = int(os.getenv("CYPHER_CACHE_SIZE", "1024"))
+CYPHER_CACHE_TTL = float(os.getenv("CYPHER_CACHE_TTL", str(7 * 24 * 3600)))
+CYPHER_CACHE_PATH = os.getenv("CYPHER_CACHE_PATH") or None   # sin definir: solo en memoria
+CYPHER_CACHE_FLUSH_S = float(os.getenv("CYPHER_CACHE_FLUSH_S", "30"))
+
+_traducciones = TTLCache(
+    "traducciones_cypher", max_entries=CYPHER_CACHE_SIZE, ttl=CYPHER_CACHE_TTL,
+    path=CYPHER_CACHE_PATH, flush_interval=CYPHER_CACHE_FLUSH_S,
+    fingerprint=hashlib.blake2b(f"{GROQ_MODEL}\n{CYPHER_PROMPT}\n{GRAFO_SCHEMA}".encode(), digest_size=8).hexdigest(),
+)
+
+NUMBER_PATTERN = re.compile(r"\b(\d+)\b")
+
+
+def numero_pregunta(pregunta: str) -> int:
+    """Número de resultados pedido en la pregunta (el primero que aparece; 5 si no hay)."""
+    m = NUMBER_PATTERN.search(pregunta)
+    return int(m.group(1)) if m else 5
+
+
+def normalizar_pregunta(pregunta: str) -> str:
+    """Clave de la caché: minúsculas, sin tildes ni puntuación y con el número del LIMIT como '#'."""
+    text = NUMBER_PATTERN.sub("#", pregunta.lower(), count=1)
+    text = "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+    text = re.sub(r"[^\w#]+", " ", text)
+    return " ".join(text.split())
+
+
+def parametrizar_limite(cypher: str, numero: int):
+    """
+    Sustituye `LIMIT <numero>` por `LIMIT $limit`. Devuelve None si la consulta no
+    termina en ese LIMIT o el número aparece en otro sitio (no se podría reutilizar).
+    """
+    template, n = re.subn(rf"\bLIMIT\s+{numero}\s*;?\s*$", "LIMIT $limit", cypher, flags=re.IGNORECASE)
+    if n != 1 or re.search(rf"\b{numero}\b", template):
+        return None
+    return template
+
+
+def cypher_seguro(cypher: str) -> bool:
+    """Solo se ejecutan lecturas: empieza por MATCH y no contiene cláusulas de escritura."""
+    forbidden = ["delete", "create", "merge", "set", "drop"]
+    return cypher.lower().startswith("match") and not any(f in cypher.lower() for f in forbidden)
 
-from app.selector_module import generar_convocatoria
-from app.analysis_module import analizar_convocatoria
-from app.context_memory import save_context, load_context, has_context
-from app.sibi_agent import ajustar_convocatoria
+
+def traduccion_cache_stats() -> dict:
+    """Aciertos, fallos y tiempo de LLM ahorrado por la caché de traducciones."""
+    return _traducciones.stats()
 
 
 # -----------------------------------------------------------
@@ -104,6 +167,8 @@ from app.sibi_agent import ajustar_convocatoria
 # -----------------------------------------------------------
 
 def detectar_intencion(pregunta: str, user_id: str) -> str:
+    from app.context_memory import has_context
+
     text = pregunta.lower()
     if has_context(user_id) and any(k in text for k in ["más", "menos", "cambia", "hazla", "modifica", "ajusta"]):
         return "ajuste"
@@ -116,43 +181,44 @@ def detectar_intencion(pregunta: str, user_id: str) -> str:
 # 🧩 EXTRACCIÓN DE PARÁMETROS (SIN CAMBIOS)
 # -----------------------------------------------------------
 
-def extraer_parametros(pregunta: str):
-    text = pregunta.lower()
+NATIONALITY_MAP = {
+    "españa": "Española", "español": "Española", "españoles": "Española",
 
-    nationality_map = {
-        "españa": "Española", "español": "Española", "españoles": "Española",
+    # 🇮🇹 Italia
+    "italia": "Italiana", "italiano": "Italiana", "italianos": "Italiana",
 
-        # 🇮🇹 Italia
-        "italia": "Italiana", "italiano": "Italiana", "italianos": "Italiana",
+    # 🇫🇷 Francia
+    "francia": "Francesa", "francés": "Francesa", "franceses": "Francesa",
 
-        # 🇫🇷 Francia
-        "francia": "Francesa", "francés": "Francesa", "franceses": "Francesa",
+    # 🇵🇹 Portugal
+    "portugal": "Portuguesa", "portugués": "Portuguesa", "portugueses": "Portuguesa",
 
-        # 🇵🇹 Portugal
-        "portugal": "Portuguesa", "portugués": "Portuguesa", "portugueses": "Portuguesa",
+    # 🇦🇷 Argentina
+    "argentina": "Argentina", "argentino": "Argentina", "argentinos": "Argentina",
 
-        # 🇦🇷 Argentina
-        "argentina": "Argentina", "argentino": "Argentina", "argentinos": "Argentina",
+    # 🇩🇪 Alemania
+    "alemania": "Alemana", "alemán": "Alemana", "alemanes": "Alemana",
 
-        # 🇩🇪 Alemania
-        "alemania": "Alemana", "alemán": "Alemana", "alemanes": "Alemana",
+    # 🏴 Inglaterra
+    "inglaterra": "Inglesa", "inglés": "Inglesa", "ingleses": "Inglesa",
 
-        # 🏴 Inglaterra
-        "inglaterra": "Inglesa", "inglés": "Inglesa", "ingleses": "Inglesa",
+    # 🇧🇷 Brasil
+    "brasil": "Brasileña", "brasileño": "Brasileña", "brasileños": "Brasileña",
 
-        # 🇧🇷 Brasil
-        "brasil": "Brasileña", "brasileño": "Brasileña", "brasileños": "Brasileña",
+    # 🇳🇱 Países Bajos
+    "países bajos": "Neerlandesa", "holanda": "Neerlandesa",
+    "neerlandés": "Neerlandesa", "neerlandeses": "Neerlandesa",
 
-        # 🇳🇱 Países Bajos
-        "países bajos": "Neerlandesa", "holanda": "Neerlandesa",
-        "neerlandés": "Neerlandesa", "neerlandeses": "Neerlandesa",
+    # 🇺🇾 Uruguay
+    "uruguay": "Uruguaya", "uruguayo": "Uruguaya", "uruguayos": "Uruguaya"
+}
 
-        # 🇺🇾 Uruguay
-        "uruguay": "Uruguaya", "uruguayo": "Uruguaya", "uruguayos": "Uruguaya"
-    }
+
+def extraer_parametros(pregunta: str):
+    text = pregunta.lower()
 
     nationality = "Española"
-    for k, v in nationality_map.items():
+    for k, v in NATIONALITY_MAP.items():
         if k in text:
             nationality = v
             break
@@ -239,6 +305,11 @@ def formatear_convocatoria(resultado):
 # -----------------------------------------------------------
 
 def query_grafo(pregunta: str, user_id: str = "user"):
+    # Módulos internos con pandas/numpy: se importan en la primera consulta
+    from app.selector_module import generar_convocatoria
+    from app.analysis_module import analizar_convocatoria
+    from app.context_memory import save_context
+    from app.sibi_agent import ajustar_convocatoria
 
     intencion = detectar_intencion(pregunta, user_id)
 
@@ -260,43 +331,100 @@ def query_grafo(pregunta: str, user_id: str = "user"):
         texto_analisis, _ = analizar_convocatoria(result)
         return {"respuesta": texto_conv + "\n\n" + texto_analisis, "result": result}
 
-    # -----------------------------------------------------------
-     # -----------------------------------------------------------
-    # CONSULTA LIBRE CON GROQ (Cypher Only)
-    # -----------------------------------------------------------
+    return consulta_libre(pregunta)
 
-    import re
-    m = re.search(r"\b(\d+)\b", pregunta)
-    numero_detectado = int(m.group(1)) if m else 5
 
-    prompt = f"""
-Eres un generador estricto de consultas Cypher para Neo4j.
+async def query_grafo_async(pregunta: str, user_id: str = "user"):
+    """
+    Como `query_grafo` para los endpoints async: la consulta libre no ocupa un
+    hilo mientras espera al LLM o a Neo4j. Las convocatorias (CPU) van al threadpool.
+    """
+    if detectar_intencion(pregunta, user_id) != "consulta":
+        return await asyncio.to_thread(query_grafo, pregunta, user_id)
+    return await consulta_libre_async(pregunta)
 
-REGLAS OBLIGATORIAS:
-- Devuelve SOLO la consulta Cypher.
-- La consulta DEBE empezar por MATCH.
-- NO devuelvas RETURN p, RETURN t, RETURN l → usa SIEMPRE una propiedad.
-- SIEMPRE incluye ORDER BY rand().
-- SIEMPRE incluye LIMIT {numero_detectado}.
-- NO generes CREATE, DELETE, SET, MERGE, DROP.
-- NO devuelvas nodos completos.
 
-CUANDO EL USUARIO PIDE:
-- Jugadores → MATCH (p:Player) RETURN p.name ORDER BY rand() LIMIT {numero_detectado}
-- Equipos → MATCH (t:Team) RETURN t.name ORDER BY rand() LIMIT {numero_detectado}
-- Ligas → MATCH (l:League) RETURN l.name ORDER BY rand() LIMIT {numero_detectado}
-- Nacionalidades → MATCH (p:Player) RETURN DISTINCT p.nationality ORDER BY rand() LIMIT {numero_detectado}
+# -----------------------------------------------------------
+# 📡 RESPUESTA POR ETAPAS (streaming)
+# -----------------------------------------------------------
 
-Esquema del grafo:
-{GRAFO_SCHEMA}
+def _ultimas_mejoras(batch: list) -> list:
+    """Deja solo la última mejora de cada estilo en un lote de eventos pendientes."""
+    last = {ev["style"]: i for i, ev in enumerate(batch) if ev.get("stage") == "improvement"}
+    return [ev for i, ev in enumerate(batch) if ev.get("stage") != "improvement" or last[ev["style"]] == i]
+
+
+async def query_grafo_stream(pregunta: str, user_id: str = "user"):
+    """
+    Como `query_grafo_async`, pero genera las etapas según ocurren: parámetros
+    interpretados, convocatoria voraz de cada estilo, mejoras de la búsqueda
+    local, convocatoria final y análisis. Las mejoras que se acumulan mientras
+    el cliente lee se agrupan (solo se envía la última de cada estilo).
+    Si el consumidor deja de leer (cliente desconectado), la búsqueda se detiene.
+    """
+    from app.analysis_module import analizar_convocatoria
+    from app.context_memory import save_context
+    from app.selector_module import generar_convocatoria
+
+    if detectar_intencion(pregunta, user_id) != "convocatoria":
+        yield {"stage": "answer", "respuesta": await query_grafo_async(pregunta, user_id)}
+        return
+
+    params = extraer_parametros(pregunta)
+    yield {"stage": "params", **params}
+
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    cancel = threading.Event()
+    task = asyncio.ensure_future(asyncio.to_thread(
+        generar_convocatoria, **params,
+        progress=lambda ev: loop.call_soon_threadsafe(queue.put_nowait, ev),
+        cancel=cancel,
+    ))
+    task.add_done_callback(lambda _: queue.put_nowait(None))
+    try:
+        finished = False
+        while not finished:
+            batch = [await queue.get()]
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            finished = None in batch
+            for ev in _ultimas_mejoras([ev for ev in batch if ev is not None]):
+                yield ev
+        result = task.result()
+    finally:
+        cancel.set()
+
+    if not result or "error" in result:
+        yield {"stage": "error", "respuesta": formatear_convocatoria(result)}
+        return
+    save_context(user_id, {"params": params, "result": result})
+    texto_conv = formatear_convocatoria(result)
+    yield {"stage": "squad", "respuesta": texto_conv, "result": result}
+    texto_analisis, _ = await asyncio.to_thread(analizar_convocatoria, result)
+    yield {"stage": "analysis", "respuesta": texto_analisis}
 
-Pregunta del usuario:
-{pregunta}
 
-Devuelve SOLO la consulta Cypher válida:
-"""
+# -----------------------------------------------------------
+# 🔎 CONSULTA LIBRE (plantillas y, si no encaja, Cypher generado por Groq)
+# -----------------------------------------------------------
 
-    cypher_raw = groq_complete(prompt)
+def _traduccion_cacheada(pregunta: str):
+    """(número pedido, clave de la caché, Cypher cacheado o None)."""
+    numero_detectado = numero_pregunta(pregunta)
+    clave = normalizar_pregunta(pregunta)
+    cypher = _traducciones.get(clave)
+    if cypher is not None and not cypher_seguro(cypher):
+        # Entrada persistida alterada: se ignora y se vuelve a traducir
+        cypher = None
+    return numero_detectado, clave, cypher
+
+
+def _registrar_traduccion(cypher_raw: str, clave: str, numero_detectado: int, llm_ms: float):
+    """
+    Limpia y valida el Cypher del LLM y lo cachea si se puede reutilizar.
+    Devuelve (cypher, parámetros) o el mensaje de error para el usuario.
+    """
     if not cypher_raw:
         return "❌ Error generando Cypher."
 
@@ -305,71 +433,134 @@ Devuelve SOLO la consulta Cypher válida:
 
     print("🧠 Cypher generado por Groq:", cypher)
 
-    forbidden = ["delete", "create", "merge", "set", "drop"]
-    if not cypher.lower().startswith("match") or any(f in cypher.lower() for f in forbidden):
+    if not cypher_seguro(cypher):
         return f"🤖 Consulta no segura:\n{cypher}"
 
-    try:
-        with driver.session() as s:
-            recs = [r.data() for r in s.run(cypher)]
-
-        # -------------------------------------------------------
-        # 🔥 LIMPIEZA AVANZADA DEFINITIVA
-        # -------------------------------------------------------
-
-        if recs:
-
-            # A) Caso simple: solo una key → p.name, t.name...
-            if all(len(r.keys()) == 1 for r in recs):
-                key = list(recs[0].keys())[0]
-                valores = []
+    # Solo se cachean consultas seguras cuyo LIMIT se puede reutilizar con otro número
+    template = parametrizar_limite(cypher, numero_detectado)
+    if template is None:
+        return cypher, {}
+    _traducciones.put(clave, template, cost_ms=llm_ms)
+    return template, {"limit": numero_detectado}
 
-                for r in recs:
-                    val = r[key]
 
-                    # Nodo completo → extraer solo name
-                    if isinstance(val, dict):
-                        valores.append(val.get("name", str(val)))
-                    else:
-                        valores.append(val)
+def _limpiar_resultados(recs: list, numero_detectado: int):
+    # -------------------------------------------------------
+    # 🔥 LIMPIEZA AVANZADA DEFINITIVA
+    # -------------------------------------------------------
 
-                # Asegurar tamaño correcto
-                valores = valores[:numero_detectado]
-                return {"type": "consulta_limpia", "data": valores}
+    if recs:
 
-            # B) Caso múltiple: Groq devolvió varias columnas → extraer SOLO nombre
+        # A) Caso simple: solo una key → p.name, t.name...
+        if all(len(r.keys()) == 1 for r in recs):
+            key = list(recs[0].keys())[0]
             valores = []
-            for r in recs:
-                encontrado = False
 
-                for k, v in r.items():
-                    k_lower = k.lower()
+            for r in recs:
+                val = r[key]
 
-                    # 1) p.name
-                    if "name" in k_lower:
-                        valores.append(v)
-                        encontrado = True
-                        break
+                # Nodo completo → extraer solo name
+                if isinstance(val, dict):
+                    valores.append(val.get("name", str(val)))
+                else:
+                    valores.append(val)
 
-                    # 2) alias tipo "jugador" → si es nombre completo
-                    if isinstance(v, str) and len(v.split()) >= 2:
-                        valores.append(v)
-                        encontrado = True
-                        break
+            # Asegurar tamaño correcto
+            valores = valores[:numero_detectado]
+            return {"type": "consulta_limpia", "data": valores}
 
-                    # 3) nodo Player → extraemos name
-                    if isinstance(v, dict) and "name" in v:
-                        valores.append(v["name"])
-                        encontrado = True
-                        break
+        # B) Caso múltiple: Groq devolvió varias columnas → extraer SOLO nombre
+        valores = []
+        for r in recs:
+            encontrado = False
+
+            for k, v in r.items():
+                k_lower = k.lower()
+
+                # 1) p.name
+                if "name" in k_lower:
+                    valores.append(v)
+                    encontrado = True
+                    break
+
+                # 2) alias tipo "jugador" → si es nombre completo
+                if isinstance(v, str) and len(v.split()) >= 2:
+                    valores.append(v)
+                    encontrado = True
+                    break
+
+                # 3) nodo Player → extraemos name
+                if isinstance(v, dict) and "name" in v:
+                    valores.append(v["name"])
+                    encontrado = True
+                    break
+
+            if not encontrado:
+                valores.append(str(r))
+
+        valores = valores[:numero_detectado]
+        return {"type": "consulta_limpia", "data": valores}
+
+    return {"type": "consulta", "data": recs}
+
+
+def consulta_libre(pregunta: str):
+    from app.query_cache_module import leer
+    from app.template_module import compilar_pregunta, formatear_filas
+
+    # Preguntas frecuentes: Cypher de plantilla, sin llamar al LLM
+    plantilla = compilar_pregunta(pregunta)
+    if plantilla is not None:
+        try:
+            return {"type": "consulta_limpia", "data": formatear_filas(plantilla, leer(plantilla["cypher"], plantilla["params"]))}
+        except Exception as e:
+            return {"type": "error", "data": str(e)}
+
+    numero_detectado, clave, cypher = _traduccion_cacheada(pregunta)
+    params = {"limit": numero_detectado}
+    if cypher is None:
+        start = time.perf_counter()
+        cypher_raw = groq_complete(CYPHER_PROMPT.format(numero=numero_detectado, schema=GRAFO_SCHEMA, pregunta=pregunta))
+        traduccion = _registrar_traduccion(cypher_raw, clave, numero_detectado, (time.perf_counter() - start) * 1000)
+        if isinstance(traduccion, str):
+            return traduccion
+        cypher, params = traduccion
 
-                if not encontrado:
-                    valores.append(str(r))
+    try:
+        return _limpiar_resultados(leer(cypher, params), numero_detectado)
+    except Exception as e:
+        return {"type": "error", "data": str(e)}
 
-            valores = valores[:numero_detectado]
-            return {"type": "consulta_limpia", "data": valores}
 
-        return {"type": "consulta", "data": recs}
+async def consulta_libre_async(pregunta: str):
+    from app.llm_module import obtener_cliente_llm
+    from app.query_cache_module import leer_async
+    from app.template_module import compilar_pregunta, formatear_filas
+
+    plantilla = compilar_pregunta(pregunta)
+    if plantilla is not None:
+        try:
+            rows = await leer_async(plantilla["cypher"], plantilla["params"])
+            return {"type": "consulta_limpia", "data": formatear_filas(plantilla, rows)}
+        except Exception as e:
+            return {"type": "error", "data": str(e)}
+
+    numero_detectado, clave, cypher = _traduccion_cacheada(pregunta)
+    params = {"limit": numero_detectado}
+    if cypher is None:
+        start = time.perf_counter()
+        try:
+            cypher_raw = await obtener_cliente_llm().completar(
+                CYPHER_PROMPT.format(numero=numero_detectado, schema=GRAFO_SCHEMA, pregunta=pregunta)
+            )
+        except Exception as e:
+            return f"❌ Error Groq: {type(e).__name__} {e}".strip()
+        traduccion = _registrar_traduccion(cypher_raw, clave, numero_detectado, (time.perf_counter() - start) * 1000)
+        if isinstance(traduccion, str):
+            return traduccion
+        cypher, params = traduccion
 
+    try:
+        return _limpiar_resultados(await leer_async(cypher, params), numero_detectado)
     except Exception as e:
         return {"type": "error", "data": str(e)}
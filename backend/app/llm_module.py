@@ -0,0 +1,181 @@
+# app/llm_module.py
+"""
+Cliente asíncrono del LLM (Groq, API compatible con OpenAI) para los endpoints async.
+
+  - Timeout duro por intento: una respuesta lenta no retiene al endpoint más
+    de LLM_TIMEOUT segundos por intento.
+  - Concurrencia acotada con un semáforo (LLM_MAX_CONCURRENCY): el resto de
+    peticiones esperan en cola sin ocupar hilos.
+  - Reintentos con backoff exponencial y jitter para errores transitorios
+    (timeouts, conexión, 429 y 5xx); los demás errores se propagan en el acto.
+  - Single-flight: las peticiones concurrentes con el mismo prompt comparten
+    una única llamada en curso.
+
+Con GROQ_BASE_URL se puede apuntar a otro servidor compatible, p. ej. el falso
+de benchmarks/fake_llm_server.py. El paquete groq se importa en el primer uso.
+"""
+import asyncio
+import os
+import random
+import statistics
+import time
+from collections import deque
+
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+GROQ_MODEL = os.getenv("GROQ_MODEL", "llama-3.1-8b-instant")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None
+
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "20"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF = float(os.getenv("LLM_BACKOFF", "0.5"))
+
+
+def errores_transitorios() -> tuple:
+    """Errores tras los que merece la pena reintentar (groq se importa al usarse)."""
+    from groq import APIConnectionError, InternalServerError, RateLimitError
+    # APITimeoutError es una subclase de APIConnectionError
+    return asyncio.TimeoutError, APIConnectionError, InternalServerError, RateLimitError
+
+
+class ClienteLLM:
+    """Cliente compartido por el proceso; debe usarse siempre desde el mismo event loop."""
+
+    def __init__(self, api_key: str = GROQ_API_KEY, model: str = GROQ_MODEL, base_url: str = GROQ_BASE_URL,
+                 timeout: float = LLM_TIMEOUT, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 max_retries: int = LLM_MAX_RETRIES, backoff: float = LLM_BACKOFF):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._client = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._inflight = {}
+        # Métricas
+        self.requests = 0
+        self.calls = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.running = 0
+        self._latencies_ms = deque(maxlen=512)
+        self._wait_ms = deque(maxlen=512)
+
+    @property
+    def configurado(self) -> bool:
+        return bool(self.api_key or self.base_url)
+
+    def _cliente(self):
+        if self._client is None:
+            from groq import AsyncGroq
+            # Los reintentos y el timeout los gestiona esta clase, no el SDK
+            self._client = AsyncGroq(api_key=self.api_key or "local", base_url=self.base_url,
+                                     timeout=self.timeout, max_retries=0)
+        return self._client
+
+    async def _llamar(self, prompt: str, max_tokens: int, temperature: float) -> str:
+        queued_at = time.perf_counter()
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        self._wait_ms.append((time.perf_counter() - queued_at) * 1000)
+        self.running += 1
+        try:
+            start = time.perf_counter()
+            self.calls += 1
+            response = await asyncio.wait_for(
+                self._cliente().chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                ),
+                timeout=self.timeout,
+            )
+            self._latencies_ms.append((time.perf_counter() - start) * 1000)
+            return response.choices[0].message.content.strip()
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+
+    async def _completar_con_reintentos(self, prompt: str, max_tokens: int, temperature: float) -> str:
+        transient = errores_transitorios()
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self._llamar(prompt, max_tokens, temperature)
+            except transient as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    self.timeouts += 1
+                if attempt == self.max_retries:
+                    self.errors += 1
+                    raise
+                self.retries += 1
+                # Backoff exponencial con jitter completo: los reintentos no llegan a la vez
+                await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+            except Exception:
+                self.errors += 1
+                raise
+
+    async def completar(self, prompt: str, max_tokens: int = 200, temperature: float = 0.0) -> str:
+        """Respuesta del LLM al prompt (las peticiones idénticas en curso se comparten)."""
+        if not self.configurado:
+            raise RuntimeError("Groq no está configurado.")
+        self.requests += 1
+        key = (prompt, max_tokens, temperature)
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._completar_con_reintentos(prompt, max_tokens, temperature))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # shield: si un cliente se desconecta no se cancela la llamada que esperan los demás
+        return await asyncio.shield(task)
+
+    def stats(self) -> dict:
+        latencies = list(self._latencies_ms)
+        waits = list(self._wait_ms)
+        return {
+            "model": self.model,
+            "requests": self.requests,
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "in_flight": len(self._inflight),
+            "running": self.running,
+            "queue_depth": self.queued,
+            "max_queue_depth": self.max_queued,
+            "max_concurrency": self.max_concurrency,
+            "latency_ms": {
+                "p50": round(statistics.median(latencies), 1) if latencies else None,
+                "p95": round(statistics.quantiles(latencies, n=20)[-1], 1) if len(latencies) > 1 else None,
+                "max": round(max(latencies), 1) if latencies else None,
+            },
+            "queue_wait_ms_p95": round(statistics.quantiles(waits, n=20)[-1], 1) if len(waits) > 1 else None,
+        }
+
+
+_cliente_llm = None
+
+
+def obtener_cliente_llm() -> ClienteLLM:
+    """Cliente asíncrono compartido (se crea en el primer uso)."""
+    global _cliente_llm
+    if _cliente_llm is None:
+        _cliente_llm = ClienteLLM()
+    return _cliente_llm
+
+
+def llm_stats() -> dict:
+    return obtener_cliente_llm().stats()
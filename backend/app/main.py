@@ -1,9 +1,76 @@
 import os
-import csv
+import asyncio
+import json
 import logging
 import webbrowser
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
 from fastapi import FastAPI, HTTPException, Header, Request
-from neo4j import GraphDatabase
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.cache_module import bump_generation
+from app.graph_module import DEFAULT_BATCH_SIZE, construir_grafo
+from app.db_module import (
+    cerrar_drivers, comprobar_conexion, consultar_uno, estado_conexion, obtener_driver,
+    obtener_driver_async,
+)
+from app.importer_module import (
+    DEFAULT_CHUNK_SIZE, actualizar_estadisticas, importar_jugadores_async, importar_por_bloques_async,
+)
+from app.schema_module import aplicar_esquema, asegurar_esquema, verificar_esquema
+
+# -----------------------------------------------------------
+# 🚀 ARRANQUE Y APAGADO: NEO4J EN SEGUNDO PLANO Y NAVEGADOR
+# -----------------------------------------------------------
+
+_tareas_arranque = set()
+
+
+async def _preparar_neo4j(intervalo: float = 5.0, max_intervalo: float = 60.0):
+    """Espera a Neo4j sin bloquear el arranque y, cuando responde, verifica el esquema."""
+    while not (await comprobar_conexion())["ready"]:
+        logging.info(f"⏳ Neo4j aún no disponible ({estado_conexion()['error']}). Reintento en {intervalo:.0f}s")
+        await asyncio.sleep(intervalo)
+        intervalo = min(intervalo * 2, max_intervalo)
+    logging.info("✅ Conexión con Neo4j disponible.")
+
+    try:
+        report = await run_in_threadpool(asegurar_esquema, obtener_driver())
+        if report["ok"]:
+            logging.info("Esquema del grafo verificado (restricciones e índices ONLINE).")
+        else:
+            logging.warning(f"Esquema del grafo incompleto: {report}")
+    except Exception as e:
+        logging.warning(f"No se pudo verificar el esquema del grafo: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Arranque: prepara Neo4j en segundo plano y abre el navegador. Apagado: cancela
+    la preparación si sigue pendiente y cierra los drivers (y su pool de conexiones).
+    """
+    task = asyncio.create_task(_preparar_neo4j())
+    _tareas_arranque.add(task)
+    task.add_done_callback(_tareas_arranque.discard)
+
+    try:
+        webbrowser.open_new_tab("http://localhost:8000/health")
+    except Exception as e:
+        logging.warning(f"No se pudo abrir navegador automáticamente: {e}")
+
+    yield
+
+    # La preparación pendiente termina antes de cerrar los drivers que usa
+    pending = list(_tareas_arranque)
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    await cerrar_drivers()
+    logging.info("Conexión a Neo4j cerrada correctamente.")
+
 
 # -----------------------------------------------------------
 # 🧱 CONFIGURACIÓN BÁSICA
@@ -12,18 +79,13 @@ from neo4j import GraphDatabase
 app = FastAPI(
     title="SIBI Backend - Sistema Inteligente de Selección de Jugadores",
     version="1.0.0",
-    description="Orquestador que conecta Neo4j, LlamaIndex y Ollama."
+    description="Orquestador que conecta Neo4j, LlamaIndex y Ollama.",
+    lifespan=lifespan,
 )
 
-# Variables de entorno con valores por defecto
-NEO4J_URI = os.getenv("NEO4J_URI", "bolt://sibi-neo4j:7687")
-NEO4J_USER = os.getenv("NEO4J_USER", "neo4j")
-NEO4J_PASS = os.getenv("NEO4J_PASS", "recovery123")
+# Variables de entorno con valores por defecto (la conexión a Neo4j está en app.db_module)
 API_KEY = os.getenv("API_KEY", "seleccionador123")
 
-# Conexión con Neo4j
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASS))
-
 # Configuración de logging
 logging.basicConfig(
     filename="agent_activity.log",
@@ -55,27 +117,24 @@ async def verify_api_key(request: Request, call_next):
 # -----------------------------------------------------------
 
 @app.get("/health")
-def health():
+async def health():
     status = {"status": "ok"}
     try:
-        with driver.session() as s:
-            result = s.run("RETURN 1 AS ok").single()
-            status["neo4j"] = "connected" if result and result["ok"] == 1 else "no response"
+        result = await consultar_uno("RETURN 1 AS ok", reintentar=False)
+        status["neo4j"] = "connected" if result and result["ok"] == 1 else "no response"
     except Exception as e:
         status["neo4j"] = f"error: {type(e).__name__} - {str(e)}"
+    status["ready"] = estado_conexion()["ready"]
     return status
 
-# -----------------------------------------------------------
-# 🚀 ABRIR NAVEGADOR AL INICIAR SERVIDOR
-# -----------------------------------------------------------
 
-@app.on_event("startup")
-async def startup_event():
-    """Abrir navegador automáticamente al arrancar el servidor."""
-    try:
-        webbrowser.open_new_tab("http://localhost:8000/health")
-    except Exception as e:
-        logging.warning(f"No se pudo abrir navegador automáticamente: {e}")
+@app.get("/health/ready")
+def readiness():
+    """Disponibilidad del backend: 503 hasta que Neo4j haya respondido."""
+    estado = estado_conexion()
+    if not estado["ready"]:
+        raise HTTPException(status_code=503, detail=estado)
+    return estado
 
 # -----------------------------------------------------------
 # Resto de endpoints (igual que ya tienes)
@@ -89,47 +148,101 @@ async def startup_event():
 @app.get("/api/nodes/sample")
 def sample_nodes(limit: int = 5):
     """Devuelve una muestra de nodos para verificar contenido de la base."""
+    from app.query_cache_module import leer
     try:
-        with driver.session() as s:
-            records = s.run(
-                "MATCH (n) RETURN labels(n) AS labels, n.name AS name LIMIT $limit",
-                limit=limit
-            )
-            nodes = [{"labels": r["labels"], "name": r["name"]} for r in records]
-            return {"count": len(nodes), "nodes": nodes}
+        records = leer("MATCH (n) RETURN labels(n) AS labels, n.name AS name LIMIT $limit", {"limit": limit})
+        nodes = [{"labels": r["labels"], "name": r["name"]} for r in records]
+        return {"count": len(nodes), "nodes": nodes}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+DEFAULT_PLAYER_FIELDS = ["name", "team", "position", "specific_position", "injured"]
+
+
 @app.get("/api/players/{nationality}")
-def get_players_by_nationality(nationality: str):
-    """Devuelve los jugadores de una nacionalidad específica."""
+async def get_players_by_nationality(
+    nationality: str,
+    fields: Optional[str] = None,
+    after: Optional[str] = None,
+    limit: int = 100,
+    position: Optional[str] = None,
+    specific_position: Optional[str] = None,
+    team: Optional[str] = None,
+    league: Optional[str] = None,
+    injured: Optional[bool] = None,
+    stream: bool = False
+):
+    """
+    Devuelve los jugadores de una nacionalidad específica, por páginas ordenadas
+    por player_id. `next_cursor` se pasa como `after` para pedir la siguiente
+    página; `fields=name,team,...` elige las propiedades devueltas (player_id va
+    siempre). Con `stream=true` cada jugador es una línea JSON y la última línea
+    lleva `next_cursor`.
+    """
+    from app.player_store import abrir_store
+    from app.repository_module import MAX_PAGE_SIZE, obtener_repositorio, validar_campos
+
+    try:
+        selected = validar_campos(fields.split(",")) if fields else DEFAULT_PLAYER_FIELDS
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not 0 < limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit debe estar entre 1 y {MAX_PAGE_SIZE}")
+    filters = {k: v for k, v in {
+        "position": position, "specific_position": specific_position,
+        "team": team, "league": league, "injured": injured,
+    }.items() if v is not None}
+    columns = ["player_id"] + [f for f in selected if f != "player_id"]
+
+    store = abrir_store()
+    repo = obtener_repositorio()
+
+    def siguiente(last_id, count):
+        return last_id if count == limit else None
+
+    if stream:
+        async def players_stream():
+            last_id, count = None, 0
+            try:
+                if store is not None:
+                    page = store.pagina(nationality, columns, after, limit, filters).to_dict(orient="records")
+                    for player in page:
+                        last_id, count = player["player_id"], count + 1
+                        yield json.dumps(player, ensure_ascii=False, default=str) + "\n"
+                else:
+                    async for player in repo.iterar_pagina_async(nationality, selected, after, limit, filters):
+                        last_id, count = player["player_id"], count + 1
+                        yield json.dumps(player, ensure_ascii=False, default=str) + "\n"
+            except Exception as e:
+                yield json.dumps({"ok": False, "error": str(e)}) + "\n"
+                return
+            yield json.dumps({"done": True, "count": count, "next_cursor": siguiente(last_id, count)}) + "\n"
+
+        return StreamingResponse(players_stream(), media_type="application/x-ndjson")
+
     try:
-        with driver.session() as s:
-            result = s.run("""
-                MATCH (p:Player)
-                WHERE p.nationality = $nationality
-                RETURN p.name AS name,
-                       p.team AS team,
-                       p.position AS position,
-                       p.specific_position AS specific_position,
-                       p.injured AS injured
-                LIMIT 100
-            """, {"nationality": nationality})
-            players = [record.data() for record in result]
-            return {"nationality": nationality, "count": len(players), "players": players}
+        if store is not None:
+            players = store.pagina(nationality, columns, after, limit, filters).to_dict(orient="records")
+        else:
+            players = await repo.pagina_async(nationality, selected, after, limit, filters)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    last_id = players[-1]["player_id"] if players else None
+    return {
+        "nationality": nationality,
+        "count": len(players),
+        "players": players,
+        "next_cursor": siguiente(last_id, len(players)),
+    }
 
 
 @app.get("/api/check_neo4j")
-def check_neo4j():
+async def check_neo4j():
     """Comprueba conexión y cantidad total de nodos en Neo4j."""
     try:
-        with driver.session() as session:
-            result = session.run("MATCH (n) RETURN count(n) AS total_nodes")
-            total = result.single()["total_nodes"]
-            return {"message": "Conexión con Neo4j exitosa", "total_nodes": total}
+        result = await consultar_uno("MATCH (n) RETURN count(n) AS total_nodes", reintentar=False)
+        return {"message": "Conexión con Neo4j exitosa", "total_nodes": result["total_nodes"]}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error: {e}")
 
@@ -139,155 +252,208 @@ def check_neo4j():
 # -----------------------------------------------------------
 
 
+@app.get("/api/admin/cache")
+def cache_stats():
+    """Estadísticas de las cachés: jugadores del seleccionador, traducciones a Cypher y resultados."""
+    from app.llama_integration import traduccion_cache_stats
+    from app.query_cache_module import resultados_cache_stats
+    from app.selector_module import player_cache_stats
+    return {
+        "jugadores": player_cache_stats(),
+        "traducciones_cypher": traduccion_cache_stats(),
+        "resultados_cypher": resultados_cache_stats(),
+    }
+
+
+@app.get("/api/admin/llm")
+def llm_status():
+    """Métricas del cliente asíncrono del LLM: llamadas, coalescencia, reintentos, cola y latencias."""
+    from app.llm_module import llm_stats
+    return llm_stats()
+
+
+@app.get("/api/admin/schema")
+def schema_status():
+    """Restricciones e índices del grafo: qué falta, estado y uso de cada índice."""
+    try:
+        return verificar_esquema(obtener_driver())
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/api/admin/schema")
+def apply_schema():
+    """Crea las restricciones e índices que falten y devuelve la verificación."""
+    try:
+        applied = aplicar_esquema(obtener_driver())
+        return {**applied, **verificar_esquema(obtener_driver())}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _publicar_store():
+    """
+    Reescribe el almacén columnar compartido por los workers con todos los
+    jugadores del repositorio (no solo los del fichero importado, que puede ser
+    parcial). Si falla, se sigue leyendo del repositorio.
+    """
+    from app.player_store import escribir_store
+    from app.repository_module import obtener_repositorio
+
+    try:
+        meta = escribir_store(obtener_repositorio().exportar())
+        logging.info(f"Almacén columnar actualizado: {meta['rows']} jugadores (v{meta['generation']})")
+    except Exception as e:
+        logging.warning(f"No se pudo escribir el almacén columnar: {e}")
+
+
+def _actualizar_repositorio(path, delete_missing):
+    """El repositorio embebido (SQLite) aplica el mismo CSV con el mismo criterio incremental que Neo4j."""
+    from app.repository_module import obtener_repositorio
+
+    try:
+        obtener_repositorio().actualizar(path, delete_missing)
+    except Exception as e:
+        logging.warning(f"No se pudo actualizar el repositorio de jugadores: {e}")
+
+
 @app.post("/api/admin/import/players")
-def import_players(path: str = "datasets/jugadores_futbol_realistas.csv"):
-    """Carga los jugadores desde el CSV a la base de datos Neo4j."""
+async def import_players(
+    path: str = "datasets/jugadores_futbol_realistas.csv",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    delete_missing: bool = False,
+    stream: bool = False
+):
+    """
+    Carga los jugadores desde el CSV a la base de datos Neo4j por bloques de
+    `chunk_size` filas, cada uno en su propia transacción. Solo se escriben las
+    filas nuevas o modificadas (según su huella); con `delete_missing=true` se
+    borran los jugadores que ya no están en el fichero. Con `stream=true`
+    devuelve el progreso de cada bloque como líneas JSON.
+    """
+    from app.player_store import abrir_store
+
     full_path = path if os.path.isabs(path) else os.path.join(os.getcwd(), path)
     if not os.path.exists(full_path):
         raise HTTPException(status_code=404, detail=f"Archivo no encontrado: {full_path}")
+    if chunk_size <= 0:
+        raise HTTPException(status_code=400, detail="chunk_size debe ser mayor que 0")
+
+    def finalizar(summary):
+        changed = summary["inserted"] + summary["updated"] + summary["removed"]
+        logging.info(
+            f"Importación desde {path}: {summary['inserted']} nuevos, {summary['updated']} actualizados, "
+            f"{summary['unchanged']} sin cambios, {summary['removed']} eliminados"
+        )
+        if not changed and abrir_store() is not None:
+            return
+        # Solo se invalidan las cachés de las nacionalidades que han cambiado
+        bump_generation(scopes=summary["nationalities"])
+        try:
+            # Mínimo/máximo por nacionalidad para normalizar sin recorrer el pool
+            actualizar_estadisticas(obtener_driver(), summary["nationalities"])
+        except Exception as e:
+            logging.warning(f"No se pudieron actualizar las estadísticas de normalización: {e}")
+        _actualizar_repositorio(full_path, delete_missing)
+        _publicar_store()
+
+    async_driver = obtener_driver_async()
+    if stream:
+        async def progress():
+            last = {"imported": 0}
+            try:
+                async for last in importar_por_bloques_async(async_driver, full_path, chunk_size, delete_missing):
+                    if not last.get("done"):
+                        yield json.dumps(last) + "\n"
+            except Exception as e:
+                yield json.dumps({"ok": False, "error": str(e), "imported": last["imported"]}) + "\n"
+                return
+            await run_in_threadpool(finalizar, last)
+            yield json.dumps({"ok": True, **last}, ensure_ascii=False) + "\n"
+
+        return StreamingResponse(progress(), media_type="application/x-ndjson")
 
-    rows = []
-    with open(full_path, newline='', encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # Ahora capturamos TODAS las columnas del CSV
-            rows.append({
-                "player_id": row.get("player_id"),
-                "name": row.get("name"),
-                "age": row.get("age"),
-                "nationality": row.get("nationality"),
-                "team": row.get("team"),
-                "league": row.get("league"),
-                "position": row.get("position"),
-                "specific_position": row.get("specific_position"),
-                "injured": row.get("injured"),
-                "height_cm": row.get("height_cm"),
-                "weight_kg": row.get("weight_kg"),
-                "stamina": row.get("stamina"),
-                "matches_played": row.get("matches_played"),
-                "minutes_played": row.get("minutes_played"),
-                "yellow_cards": row.get("yellow_cards"),
-                "red_cards": row.get("red_cards"),
-                "goals": row.get("goals"),
-                "assists": row.get("assists"),
-                "shots_per_game": row.get("shots_per_game"),
-                "key_passes_per_game": row.get("key_passes_per_game"),
-                "dribbles_per_game": row.get("dribbles_per_game"),
-                "tackles_per_game": row.get("tackles_per_game"),
-                "interceptions_per_game": row.get("interceptions_per_game"),
-                "clearances_per_game": row.get("clearances_per_game"),
-                "aerial_duels_won_pct": row.get("aerial_duels_won_pct"),
-                "fouls_per_game": row.get("fouls_per_game"),
-                "pass_accuracy_pct": row.get("pass_accuracy_pct"),
-                "passes_per_game": row.get("passes_per_game"),
-                "long_balls_per_game": row.get("long_balls_per_game"),
-                "crosses_per_game": row.get("crosses_per_game"),
-                "saves_per_game": row.get("saves_per_game"),
-                "clean_sheets": row.get("clean_sheets"),
-                "goals_conceded": row.get("goals_conceded"),
-                "penalty_save_pct": row.get("penalty_save_pct")
-            })
-
-    if not rows:
-        return {"ok": True, "imported": 0}
-
-    # Esta consulta Cypher ahora importa TODAS las propiedades
-    # y las convierte al tipo de dato correcto (Integer, Float).
-    cypher = """
-    UNWIND $rows AS row
-    MERGE (p:Player {player_id: row.player_id})
-    SET
-        p.name = row.name,
-        p.age = toInteger(row.age),
-        p.nationality = row.nationality,
-        p.team = row.team,
-        p.league = row.league,
-        p.position = row.position,
-        p.specific_position = row.specific_position,
-        p.injured = row.injured,
-        p.height_cm = toInteger(row.height_cm),
-        p.weight_kg = toInteger(row.weight_kg),
-        p.stamina = toInteger(row.stamina),
-        
-        // --- Estadísticas de Juego ---
-        p.matches_played = toInteger(row.matches_played),
-        p.minutes_played = toInteger(row.minutes_played),
-        p.yellow_cards = toInteger(row.yellow_cards),
-        p.red_cards = toInteger(row.red_cards),
-        
-        // --- Estadísticas Ofensivas ---
-        p.goals = toInteger(row.goals),
-        p.assists = toInteger(row.assists),
-        p.shots_per_game = toFloat(row.shots_per_game),
-        p.key_passes_per_game = toFloat(row.key_passes_per_game),
-        p.dribbles_per_game = toFloat(row.dribbles_per_game),
-        
-        // --- Estadísticas Defensivas ---
-        p.tackles_per_game = toFloat(row.tackles_per_game),
-        p.interceptions_per_game = toFloat(row.interceptions_per_game),
-        p.clearances_per_game = toFloat(row.clearances_per_game),
-        p.aerial_duels_won_pct = toFloat(row.aerial_duels_won_pct),
-        p.fouls_per_game = toFloat(row.fouls_per_game),
-        
-        // --- Estadísticas de Pases ---
-        p.pass_accuracy_pct = toFloat(row.pass_accuracy_pct),
-        p.passes_per_game = toFloat(row.passes_per_game),
-        p.long_balls_per_game = toFloat(row.long_balls_per_game),
-        p.crosses_per_game = toFloat(row.crosses_per_game),
-        
-        // --- Estadísticas de Portero ---
-        p.saves_per_game = toFloat(row.saves_per_game),
-        p.clean_sheets = toInteger(row.clean_sheets),
-        p.goals_conceded = toInteger(row.goals_conceded),
-        p.penalty_save_pct = toFloat(row.penalty_save_pct)
-    """
     try:
-        with driver.session() as s:
-            s.run(cypher, rows=rows)
-        logging.info(f"Importados {len(rows)} jugadores desde {path}")
-        return {"ok": True, "imported": len(rows)}
+        summary = await importar_jugadores_async(async_driver, full_path, chunk_size, delete_missing)
+        # Escribir el almacén columnar es CPU: fuera del event loop
+        await run_in_threadpool(finalizar, summary)
+        return {"ok": True, **summary}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    
+
 
 @app.post("/api/admin/create-graph")
-def create_graph():
-    """Construye toda la estructura del grafo (Teams, Leagues, Countries) y las relaciones entre jugadores."""
+def create_graph(full: bool = False, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Construye la estructura del grafo (Teams, Leagues, Countries) y las relaciones
+    entre jugadores. Solo recalcula los jugadores nuevos o cambiados desde la
+    última construcción, salvo con `full=true`.
+    """
+    if batch_size <= 0:
+        raise HTTPException(status_code=400, detail="batch_size debe ser mayor que 0")
     try:
-        with driver.session() as s:
-            s.run("""
-            MATCH (p:Player)
-            MERGE (t:Team {name: p.team})
-            MERGE (l:League {name: p.league})
-            MERGE (c:Country {name: p.nationality})
-            MERGE (p)-[:PLAYS_FOR]->(t)
-            MERGE (t)-[:PART_OF]->(l)
-            MERGE (p)-[:REPRESENTS]->(c)
-            """)
-            s.run("""
-            MATCH (a:Player), (b:Player)
-            WHERE a.team = b.team AND a <> b
-            MERGE (a)-[:TEAMMATE_OF]->(b)
-            """)
-        return {"ok": True, "message": "Grafo creado correctamente con equipos, ligas, países y relaciones."}
+        summary = construir_grafo(obtener_driver(), batch_size=batch_size, full=full)
+        bump_generation()
+        return {"ok": True, "message": "Grafo creado correctamente con equipos, ligas, países y relaciones.", **summary}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error al crear el grafo: {e}")
 
 
 # -----------------------------------------------------------
-# 💬 CONSULTA IA AL GRAFO (segura con API key)
+# 📋 CONVOCATORIAS EN LOTE (NDJSON en streaming)
 # -----------------------------------------------------------
 
-from app.llama_integration import query_grafo
+class ConvocatoriaParams(BaseModel):
+    nationality: str
+    style: str = "balanceado"
+    num_players: int = 23
+    injured_allowed: bool = False
+    specific_positions_config: Optional[Dict[str, int]] = None
+    fixed_players: List[str] = []
+    optimizer: str = "first_improvement"
+    deadline_ms: Optional[float] = None
+
+
+class ConvocatoriaBatch(BaseModel):
+    requests: List[ConvocatoriaParams]
+
+
+@app.post("/api/convocatorias/batch")
+async def convocatorias_batch(batch: ConvocatoriaBatch):
+    """
+    Genera varias convocatorias (nacionalidades × estilos...) sobre una misma
+    instantánea de datos y devuelve cada resultado como una línea JSON en cuanto termina.
+    """
+    from app.batch_module import claves_lote, generar_lote
+    from app.selector_module import obtener_tabla_async
+
+    peticiones = [p.dict() for p in batch.requests]
+    # Lectura de las tablas en paralelo con el driver asíncrono; el cálculo va en el threadpool
+    keys = claves_lote(peticiones)
+    tablas = await asyncio.gather(*(obtener_tabla_async(*key) for key in keys))
+    snapshot = dict(zip(keys, tablas))
+
+    def stream():
+        for item in generar_lote(peticiones, snapshot=snapshot):
+            yield json.dumps(item, ensure_ascii=False, default=str) + "\n"
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+# -----------------------------------------------------------
+# 💬 CONSULTA IA AL GRAFO (segura con API key)
+# -----------------------------------------------------------
 
 @app.get("/api/query")
-def ask_graph(pregunta: str, api_key: str = Header(None)):
+async def ask_graph(pregunta: str, api_key: str = Header(None)):
     """Endpoint de preguntas naturales al grafo Neo4j (usa Ollama + LlamaIndex)."""
+    from app.llama_integration import query_grafo_async
+
     if api_key != API_KEY:
         raise HTTPException(status_code=403, detail="Acceso no autorizado")
 
     try:
-        respuesta = query_grafo(pregunta)
+        respuesta = await query_grafo_async(pregunta)
         return {"ok": True, "pregunta": pregunta, "respuesta": respuesta}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error procesando la pregunta: {e}")
@@ -297,91 +463,110 @@ def ask_graph(pregunta: str, api_key: str = Header(None)):
 # 💬 CONSULTA PÚBLICA (sin API key, solo para desarrollo)
 # -----------------------------------------------------------
 
-@app.get("/api/query/public")
-def ask_graph_public(pregunta: str):
-    from app.llama_integration import query_grafo
-    try:
-        respuesta = query_grafo(pregunta)
-
-        # 🟩 Caso: convocatoria o ajuste (texto normal)
-        if isinstance(respuesta, dict) and "respuesta" in respuesta:
-            return {
-                "ok": True,
-                "pregunta": pregunta,
-                "respuesta": respuesta["respuesta"],
-                "type": "convocatoria"
-            }
-
-        # 🟦 Caso: consulta limpia (solo lista de strings)
-        if isinstance(respuesta, dict) and respuesta.get("type") == "consulta_limpia":
-            valores = respuesta.get("data", [])
-
-            # ---------------------------------------------------------
-            # 🔥 DETECCIÓN INTELIGENTE DE TIPO PARA ELEGIR EMOJI
-            # ---------------------------------------------------------
-
-            def es_jugador(v):
-                return isinstance(v, str) and len(v.split()) >= 2
-
-            def es_liga(v):
-                return v in ["LaLiga", "Ligue 1", "Premier", "Bundesliga", "Serie A"]
-
-            def es_equipo(v):
-                return any(x in v for x in ["FC", "United", "City", "Real", "RB", "Dortmund", "Milan", "Roma", "Atalanta", "Leverkusen"])
-
-            # Jugadores (nombre + apellido)
-            if all(es_jugador(v) for v in valores):
-                emoji = "👤"
-
-            # Ligas principales
-            elif all(es_liga(v) for v in valores):
-                emoji = "🏆"
-
-            # Nacionalidades → regla lingüística fiable
-            elif all(isinstance(v, str) and v.endswith(("a", "esa", "nesa", "ana", "ona", "ina", "eña", "iana")) for v in valores):
-                emoji = "🌍"
-
-            # Equipos → patrones típicos
-            elif all(es_equipo(v) for v in valores):
-                emoji = "🏟️"
-
-            # Por defecto
-            else:
-                emoji = "⚽"
-
-            # Construcción del texto final
-            texto = "\n".join(f"{emoji} {v}" for v in valores)
-
-            return {
-                "ok": True,
-                "pregunta": pregunta,
-                "respuesta": texto,
-                "type": "consulta_limpia"
-            }
-
-        # 🟧 Caso: consulta libre normal (JSON sin limpiar)
-        if isinstance(respuesta, dict):
-            return {
-                "ok": True,
-                "pregunta": pregunta,
-                "respuesta": respuesta.get("data"),
-                "type": respuesta.get("type", "consulta")
-            }
-
-        # 🟥 Caso: string crudo (errores o mensajes sueltos)
+def _respuesta_publica(pregunta: str, respuesta) -> dict:
+    """Respuesta de `query_grafo` en el formato del chat público."""
+    # 🟩 Caso: convocatoria o ajuste (texto normal)
+    if isinstance(respuesta, dict) and "respuesta" in respuesta:
         return {
             "ok": True,
             "pregunta": pregunta,
-            "respuesta": respuesta,
-            "type": "raw"
+            "respuesta": respuesta["respuesta"],
+            "type": "convocatoria"
         }
 
+    # 🟦 Caso: consulta limpia (solo lista de strings)
+    if isinstance(respuesta, dict) and respuesta.get("type") == "consulta_limpia":
+        valores = respuesta.get("data", [])
+
+        # ---------------------------------------------------------
+        # 🔥 DETECCIÓN INTELIGENTE DE TIPO PARA ELEGIR EMOJI
+        # ---------------------------------------------------------
+
+        def es_jugador(v):
+            return isinstance(v, str) and len(v.split()) >= 2
+
+        def es_liga(v):
+            return v in ["LaLiga", "Ligue 1", "Premier", "Bundesliga", "Serie A"]
+
+        def es_equipo(v):
+            return any(x in v for x in ["FC", "United", "City", "Real", "RB", "Dortmund", "Milan", "Roma", "Atalanta", "Leverkusen"])
+
+        # Jugadores (nombre + apellido)
+        if all(es_jugador(v) for v in valores):
+            emoji = "👤"
+
+        # Ligas principales
+        elif all(es_liga(v) for v in valores):
+            emoji = "🏆"
+
+        # Nacionalidades → regla lingüística fiable
+        elif all(isinstance(v, str) and v.endswith(("a", "esa", "nesa", "ana", "ona", "ina", "eña", "iana")) for v in valores):
+            emoji = "🌍"
+
+        # Equipos → patrones típicos
+        elif all(es_equipo(v) for v in valores):
+            emoji = "🏟️"
+
+        # Por defecto
+        else:
+            emoji = "⚽"
+
+        # Construcción del texto final
+        texto = "\n".join(f"{emoji} {v}" for v in valores)
+
+        return {
+            "ok": True,
+            "pregunta": pregunta,
+            "respuesta": texto,
+            "type": "consulta_limpia"
+        }
+
+    # 🟧 Caso: consulta libre normal (JSON sin limpiar)
+    if isinstance(respuesta, dict):
+        return {
+            "ok": True,
+            "pregunta": pregunta,
+            "respuesta": respuesta.get("data"),
+            "type": respuesta.get("type", "consulta")
+        }
+
+    # 🟥 Caso: string crudo (errores o mensajes sueltos)
+    return {
+        "ok": True,
+        "pregunta": pregunta,
+        "respuesta": respuesta,
+        "type": "raw"
+    }
+
+
+@app.get("/api/query/public")
+async def ask_graph_public(pregunta: str):
+    from app.llama_integration import query_grafo_async
+    try:
+        return _respuesta_publica(pregunta, await query_grafo_async(pregunta))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error procesando la pregunta: {e}")
 
 
-@app.on_event("shutdown")
-def shutdown():
-    """Cierra conexión a Neo4j al apagar el servidor."""
-    driver.close()
-    logging.info("Conexión a Neo4j cerrada correctamente.")
+@app.get("/api/query/public/stream")
+async def ask_graph_public_stream(pregunta: str):
+    """
+    Como /api/query/public, en NDJSON y por etapas: `params`, `greedy` e
+    `improvement` (por estilo, con total y convocatoria), `squad`, `analysis`
+    y `done`. Las preguntas que no son convocatorias producen un único evento
+    `answer`. Si el cliente cierra la conexión, la búsqueda se detiene.
+    """
+    from app.llama_integration import query_grafo_stream
+
+    async def eventos():
+        try:
+            async for ev in query_grafo_stream(pregunta):
+                if ev["stage"] == "answer":
+                    ev = {"stage": "answer", **_respuesta_publica(pregunta, ev["respuesta"])}
+                yield json.dumps(ev, ensure_ascii=False, default=str) + "\n"
+            yield json.dumps({"stage": "done", "ok": True}) + "\n"
+        except Exception as e:
+            yield json.dumps({"stage": "error", "ok": False, "respuesta": f"Error procesando la pregunta: {e}"},
+                             ensure_ascii=False) + "\n"
+
+    return StreamingResponse(eventos(), media_type="application/x-ndjson")
@@ -0,0 +1,358 @@
+# app/optimizer_module.py
+"""
+Búsqueda local sobre una convocatoria representada con arrays.
+
+La convocatoria es un vector de índices dentro de las tablas de jugadores y se
+mantienen sumas acumuladas de score individual y de química, de modo que
+evaluar un cambio (sale uno, entra otro) no requiere copiar DataFrames.
+"""
+import math
+import time
+
+import numpy as np
+
+from app.chemistry_module import SquadChemistry
+
+
+class SquadState:
+    """Convocatoria actual + estructuras auxiliares para evaluar cambios en O(1)."""
+
+    def __init__(self, scores, specific_positions, pos_codes, chemistry: SquadChemistry,
+                 squad, alpha: float, beta: float, locked=None):
+        self.scores = np.asarray(scores, dtype=np.float64)
+        self.chemistry = chemistry
+        self.alpha = alpha
+        self.beta = beta
+
+        n = len(self.scores)
+        self.squad = np.asarray(squad, dtype=np.int64).copy()
+        self.in_squad = np.zeros(n, dtype=bool)
+        self.in_squad[self.squad] = True
+        self.locked = np.zeros(n, dtype=bool)
+        if locked is not None:
+            self.locked[np.asarray(locked, dtype=np.int64)] = True
+
+        self.score_sum = float(self.scores[self.squad].sum())
+        for i in self.squad:
+            chemistry.add(int(i))
+
+        # Candidatos por posición específica (y general como respaldo), ordenados por score
+        order = np.argsort(-self.scores, kind="stable")
+        spec_sorted = np.asarray(specific_positions, dtype=object)[order]
+        gen_sorted = np.asarray(pos_codes)[order]
+        keys = {}
+        self.pool_of = np.fromiter(
+            (keys.setdefault(("spec", spec) if isinstance(spec, str) and spec else ("gen", int(gen)), len(keys))
+             for spec, gen in zip(specific_positions, pos_codes)),
+            dtype=np.int64,
+            count=n,
+        )
+        self._pools = []
+        for kind, value in keys:
+            mask = spec_sorted == value if kind == "spec" else gen_sorted == value
+            self._pools.append(order[mask])
+
+        self.on_improvement = None
+        self._best_notified = -math.inf
+
+    @property
+    def size(self) -> int:
+        return len(self.squad)
+
+    def objective(self, score_sum, chem_sum):
+        """Función objetivo ALPHA·rendimiento medio + BETA·química media (admite arrays)."""
+        k = self.size
+        mean_ind = score_sum / k if k else 0.0
+        mean_chem = chem_sum / (k * (k - 1) / 2) if k > 1 else 0.0
+        return self.alpha * mean_ind + self.beta * mean_chem
+
+    def total(self):
+        """Devuelve (total, rendimiento medio, química media) de la convocatoria actual."""
+        k = self.size
+        mean_ind = self.score_sum / k if k else 0.0
+        mean_chem = self.chemistry.mean(k)
+        return self.alpha * mean_ind + self.beta * mean_chem, mean_ind, mean_chem
+
+    def candidates(self, slot: int) -> np.ndarray:
+        """Jugadores que pueden sustituir al de `slot` (misma posición, no convocados)."""
+        out_i = int(self.squad[slot])
+        pool = self._pools[self.pool_of[out_i]]
+        return pool[~self.in_squad[pool]]
+
+    def swap_scores(self, slot: int, candidates: np.ndarray) -> np.ndarray:
+        """Valor de la función objetivo tras cambiar `slot` por cada candidato."""
+        out_i = int(self.squad[slot])
+        new_score_sum = self.score_sum - self.scores[out_i] + self.scores[candidates]
+        new_chem_sum = self.chemistry.chem_sum + self.chemistry.swap_delta(out_i, candidates)
+        return self.objective(new_score_sum, new_chem_sum)
+
+    def movable_slots(self) -> np.ndarray:
+        """Posiciones de la lista que se pueden cambiar (excluye jugadores fijos)."""
+        return np.flatnonzero(~self.locked[self.squad])
+
+    def snapshot(self) -> np.ndarray:
+        return self.squad.copy()
+
+    def restore(self, squad):
+        """Vuelve a una convocatoria guardada con `snapshot`."""
+        for i in self.squad:
+            self.chemistry.remove(int(i))
+        self.in_squad[self.squad] = False
+        self.squad = np.asarray(squad, dtype=np.int64).copy()
+        self.in_squad[self.squad] = True
+        self.score_sum = float(self.scores[self.squad].sum())
+        for i in self.squad:
+            self.chemistry.add(int(i))
+
+    def apply_swap(self, slot: int, in_i: int):
+        """Aplica el cambio; el jugador que entra pasa al final de la lista."""
+        out_i = int(self.squad[slot])
+        self.chemistry.remove(out_i)
+        self.chemistry.add(int(in_i))
+        self.score_sum += self.scores[in_i] - self.scores[out_i]
+        self.in_squad[out_i] = False
+        self.in_squad[in_i] = True
+        self.squad = np.append(np.delete(self.squad, slot), in_i)
+        if self.on_improvement is not None:
+            self._notificar()
+
+    def seguir_mejoras(self, callback):
+        """
+        Llama a `callback(state, total, rendimiento medio, química media)` cada vez
+        que un cambio deja la convocatoria por encima del mejor total visto.
+        Funciona con cualquier estrategia: los cambios que empeoran no se notifican.
+        """
+        self.on_improvement = callback
+        self._best_notified = self.total()[0]
+
+    def _notificar(self):
+        total, mean_ind, mean_chem = self.total()
+        if total > self._best_notified + 1e-9:
+            self._best_notified = total
+            self.on_improvement(self, total, mean_ind, mean_chem)
+
+
+# -----------------------------------------------------------
+# ⏱️ PRESUPUESTO DE TIEMPO
+# -----------------------------------------------------------
+
+class Deadline:
+    """
+    Límite de tiempo opcional; sin `deadline_ms` nunca expira. `cancel` (un
+    threading.Event) permite además detener la búsqueda desde fuera, p. ej.
+    cuando el cliente de un endpoint en streaming se desconecta.
+    """
+
+    def __init__(self, deadline_ms: float = None, cancel=None):
+        self.end = None if deadline_ms is None else time.perf_counter() + deadline_ms / 1000.0
+        self.cancel = cancel
+
+    def expired(self) -> bool:
+        if self.cancel is not None and self.cancel.is_set():
+            return True
+        return self.end is not None and time.perf_counter() >= self.end
+
+
+# -----------------------------------------------------------
+# 🧭 ESTRATEGIAS
+# -----------------------------------------------------------
+# Todas reciben el estado ya inicializado con la convocatoria voraz, lo dejan
+# en la mejor convocatoria encontrada y devuelven su total. Son "anytime": si
+# vence el plazo devuelven lo mejor visto hasta ese momento.
+
+def voraz(state: SquadState, max_iterations: int = 300, deadline: Deadline = None, rng=None) -> float:
+    """Sin mejora: se queda con la convocatoria voraz inicial."""
+    return state.total()[0]
+
+
+def mejora_local(state: SquadState, max_iterations: int = 300, deadline: Deadline = None, rng=None) -> float:
+    """
+    Mejora iterativa de primera mejora: recorre los convocados en orden y aplica
+    el primer candidato (de mayor a menor score) que sube la función objetivo.
+    Devuelve el mejor total alcanzado.
+    """
+    deadline = deadline or Deadline()
+    best_score, _, _ = state.total()
+    for _ in range(max_iterations):
+        improved = False
+        for slot in range(state.size):
+            if deadline.expired():
+                return best_score
+            if state.locked[state.squad[slot]]:
+                continue
+            cands = state.candidates(slot)
+            if not len(cands):
+                continue
+            better = np.flatnonzero(state.swap_scores(slot, cands) > best_score + 1e-9)
+            if len(better):
+                state.apply_swap(slot, int(cands[better[0]]))
+                best_score, _, _ = state.total()
+                improved = True
+                break
+        if not improved:
+            break
+    return best_score
+
+
+def _mejor_movimiento(state: SquadState, banned=None):
+    """Mejor cambio posible (slot, candidato, total) entre todos los convocados."""
+    best = (None, None, -math.inf)
+    for slot in state.movable_slots():
+        cands = state.candidates(slot)
+        if banned is not None and len(cands):
+            cands = cands[~banned[cands]]
+        if not len(cands):
+            continue
+        values = state.swap_scores(slot, cands)
+        j = int(np.argmax(values))
+        if values[j] > best[2]:
+            best = (int(slot), int(cands[j]), float(values[j]))
+    return best
+
+
+def mejor_mejora(state: SquadState, max_iterations: int = 300, deadline: Deadline = None, rng=None) -> float:
+    """Mejora iterativa aplicando en cada paso el mejor cambio de todo el vecindario."""
+    deadline = deadline or Deadline()
+    best_score, _, _ = state.total()
+    for _ in range(max_iterations):
+        if deadline.expired():
+            break
+        slot, cand, value = _mejor_movimiento(state)
+        if slot is None or value <= best_score + 1e-9:
+            break
+        state.apply_swap(slot, cand)
+        best_score = value
+    return best_score
+
+
+def recocido_simulado(state: SquadState, max_iterations: int = 300, deadline: Deadline = None, rng=None,
+                      t_inicial: float = 0.005, enfriamiento: float = 0.995) -> float:
+    """
+    Recocido simulado: propone cambios aleatorios y acepta empeoramientos con
+    probabilidad exp(Δ/T). Hace `max_iterations` propuestas por convocado y
+    termina con una mejor mejora desde la mejor convocatoria vista.
+    """
+    deadline = deadline or Deadline()
+    rng = rng if rng is not None else np.random.default_rng()
+    slots = state.movable_slots()
+    current, _, _ = state.total()
+    best_score, best_squad = current, state.snapshot()
+    if not len(slots):
+        return best_score
+
+    temperature = t_inicial
+    for _ in range(max_iterations * state.size):
+        if deadline.expired():
+            break
+        slot = int(rng.choice(slots))
+        cands = state.candidates(slot)
+        if not len(cands):
+            continue
+        cand = int(cands[rng.integers(len(cands))])
+        value = float(state.swap_scores(slot, np.array([cand]))[0])
+        delta = value - current
+        if delta > 0 or rng.random() < math.exp(delta / max(temperature, 1e-12)):
+            state.apply_swap(slot, cand)
+            # El jugador que entra pasa al final: los slots movibles se recalculan
+            slots = state.movable_slots()
+            current = value
+            if current > best_score + 1e-9:
+                best_score, best_squad = current, state.snapshot()
+        temperature *= enfriamiento
+
+    # Pulido final: óptimo local alrededor de la mejor convocatoria vista
+    state.restore(best_squad)
+    return mejor_mejora(state, max_iterations, deadline)
+
+
+def busqueda_tabu(state: SquadState, max_iterations: int = 300, deadline: Deadline = None, rng=None,
+                  tenencia: int = 7) -> float:
+    """
+    Búsqueda tabú: aplica siempre el mejor cambio no tabú (aunque empeore) y
+    prohíbe que el jugador que sale vuelva a entrar durante `tenencia` pasos.
+    Un cambio tabú se admite si mejora el mejor total conocido (aspiración).
+    """
+    deadline = deadline or Deadline()
+    n = len(state.scores)
+    tabu_until = np.zeros(n, dtype=np.int64)
+    best_score, best_squad = state.total()[0], state.snapshot()
+
+    for it in range(1, max_iterations + 1):
+        if deadline.expired():
+            break
+        slot, cand, value = _mejor_movimiento(state)
+        if slot is None or value <= best_score + 1e-9:
+            slot, cand, value = _mejor_movimiento(state, tabu_until >= it)
+        if slot is None:
+            break
+        out_i = int(state.squad[slot])
+        state.apply_swap(slot, cand)
+        tabu_until[out_i] = it + tenencia
+        if value > best_score + 1e-9:
+            best_score, best_squad = value, state.snapshot()
+
+    state.restore(best_squad)
+    return state.total()[0]
+
+
+def multiarranque(state: SquadState, max_iterations: int = 300, deadline: Deadline = None, rng=None,
+                  arranques: int = 8, perturbacion: int = 4) -> float:
+    """
+    Multi-arranque: repite la mejor mejora partiendo de la convocatoria inicial
+    perturbada con cambios aleatorios (el primer arranque sin perturbar).
+    """
+    deadline = deadline or Deadline()
+    rng = rng if rng is not None else np.random.default_rng()
+    initial = state.snapshot()
+    best_score, best_squad = -math.inf, initial
+
+    for start in range(arranques):
+        if start and deadline.expired():
+            break
+        state.restore(initial)
+        for _ in range(perturbacion if start else 0):
+            slots = state.movable_slots()
+            if not len(slots):
+                break
+            slot = int(rng.choice(slots))
+            cands = state.candidates(slot)
+            if len(cands):
+                state.apply_swap(slot, int(cands[rng.integers(len(cands))]))
+        value = mejor_mejora(state, max_iterations, deadline)
+        if value > best_score + 1e-9:
+            best_score, best_squad = value, state.snapshot()
+
+    state.restore(best_squad)
+    return state.total()[0]
+
+
+OPTIMIZERS = {
+    "greedy": voraz,
+    "first_improvement": mejora_local,
+    "best_improvement": mejor_mejora,
+    "simulated_annealing": recocido_simulado,
+    "tabu": busqueda_tabu,
+    "multi_start": multiarranque,
+}
+
+
+def optimizar(state: SquadState, optimizer: str = "first_improvement", max_iterations: int = 300,
+              deadline_ms: float = None, seed: int = None, progress=None, cancel=None) -> float:
+    """
+    Ejecuta la estrategia indicada sobre `state` con un presupuesto de tiempo opcional.
+    `progress` recibe cada mejora (ver `SquadState.seguir_mejoras`) y `cancel`
+    detiene la búsqueda con la mejor convocatoria encontrada hasta entonces.
+    """
+    if optimizer not in OPTIMIZERS:
+        raise ValueError(f"Optimizador desconocido: {optimizer}. Opciones: {', '.join(OPTIMIZERS)}")
+    if progress is not None:
+        state.seguir_mejoras(progress)
+    try:
+        return OPTIMIZERS[optimizer](
+            state,
+            max_iterations=max_iterations,
+            deadline=Deadline(deadline_ms, cancel),
+            rng=np.random.default_rng(seed),
+        )
+    finally:
+        state.on_improvement = None
@@ -0,0 +1,311 @@
+# app/player_store.py
+"""
+Almacén columnar de jugadores en disco, compartido entre workers.
+
+Tras cada importación se escribe una versión del almacén con:
+  - numeric.npy         matriz float64 (jugadores × columnas numéricas)
+  - <col>.codes.npy     códigos int32 de las columnas categóricas (diccionario en meta.json)
+  - player_id.npy, name.npy   texto de ancho fijo
+  - meta.json           columnas, diccionarios, generación y, por nacionalidad,
+                        rango de filas, huella del contenido y mínimo/máximo
+                        de cada columna numérica (también global)
+
+Las filas se ordenan por (nacionalidad, player_id), de modo que los jugadores de
+una nacionalidad son un rango contiguo. Cada worker abre los ficheros con
+`np.load(mmap_mode="r")`: las páginas las comparte el sistema operativo y las
+consultas devuelven vistas sin copiar datos.
+"""
+import hashlib
+import json
+import os
+from array import array
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.importer_module import GLOBAL_STATS_SCOPE
+
+STORE_DIR = os.getenv("PLAYER_STORE_DIR", os.path.join("datasets", "player_store"))
+CURRENT_FILE = "CURRENT"
+KEEP_VERSIONS = 2
+
+NUMERIC_COLUMNS = [
+    "age", "height_cm", "weight_kg", "stamina", "matches_played", "minutes_played",
+    "yellow_cards", "red_cards", "goals", "assists", "shots_per_game",
+    "key_passes_per_game", "dribbles_per_game", "tackles_per_game",
+    "interceptions_per_game", "clearances_per_game", "aerial_duels_won_pct",
+    "fouls_per_game", "pass_accuracy_pct", "passes_per_game", "long_balls_per_game",
+    "crosses_per_game", "saves_per_game", "clean_sheets", "goals_conceded",
+    "penalty_save_pct",
+]
+# Mismas conversiones que el importador de Neo4j (toInteger trunca)
+INTEGER_COLUMNS = {
+    "age", "height_cm", "weight_kg", "stamina", "matches_played", "minutes_played",
+    "yellow_cards", "red_cards", "goals", "assists", "clean_sheets", "goals_conceded",
+}
+CATEGORICAL_COLUMNS = ["nationality", "team", "league", "position", "specific_position", "injured"]
+TEXT_COLUMNS = ["player_id", "name"]
+
+
+def _to_number(col: str, value) -> float:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return np.nan
+    return float(int(number)) if col in INTEGER_COLUMNS else number
+
+
+# -----------------------------------------------------------
+# ✍️ ESCRITURA
+# -----------------------------------------------------------
+
+def escribir_store(rows, store_dir: str = None) -> dict:
+    """
+    Escribe una nueva versión del almacén a partir de filas tipo dict (las del CSV
+    o las de Neo4j) y la publica de forma atómica. Las filas se recorren una vez
+    y se acumulan por columnas, así que `rows` puede ser un generador.
+    Devuelve el meta resultante.
+    """
+    store_dir = store_dir or STORE_DIR
+
+    numeric_flat = array("d")
+    mappings = {col: {} for col in CATEGORICAL_COLUMNS}
+    code_cols = {col: array("i") for col in CATEGORICAL_COLUMNS}
+    text_cols = {col: [] for col in TEXT_COLUMNS}
+    for r in rows:
+        numeric_flat.extend(_to_number(c, r.get(c)) for c in NUMERIC_COLUMNS)
+        for col in CATEGORICAL_COLUMNS:
+            value = r.get(col)
+            # Los valores nulos llevan el código -1 (el de pandas para "sin categoría")
+            code_cols[col].append(-1 if value is None else mappings[col].setdefault(value, len(mappings[col])))
+        for col in TEXT_COLUMNS:
+            text_cols[col].append("" if r.get(col) is None else str(r.get(col)))
+
+    n = len(text_cols["player_id"])
+    vocab = {col: list(mappings[col]) for col in CATEGORICAL_COLUMNS}
+    codes = {col: np.frombuffer(code_cols[col], dtype=np.int32) if n else np.zeros(0, np.int32)
+             for col in CATEGORICAL_COLUMNS}
+    numeric = np.frombuffer(numeric_flat, dtype=np.float64).reshape(n, len(NUMERIC_COLUMNS)) if n \
+        else np.zeros((0, len(NUMERIC_COLUMNS)))
+
+    # Orden (nacionalidad, player_id): cada nacionalidad queda en un rango contiguo
+    nat_rank = {v: i for i, v in enumerate(sorted(vocab["nationality"]))}
+    nat_keys = np.array([nat_rank[vocab["nationality"][c]] if c >= 0 else -1 for c in codes["nationality"]])
+    ids = np.array(text_cols["player_id"], dtype=object)
+    order = np.lexsort((ids, nat_keys)) if n else np.zeros(0, dtype=np.int64)
+    numeric = numeric[order]
+    codes = {col: c[order] for col, c in codes.items()}
+    text_values = {col: [text_cols[col][i] for i in order] for col in TEXT_COLUMNS}
+
+    nat_ranges = {}
+    for i, code in enumerate(codes["nationality"]):
+        if code < 0:
+            continue
+        nat = vocab["nationality"][code]
+        start, _ = nat_ranges.get(nat, (i, i))
+        nat_ranges[nat] = (start, i + 1)
+
+    # Huella por nacionalidad: las cachés solo invalidan las nacionalidades cuyo contenido cambió
+    nat_versions = {}
+    for nat, (start, end) in nat_ranges.items():
+        digest = hashlib.blake2b(numeric[start:end].tobytes(), digest_size=16)
+        for col in TEXT_COLUMNS:
+            digest.update("\x1f".join(text_values[col][start:end]).encode())
+        for col in CATEGORICAL_COLUMNS:
+            values = (vocab[col][c] if c >= 0 else "" for c in codes[col][start:end])
+            digest.update("\x1f".join(values).encode())
+        nat_versions[nat] = digest.hexdigest()
+
+    # Estadísticas de normalización precalculadas (por nacionalidad y global)
+    stats = {nat: _min_max(numeric[start:end]) for nat, (start, end) in nat_ranges.items()}
+    stats[GLOBAL_STATS_SCOPE] = _min_max(numeric)
+
+    generation = time.time_ns()
+    version_dir = os.path.join(store_dir, f"v{generation}")
+    tmp_dir = version_dir + ".tmp"
+    os.makedirs(tmp_dir, exist_ok=True)
+
+    np.save(os.path.join(tmp_dir, "numeric.npy"), numeric)
+    for col in CATEGORICAL_COLUMNS:
+        np.save(os.path.join(tmp_dir, f"{col}.codes.npy"), codes[col])
+    for col in TEXT_COLUMNS:
+        values = text_values[col]
+        width = max((len(v) for v in values), default=1) or 1
+        np.save(os.path.join(tmp_dir, f"{col}.npy"), np.array(values, dtype=f"U{width}"))
+
+    meta = {
+        "generation": generation,
+        "rows": n,
+        "numeric_columns": NUMERIC_COLUMNS,
+        "categorical": vocab,
+        "nationality_ranges": nat_ranges,
+        "nationality_versions": nat_versions,
+        "stats": stats,
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    os.replace(tmp_dir, version_dir)
+    pointer_tmp = os.path.join(store_dir, CURRENT_FILE + ".tmp")
+    with open(pointer_tmp, "w", encoding="utf-8") as f:
+        f.write(os.path.basename(version_dir))
+    os.replace(pointer_tmp, os.path.join(store_dir, CURRENT_FILE))
+
+    _limpiar_versiones(store_dir)
+    return meta
+
+
+def _min_max(block: np.ndarray) -> dict:
+    """Mínimo y máximo por columna ignorando nulos (None si la columna no tiene valores)."""
+    lo = np.fmin.reduce(block, axis=0, initial=np.inf)
+    hi = np.fmax.reduce(block, axis=0, initial=-np.inf)
+    as_list = lambda values: [float(v) if np.isfinite(v) else None for v in values]
+    return {"min": as_list(lo), "max": as_list(hi)}
+
+
+def _limpiar_versiones(store_dir: str):
+    """Borra versiones antiguas (los workers que aún las tengan abiertas conservan sus mapeos)."""
+    versions = sorted(d for d in os.listdir(store_dir) if d.startswith("v") and not d.endswith(".tmp"))
+    for old in versions[:-KEEP_VERSIONS]:
+        shutil.rmtree(os.path.join(store_dir, old), ignore_errors=True)
+
+
+# -----------------------------------------------------------
+# 📖 LECTURA (memory-mapped, solo lectura)
+# -----------------------------------------------------------
+
+class PlayerStore:
+    """Vista de solo lectura sobre una versión del almacén."""
+
+    def __init__(self, version_dir: str):
+        with open(os.path.join(version_dir, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.generation = self.meta["generation"]
+        self.numeric_columns = self.meta["numeric_columns"]
+        self._numeric_idx = {c: i for i, c in enumerate(self.numeric_columns)}
+        self.numeric = np.load(os.path.join(version_dir, "numeric.npy"), mmap_mode="r")
+        self.codes = {
+            col: np.load(os.path.join(version_dir, f"{col}.codes.npy"), mmap_mode="r")
+            for col in CATEGORICAL_COLUMNS
+        }
+        self.text = {col: np.load(os.path.join(version_dir, f"{col}.npy"), mmap_mode="r") for col in TEXT_COLUMNS}
+        self.vocab = self.meta["categorical"]
+
+    def version(self, nationality: str):
+        """Huella del contenido de una nacionalidad (cambia solo si cambian sus jugadores)."""
+        return self.meta.get("nationality_versions", {}).get(nationality, self.generation)
+
+    def estadisticas(self, nationality: str):
+        """
+        Mínimo y máximo de cada columna numérica de la nacionalidad (o globales si
+        no hay) como {"min": {col: v}, "max": {col: v}}; None en almacenes antiguos.
+        """
+        stats = self.meta.get("stats")
+        if not stats:
+            return None
+        scope = stats.get(nationality) or stats[GLOBAL_STATS_SCOPE]
+        return {bound: dict(zip(self.numeric_columns, scope[bound])) for bound in ("min", "max")}
+
+    def rango(self, nationality: str):
+        start, end = self.meta["nationality_ranges"].get(nationality, (0, 0))
+        return slice(start, end)
+
+    def tabla(self, nationality: str, injured_allowed: bool = True, columns=None) -> pd.DataFrame:
+        """
+        Jugadores de una nacionalidad como DataFrame. Las columnas numéricas y los
+        códigos categóricos son vistas del fichero mapeado (sin copia).
+        """
+        rows = self.rango(nationality)
+        columns = columns or (TEXT_COLUMNS + CATEGORICAL_COLUMNS + self.numeric_columns)
+        data = {}
+        for col in columns:
+            if col in self._numeric_idx:
+                data[col] = self.numeric[rows, self._numeric_idx[col]]
+            elif col in self.codes:
+                data[col] = pd.Categorical.from_codes(self.codes[col][rows], categories=self.vocab[col])
+            elif col in self.text:
+                data[col] = self.text[col][rows]
+        df = pd.DataFrame(data, columns=columns, copy=False)
+
+        if not injured_allowed:
+            injured_vocab = self.vocab["injured"]
+            ok_codes = [-1] + [i for i, v in enumerate(injured_vocab) if v == "No"]
+            mask = np.isin(self.codes["injured"][rows], ok_codes)
+            df = df[mask].reset_index(drop=True)
+        # Devolvemos texto plano en las categóricas (mismo contrato que la consulta a Neo4j)
+        for col in CATEGORICAL_COLUMNS:
+            if col in df:
+                df[col] = df[col].astype(object)
+        return df
+
+    def _codigos(self, col: str, values) -> list:
+        return [i for i, v in enumerate(self.vocab[col]) if v in values]
+
+    def pagina(self, nationality: str, columns: list, after: str = None, limit: int = 100,
+               filters: dict = None) -> pd.DataFrame:
+        """
+        Página ordenada por player_id a partir del cursor `after`. Dentro de una
+        nacionalidad las filas ya están ordenadas por player_id, así que el cursor
+        se resuelve con una búsqueda binaria. Mismos filtros que el repositorio.
+        """
+        rows = self.rango(nationality)
+        start = rows.start
+        if after is not None:
+            start += int(np.searchsorted(self.text["player_id"][rows], after, side="right"))
+        window = slice(start, rows.stop)
+
+        mask = np.ones(window.stop - window.start, dtype=bool)
+        for field, value in (filters or {}).items():
+            codes = self.codes[field][window]
+            if field == "injured":
+                healthy = np.isin(codes, [-1] + self._codigos("injured", {"No"}))
+                mask &= ~healthy if value else healthy
+            else:
+                mask &= np.isin(codes, self._codigos(field, {value}))
+        selected = np.flatnonzero(mask)[:limit] + window.start
+
+        data = {}
+        for col in columns:
+            if col in self._numeric_idx:
+                # Mismos tipos que devuelve Neo4j (enteros y None en lugar de NaN)
+                cast = int if col in INTEGER_COLUMNS else float
+                values = self.numeric[selected, self._numeric_idx[col]]
+                data[col] = [None if np.isnan(v) else cast(v) for v in values]
+            elif col in self.codes:
+                vocab = np.array(self.vocab[col] + [None], dtype=object)
+                data[col] = vocab[self.codes[col][selected]]
+            elif col in self.text:
+                data[col] = self.text[col][selected].astype(object)
+        return pd.DataFrame(data, columns=columns)
+
+
+_store = None
+_store_pointer = None
+_store_lock = threading.Lock()
+
+
+def abrir_store(store_dir: str = None):
+    """
+    Devuelve el almacén vigente o None si aún no se ha escrito ninguno.
+    Si otro worker publica una versión nueva, se detecta por el fichero CURRENT.
+    """
+    global _store, _store_pointer
+    store_dir = store_dir or STORE_DIR
+    pointer_path = os.path.join(store_dir, CURRENT_FILE)
+    try:
+        with open(pointer_path, encoding="utf-8") as f:
+            pointer = f.read().strip()
+    except FileNotFoundError:
+        return None
+
+    with _store_lock:
+        if _store is None or pointer != _store_pointer:
+            try:
+                _store = PlayerStore(os.path.join(store_dir, pointer))
+                _store_pointer = pointer
+            except (FileNotFoundError, ValueError, KeyError):
+                return None
+        return _store
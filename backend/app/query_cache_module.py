@@ -0,0 +1,219 @@
+# app/query_cache_module.py
+"""
+Caché de resultados de consultas Cypher de solo lectura.
+
+La clave es (texto Cypher, parámetros) y cada entrada guarda la generación de
+datos con la que se leyó, que tiene dos partes:
+
+  - la del proceso (cache_module.bump_generation), que cambia en el acto en el
+    worker que atiende la importación o create-graph;
+  - la compartida, `(:Meta {name: 'data'}).generation` en Neo4j, que se
+    incrementa en la misma transacción que cada escritura del importador y del
+    grafo. Se consulta como mucho cada RESULT_CACHE_GENERATION_CHECK_S
+    segundos, así que los demás workers dejan de servir resultados antiguos
+    como mucho ese tiempo después.
+
+Las escrituras que no pasan por esos módulos (p. ej. Cypher a mano en Neo4j) no
+incrementan la generación: para ellas las entradas caducan a los
+RESULT_CACHE_TTL segundos. La caché está acotada en entradas, en bytes por
+entrada y en bytes totales.
+
+Las consultas que terminan en `ORDER BY rand() [LIMIT n]` (las del chat) no se
+cachean tal cual, porque cada ejecución debe dar una muestra distinta. Se cachea
+el resultado completo sin ese orden ni límite y cada llamada devuelve una muestra
+aleatoria de n filas. El resultado completo se pide con un LIMIT de
+RESULT_CACHE_MAX_SAMPLE_ROWS + 1 filas, para no recorrer ni cargar en memoria
+un resultado enorme: si lo alcanza, o si no cabe en una entrada, esa consulta se
+ejecuta tal cual en Neo4j hasta que cambien los datos. Cualquier otro uso de
+rand() no se cachea.
+"""
+import json
+import os
+import logging
+import random
+import re
+import threading
+import time
+
+from app.cache_module import LRUCache, data_generation
+from app.db_module import consultar, obtener_driver
+from app.importer_module import DATA_GENERATION
+
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "512"))
+RESULT_CACHE_MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RESULT_CACHE_MAX_ENTRY_BYTES = int(os.getenv("RESULT_CACHE_MAX_ENTRY_BYTES", str(2 * 1024 * 1024)))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "300"))
+RESULT_CACHE_GENERATION_CHECK_S = float(os.getenv("RESULT_CACHE_GENERATION_CHECK_S", "2"))
+RESULT_CACHE_MAX_SAMPLE_ROWS = int(os.getenv("RESULT_CACHE_MAX_SAMPLE_ROWS", "10000"))
+
+_resultados = LRUCache(
+    "resultados_cypher", max_entries=RESULT_CACHE_SIZE,
+    max_bytes=RESULT_CACHE_MAX_BYTES, max_entry_bytes=RESULT_CACHE_MAX_ENTRY_BYTES, ttl=RESULT_CACHE_TTL,
+)
+
+# Última generación compartida leída de Neo4j y cuándo se leyó
+_compartida = {"generation": None, "checked_at": None}
+
+# Consultas de muestreo cuyo resultado completo no cabe en la caché -> generación en que se vio
+_sin_cache = {}
+_sin_cache_lock = threading.Lock()
+
+RANDOM_TAIL = re.compile(r"\s+ORDER\s+BY\s+rand\(\)(?:\s+LIMIT\s+(\$\w+|\d+))?\s*;?\s*$", re.IGNORECASE)
+RANDOM_ANYWHERE = re.compile(r"\brand\(\)", re.IGNORECASE)
+
+
+def _clave(cypher: str, params: dict) -> tuple:
+    return cypher, json.dumps(params or {}, sort_keys=True, default=str)
+
+
+def _tamano(rows: list) -> int:
+    """Tamaño aproximado del resultado (su longitud serializado como JSON)."""
+    return len(json.dumps(rows, default=str))
+
+
+def plan_lectura(cypher: str, params: dict):
+    """
+    Cómo servir la consulta desde la caché: (consulta a cachear, parámetros,
+    tamaño de muestra). La muestra es None si no hay muestreo (se devuelve el
+    resultado tal cual) y la consulta es None si no se debe cachear.
+    """
+    params = dict(params or {})
+    m = RANDOM_TAIL.search(cypher)
+    if m is None:
+        return (None if RANDOM_ANYWHERE.search(cypher) else cypher), params, None
+    base = cypher[:m.start()]
+    if RANDOM_ANYWHERE.search(base):
+        return None, params, None
+    limit = m.group(1)
+    if limit is None:
+        sample = -1  # sin LIMIT: todas las filas en orden aleatorio
+    elif limit.startswith("$"):
+        if limit[1:] not in params:
+            return None, params, None
+        sample = int(params.pop(limit[1:]))
+    else:
+        sample = int(limit)
+    return base, params, sample
+
+
+def _muestrear(rows: list, sample):
+    if sample is None:
+        return list(rows)
+    return random.sample(rows, len(rows) if sample < 0 else min(sample, len(rows)))
+
+
+# -----------------------------------------------------------
+# 🔢 GENERACIÓN COMPARTIDA ENTRE PROCESOS
+# -----------------------------------------------------------
+
+def _comprobar_compartida() -> bool:
+    checked_at = _compartida["checked_at"]
+    return checked_at is None or time.monotonic() - checked_at >= RESULT_CACHE_GENERATION_CHECK_S
+
+
+def _anotar_compartida(rows):
+    _compartida["generation"] = rows[0]["generation"] if rows else None
+    _compartida["checked_at"] = time.monotonic()
+
+
+def _fallo_compartida(e):
+    # Sin la generación compartida se sigue con la última conocida; el TTL acota lo que se sirve
+    logging.warning(f"No se pudo leer la generación de datos compartida: {e}")
+    _compartida["checked_at"] = time.monotonic()
+
+
+def generacion(driver=None):
+    """Generación completa (proceso, compartida) con la que se leen y guardan las entradas."""
+    if _comprobar_compartida():
+        try:
+            with (driver or obtener_driver()).session() as s:
+                _anotar_compartida(s.run(DATA_GENERATION).data())
+        except Exception as e:
+            _fallo_compartida(e)
+    return data_generation(), _compartida["generation"]
+
+
+async def generacion_async():
+    """Como `generacion`, con el driver asíncrono."""
+    if _comprobar_compartida():
+        try:
+            _anotar_compartida(await consultar(DATA_GENERATION, reintentar=False))
+        except Exception as e:
+            _fallo_compartida(e)
+    return data_generation(), _compartida["generation"]
+
+
+# -----------------------------------------------------------
+# 📖 LECTURA CACHEADA
+# -----------------------------------------------------------
+
+def _sin_cachear(base, generation):
+    """Anota que la consulta de muestreo `base` se ejecuta tal cual en esta generación."""
+    with _sin_cache_lock:
+        for stale in [q for q, g in _sin_cache.items() if g != generation]:
+            del _sin_cache[stale]
+        _sin_cache[base] = generation
+
+
+def _completa(base, params, sample):
+    """Consulta del resultado a cachear: si se va a muestrear, con una fila más de las que se admiten."""
+    if sample is None:
+        return base, params
+    return f"{base}\nLIMIT $cache_max_rows", {**params, "cache_max_rows": RESULT_CACHE_MAX_SAMPLE_ROWS + 1}
+
+
+def _guardar(key, base, rows, generation, sample):
+    """
+    Cachea el resultado completo y lo devuelve; None si al muestrear se ha
+    alcanzado el LIMIT de _completa (el resultado está incompleto).
+    """
+    if sample is not None and len(rows) > RESULT_CACHE_MAX_SAMPLE_ROWS:
+        _sin_cachear(base, generation)
+        return None
+    if not _resultados.put(key, rows, generation, size=_tamano(rows)) and sample is not None:
+        # Traer el resultado completo para muestrear solo compensa si luego se cachea
+        _sin_cachear(base, generation)
+    return rows
+
+
+def _directa(base, generation) -> bool:
+    """True si la consulta se ejecuta sin caché (no cacheable o demasiado grande en esta generación)."""
+    return base is None or _sin_cache.get(base) == generation
+
+
+def leer(cypher: str, params: dict = None, driver=None) -> list:
+    """Ejecuta una consulta de lectura (filas como dicts) pasando por la caché."""
+    base, base_params, sample = plan_lectura(cypher, params)
+    generation = generacion(driver) if base is not None else None
+    if not _directa(base, generation):
+        key = _clave(base, base_params)
+        rows = _resultados.get(key, generation)
+        if rows is None:
+            with (driver or obtener_driver()).session() as s:
+                rows = [r.data() for r in s.run(*_completa(base, base_params, sample))]
+            rows = _guardar(key, base, rows, generation, sample)
+        if rows is not None:
+            return _muestrear(rows, sample)
+    with (driver or obtener_driver()).session() as s:
+        return [r.data() for r in s.run(cypher, params or {})]
+
+
+async def leer_async(cypher: str, params: dict = None) -> list:
+    """Como `leer`, con el driver asíncrono compartido."""
+    base, base_params, sample = plan_lectura(cypher, params)
+    generation = await generacion_async() if base is not None else None
+    if not _directa(base, generation):
+        key = _clave(base, base_params)
+        rows = _resultados.get(key, generation)
+        if rows is None:
+            rows = _guardar(key, base, await consultar(*_completa(base, base_params, sample)),
+                            generation, sample)
+        if rows is not None:
+            return _muestrear(rows, sample)
+    return await consultar(cypher, params)
+
+
+def resultados_cache_stats() -> dict:
+    """Aciertos, fallos, memoria ocupada, consultas excluidas por tamaño y generación compartida."""
+    return {**_resultados.stats(), "sampling_bypassed": len(_sin_cache),
+            "shared_generation": _compartida["generation"]}
@@ -0,0 +1,395 @@
+# app/repository_module.py
+"""
+Repositorio de jugadores: de dónde leen el seleccionador y los listados.
+
+El algoritmo de convocatoria solo necesita una tabla plana de jugadores, así que
+hay dos implementaciones intercambiables:
+
+  - Neo4jPlayerRepository:  Cypher sobre Bolt (comportamiento de siempre).
+  - SQLitePlayerRepository: SQLite embebido (stdlib) cargado desde el CSV de
+    jugadores; sin salto de red, útil para despliegues de solo lectura y pruebas.
+    Cada importación se le aplica como en Neo4j: solo las filas nuevas o con
+    otra huella (`content_hash`) y, si se pide, borrando las ausentes.
+
+Se elige con PLAYER_REPOSITORY=neo4j|sqlite (por defecto neo4j).
+"""
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+from app.db_module import consultar, obtener_driver, obtener_driver_async
+from app.query_cache_module import leer, leer_async
+from app.importer_module import (
+    DEFAULT_CHUNK_SIZE, FLOAT_FIELDS, GLOBAL_STATS_SCOPE, INTEGER_FIELDS, NUMERIC_FIELDS, PLAYER_FIELDS,
+    huella_fila, leer_en_bloques, leer_jugadores_csv,
+)
+
+PLAYER_REPOSITORY = os.getenv("PLAYER_REPOSITORY", "neo4j").lower()
+PLAYER_CSV = os.getenv("PLAYER_CSV", os.path.join("datasets", "jugadores_futbol_realistas.csv"))
+PLAYER_SQLITE_PATH = os.getenv("PLAYER_SQLITE_PATH", ":memory:")
+
+
+# Filtros del listado (todos sobre propiedades indexadas de Player)
+FILTER_FIELDS = ["position", "specific_position", "team", "league", "injured"]
+MAX_PAGE_SIZE = 10000
+
+
+def validar_campos(fields) -> list:
+    """Comprueba que los campos pedidos son propiedades de Player (se interpolan en la consulta)."""
+    unknown = [f for f in fields if f not in PLAYER_FIELDS]
+    if unknown:
+        raise ValueError(f"Campos desconocidos: {unknown}")
+    return list(fields)
+
+
+def _limites(values_by_scope: dict, nationality: str):
+    """{"min": {...}, "max": {...}} de la nacionalidad o, si no hay, globales (None si no hay ninguno)."""
+    values = values_by_scope.get(nationality) or values_by_scope.get(GLOBAL_STATS_SCOPE)
+    if not values:
+        return None
+    return {bound: {f: values.get(f"{bound}_{f}") for f in NUMERIC_FIELDS} for bound in ("min", "max")}
+
+
+def campos_pagina(fields) -> list:
+    """Campos del listado: siempre incluye player_id, que es la clave del cursor."""
+    return ["player_id"] + [f for f in validar_campos(fields) if f != "player_id"]
+
+
+class PlayerRepository:
+    """Interfaz común. Las versiones async por defecto delegan en el threadpool."""
+
+    name = "base"
+
+    def jugadores(self, nationality: str, injured_allowed: bool, columns: list) -> pd.DataFrame:
+        """Tabla de jugadores de una nacionalidad con las columnas pedidas."""
+        raise NotImplementedError
+
+    def pagina(self, nationality: str, fields: list, after: str = None, limit: int = 100,
+               filters: dict = None) -> list:
+        """
+        Página de jugadores de una nacionalidad ordenada por player_id, a partir
+        del cursor `after` (paginación por clave, sin OFFSET). `filters` admite
+        FILTER_FIELDS; `injured` es booleano. Cada jugador es un dict con player_id + `fields`.
+        """
+        raise NotImplementedError
+
+    def estadisticas(self, nationality: str):
+        """
+        Mínimo y máximo precalculados de cada estadística para la nacionalidad
+        (o globales) como {"min": {col: v}, "max": {col: v}}; None si no existen.
+        """
+        return None
+
+    async def jugadores_async(self, nationality: str, injured_allowed: bool, columns: list) -> pd.DataFrame:
+        return await asyncio.to_thread(self.jugadores, nationality, injured_allowed, columns)
+
+    async def estadisticas_async(self, nationality: str):
+        return await asyncio.to_thread(self.estadisticas, nationality)
+
+    async def pagina_async(self, nationality, fields, after=None, limit=100, filters=None) -> list:
+        return await asyncio.to_thread(self.pagina, nationality, fields, after, limit, filters)
+
+    async def iterar_pagina_async(self, nationality, fields, after=None, limit=100, filters=None):
+        """Jugadores de la página uno a uno (las implementaciones pueden hacerlo sin materializarla)."""
+        for player in await self.pagina_async(nationality, fields, after, limit, filters):
+            yield player
+
+    def exportar(self):
+        """Todos los jugadores (dicts con PLAYER_FIELDS), p. ej. para escribir el almacén columnar."""
+        raise NotImplementedError
+
+    def actualizar(self, path: str, delete_missing: bool = False):
+        """
+        Aplica un CSV recién importado en Neo4j (no hace nada si el origen es Neo4j).
+        Devuelve cuántos jugadores se han escrito y borrado, o None.
+        """
+        return None
+
+
+# -----------------------------------------------------------
+# 🔗 NEO4J
+# -----------------------------------------------------------
+
+class Neo4jPlayerRepository(PlayerRepository):
+    name = "neo4j"
+
+    def __init__(self, driver=None):
+        # `driver` permite inyectar otro driver (p. ej. el falso de los benchmarks)
+        self._driver = driver
+
+    @staticmethod
+    def _consulta_jugadores(injured_allowed: bool, columns: list) -> str:
+        return f"""
+        MATCH (p:Player)
+        WHERE p.nationality = $nation
+        {'AND (p.injured IS NULL OR p.injured = "No")' if not injured_allowed else ''}
+        RETURN {", ".join(f"p.{c} AS {c}" for c in columns)}
+        """
+
+    EXPORT_QUERY = f"MATCH (p:Player) RETURN {', '.join(f'p.{f} AS {f}' for f in PLAYER_FIELDS)}"
+
+    STATS_QUERY = """
+    MATCH (n:PlayerStats)
+    WHERE n.scope IN [$nationality, $global_scope]
+    RETURN n.scope AS scope, properties(n) AS values
+    """
+
+    @staticmethod
+    def _consulta_pagina(fields: list, after, limit: int, filters: dict):
+        """Consulta y parámetros de una página: solo se añaden los predicados usados."""
+        where = ["p.nationality = $nationality"]
+        params = {"limit": limit}
+        if after is not None:
+            where.append("p.player_id > $after")
+            params["after"] = after
+        for field, value in (filters or {}).items():
+            if field == "injured":
+                where.append('p.injured IS NOT NULL AND p.injured <> "No"' if value
+                             else '(p.injured IS NULL OR p.injured = "No")')
+            else:
+                where.append(f"p.{field} = ${field}")
+                params[field] = value
+        query = f"""
+        MATCH (p:Player)
+        WHERE {" AND ".join(where)}
+        RETURN {", ".join(f"p.{c} AS {c}" for c in campos_pagina(fields))}
+        ORDER BY p.player_id
+        LIMIT $limit
+        """
+        return query, params
+
+    def jugadores(self, nationality, injured_allowed, columns):
+        with (self._driver or obtener_driver()).session() as s:
+            rows = [r.data() for r in s.run(self._consulta_jugadores(injured_allowed, columns), nation=nationality)]
+        return pd.DataFrame(rows, columns=columns)
+
+    def estadisticas(self, nationality):
+        with (self._driver or obtener_driver()).session() as s:
+            rows = s.run(self.STATS_QUERY, nationality=nationality, global_scope=GLOBAL_STATS_SCOPE).data()
+        return _limites({r["scope"]: r["values"] for r in rows}, nationality)
+
+    def pagina(self, nationality, fields, after=None, limit=100, filters=None):
+        query, params = self._consulta_pagina(fields, after, limit, filters)
+        return leer(query, {**params, "nationality": nationality}, self._driver)
+
+    def exportar(self):
+        # Una sola consulta; los registros se entregan según llegan por Bolt
+        with (self._driver or obtener_driver()).session() as s:
+            for record in s.run(self.EXPORT_QUERY):
+                yield record.data()
+
+    async def jugadores_async(self, nationality, injured_allowed, columns):
+        if self._driver is not None:
+            return await super().jugadores_async(nationality, injured_allowed, columns)
+        rows = await consultar(self._consulta_jugadores(injured_allowed, columns), nation=nationality)
+        return pd.DataFrame(rows, columns=columns)
+
+    async def estadisticas_async(self, nationality):
+        if self._driver is not None:
+            return await super().estadisticas_async(nationality)
+        rows = await consultar(self.STATS_QUERY, nationality=nationality, global_scope=GLOBAL_STATS_SCOPE)
+        return _limites({r["scope"]: r["values"] for r in rows}, nationality)
+
+    async def pagina_async(self, nationality, fields, after=None, limit=100, filters=None):
+        if self._driver is not None:
+            return await super().pagina_async(nationality, fields, after, limit, filters)
+        query, params = self._consulta_pagina(fields, after, limit, filters)
+        return await leer_async(query, {**params, "nationality": nationality})
+
+    async def iterar_pagina_async(self, nationality, fields, after=None, limit=100, filters=None):
+        if self._driver is not None:
+            async for player in super().iterar_pagina_async(nationality, fields, after, limit, filters):
+                yield player
+            return
+        # Los registros se entregan según llegan por Bolt, sin cargar la página entera
+        query, params = self._consulta_pagina(fields, after, limit, filters)
+        async with obtener_driver_async().session() as s:
+            result = await s.run(query, params, nationality=nationality)
+            async for record in result:
+                yield record.data()
+
+
+# -----------------------------------------------------------
+# 🗄️ SQLITE EMBEBIDO
+# -----------------------------------------------------------
+
+# Columnas de la tabla: las propiedades de Player y la huella de la fila
+STORED_FIELDS = PLAYER_FIELDS + ["content_hash"]
+
+
+def _tipo_sqlite(field: str) -> str:
+    if field in INTEGER_FIELDS:
+        return "INTEGER"
+    if field in FLOAT_FIELDS:
+        return "REAL"
+    return "TEXT"
+
+
+class SQLitePlayerRepository(PlayerRepository):
+    """
+    Tabla `players` en SQLite con índice por (nationality, player_id). La conexión
+    es compartida entre hilos y protegida con un lock (las lecturas son cortas).
+    """
+
+    name = "sqlite"
+
+    def __init__(self, db_path: str = None):
+        self.db_path = db_path or PLAYER_SQLITE_PATH
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._stats = None
+
+    @classmethod
+    def desde_csv(cls, path: str = None, db_path: str = None) -> "SQLitePlayerRepository":
+        """Repositorio cargado desde el CSV de jugadores (si la base ya tiene datos, se reutiliza)."""
+        repo = cls(db_path)
+        if not repo._tiene_datos():
+            repo.cargar(leer_jugadores_csv(path or PLAYER_CSV))
+        return repo
+
+    def _tiene_datos(self) -> bool:
+        with self._lock:
+            columns = {r[1] for r in self._conn.execute("PRAGMA table_info(players)")}
+            # Las bases de antes de la importación incremental (sin huella) se vuelven a cargar
+            return "content_hash" in columns \
+                and self._conn.execute("SELECT 1 FROM players LIMIT 1").fetchone() is not None
+
+    @staticmethod
+    def _valores(row: dict) -> list:
+        return [row.get(f) for f in PLAYER_FIELDS] + [row.get("content_hash") or huella_fila(row)]
+
+    def cargar(self, rows) -> int:
+        """Sustituye la tabla por `rows` (dicts ya tipados, como los del importador)."""
+        columns = ", ".join(f"{f} {_tipo_sqlite(f)}" for f in PLAYER_FIELDS)
+        placeholders = ", ".join("?" for _ in STORED_FIELDS)
+        with self._lock, self._conn:
+            self._conn.execute("DROP TABLE IF EXISTS players")
+            self._conn.execute(f"CREATE TABLE players ({columns}, content_hash TEXT)")
+            self._conn.executemany(
+                f"INSERT INTO players ({', '.join(STORED_FIELDS)}) VALUES ({placeholders})",
+                (self._valores(r) for r in rows),
+            )
+            self._conn.execute("CREATE UNIQUE INDEX players_id ON players (player_id)")
+            self._conn.execute("CREATE INDEX players_nationality ON players (nationality, player_id)")
+            count = self._conn.execute("SELECT count(*) FROM players").fetchone()[0]
+        self._stats = self._calcular_estadisticas()
+        logging.info(f"Repositorio SQLite cargado: {count} jugadores ({self.db_path})")
+        return count
+
+    def actualizar(self, path: str, delete_missing: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Mismo criterio que el importador de Neo4j: por bloques, solo se escriben
+        las filas nuevas o con otra huella y, con `delete_missing`, se borran los
+        jugadores que no están en el fichero. Los player_id vistos se guardan en
+        una tabla temporal, no en memoria.
+        """
+        return self.aplicar(leer_jugadores_csv(path), delete_missing, chunk_size)
+
+    def aplicar(self, rows, delete_missing: bool = False, chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+        """Como `actualizar`, con filas ya tipadas."""
+        placeholders = ", ".join("?" for _ in STORED_FIELDS)
+        updates = ", ".join(f"{f} = excluded.{f}" for f in STORED_FIELDS if f != "player_id")
+        upsert = (
+            f"INSERT INTO players ({', '.join(STORED_FIELDS)}) VALUES ({placeholders}) "
+            f"ON CONFLICT (player_id) DO UPDATE SET {updates} "
+            f"WHERE players.content_hash IS NOT excluded.content_hash"
+        )
+        written = removed = 0
+        with self._lock:
+            if delete_missing:
+                self._conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen_ids (player_id TEXT PRIMARY KEY)")
+                self._conn.execute("DELETE FROM seen_ids")
+            for chunk in leer_en_bloques(rows, chunk_size):
+                with self._conn:
+                    before = self._conn.total_changes
+                    self._conn.executemany(upsert, (self._valores(r) for r in chunk))
+                    written += self._conn.total_changes - before
+                    if delete_missing:
+                        self._conn.executemany("INSERT OR IGNORE INTO seen_ids VALUES (?)",
+                                               ((r["player_id"],) for r in chunk))
+            if delete_missing:
+                with self._conn:
+                    removed = self._conn.execute(
+                        "DELETE FROM players WHERE player_id NOT IN (SELECT player_id FROM seen_ids)"
+                    ).rowcount
+                    self._conn.execute("DELETE FROM seen_ids")
+        if written or removed:
+            self._stats = self._calcular_estadisticas()
+        logging.info(f"Repositorio SQLite actualizado: {written} jugadores escritos, {removed} eliminados")
+        return {"written": written, "removed": removed}
+
+    def exportar(self):
+        names, rows = self._consultar(f"SELECT {', '.join(PLAYER_FIELDS)} FROM players", ())
+        return (dict(zip(names, r)) for r in rows)
+
+    def _calcular_estadisticas(self) -> dict:
+        """Mínimo y máximo por nacionalidad y global, con nombres min_<col>/max_<col>."""
+        aggregates = ", ".join(f"min({f}) AS min_{f}, max({f}) AS max_{f}" for f in NUMERIC_FIELDS)
+        names, rows = self._consultar(f"SELECT nationality, {aggregates} FROM players GROUP BY nationality", ())
+        stats = {r[0]: dict(zip(names[1:], r[1:])) for r in rows if r[0] is not None}
+        names, rows = self._consultar(f"SELECT {aggregates} FROM players", ())
+        stats[GLOBAL_STATS_SCOPE] = dict(zip(names, rows[0]))
+        return stats
+
+    def estadisticas(self, nationality):
+        if self._stats is None:
+            self._stats = self._calcular_estadisticas()
+        return _limites(self._stats, nationality)
+
+    def _consultar(self, sql: str, params: tuple):
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            names = [d[0] for d in cursor.description]
+            return names, cursor.fetchall()
+
+    def jugadores(self, nationality, injured_allowed, columns):
+        sql = f"SELECT {', '.join(validar_campos(columns))} FROM players WHERE nationality = ?"
+        if not injured_allowed:
+            sql += " AND (injured IS NULL OR injured = 'No')"
+        _, rows = self._consultar(sql, (nationality,))
+        return pd.DataFrame.from_records(rows, columns=columns)
+
+    def pagina(self, nationality, fields, after=None, limit=100, filters=None):
+        where, params = ["nationality = ?"], [nationality]
+        if after is not None:
+            where.append("player_id > ?")
+            params.append(after)
+        for field, value in (filters or {}).items():
+            if field == "injured":
+                where.append("injured IS NOT NULL AND injured <> 'No'" if value
+                             else "(injured IS NULL OR injured = 'No')")
+            else:
+                where.append(f"{field} = ?")
+                params.append(value)
+        sql = (f"SELECT {', '.join(campos_pagina(fields))} FROM players "
+               f"WHERE {' AND '.join(where)} ORDER BY player_id LIMIT ?")
+        names, rows = self._consultar(sql, tuple(params) + (limit,))
+        return [dict(zip(names, r)) for r in rows]
+
+
+# -----------------------------------------------------------
+# 🏭 REPOSITORIO ACTIVO
+# -----------------------------------------------------------
+
+REPOSITORIES = {"neo4j": Neo4jPlayerRepository, "sqlite": SQLitePlayerRepository.desde_csv}
+
+_repository = None
+_repository_lock = threading.Lock()
+
+
+def obtener_repositorio() -> PlayerRepository:
+    """Repositorio configurado en PLAYER_REPOSITORY (se crea en el primer uso)."""
+    global _repository
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                if PLAYER_REPOSITORY not in REPOSITORIES:
+                    raise ValueError(
+                        f"PLAYER_REPOSITORY desconocido: {PLAYER_REPOSITORY}. Opciones: {sorted(REPOSITORIES)}"
+                    )
+                _repository = REPOSITORIES[PLAYER_REPOSITORY]()
+    return _repository
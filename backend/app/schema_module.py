@@ -0,0 +1,107 @@
+# app/schema_module.py
+"""
+Esquema del grafo de fútbol: restricciones de unicidad e índices.
+
+Las búsquedas calientes (MERGE de Player/Team/League/Country en la importación
+y en create-graph, filtro por nacionalidad en el seleccionador, jugadores
+pendientes de enlazar en el grafo...) pasan a ser
+búsquedas por índice en lugar de recorridos completos de la etiqueta.
+"""
+import logging
+
+# (nombre, etiqueta, propiedad)
+CONSTRAINTS = [
+    ("player_id_unique", "Player", "player_id"),
+    ("team_name_unique", "Team", "name"),
+    ("league_name_unique", "League", "name"),
+    ("country_name_unique", "Country", "name"),
+    ("player_stats_scope_unique", "PlayerStats", "scope"),
+    ("meta_name_unique", "Meta", "name"),
+]
+
+INDEXES = [
+    ("player_nationality", "Player", "nationality"),
+    ("player_position", "Player", "position"),
+    ("player_specific_position", "Player", "specific_position"),
+    ("player_injured", "Player", "injured"),
+    ("player_graph_dirty", "Player", "graph_dirty"),
+]
+
+
+def sentencias_esquema() -> list:
+    """Sentencias Cypher idempotentes que crean el esquema completo."""
+    statements = [
+        f"CREATE CONSTRAINT {name} IF NOT EXISTS FOR (n:{label}) REQUIRE n.{prop} IS UNIQUE"
+        for name, label, prop in CONSTRAINTS
+    ]
+    statements += [
+        f"CREATE INDEX {name} IF NOT EXISTS FOR (n:{label}) ON (n.{prop})"
+        for name, label, prop in INDEXES
+    ]
+    return statements
+
+
+def aplicar_esquema(driver) -> dict:
+    """
+    Crea las restricciones e índices que falten. Un fallo en una sentencia (p. ej.
+    player_id duplicados que impiden la restricción) no impide aplicar el resto.
+    """
+    applied, errors = [], []
+    with driver.session() as s:
+        for statement in sentencias_esquema():
+            try:
+                s.run(statement).consume()
+                applied.append(statement)
+            except Exception as e:
+                logging.warning(f"No se pudo aplicar '{statement}': {e}")
+                errors.append({"statement": statement, "error": str(e)})
+    return {"applied": len(applied), "errors": errors}
+
+
+def verificar_esquema(driver) -> dict:
+    """
+    Comprueba qué restricciones e índices existen y su estado, e informa del uso
+    de cada índice (lecturas y última lectura) según SHOW INDEXES.
+    """
+    with driver.session() as s:
+        constraints = [r.data() for r in s.run(
+            "SHOW CONSTRAINTS YIELD name, type, labelsOrTypes, properties"
+        )]
+        indexes = [r.data() for r in s.run(
+            "SHOW INDEXES YIELD name, type, state, populationPercent, labelsOrTypes, properties, "
+            "owningConstraint, readCount, lastRead"
+        )]
+
+    def existe(items, label, prop):
+        return any(label in (i.get("labelsOrTypes") or []) and (i.get("properties") or []) == [prop] for i in items)
+
+    missing_constraints = [name for name, label, prop in CONSTRAINTS if not existe(constraints, label, prop)]
+    missing_indexes = [name for name, label, prop in INDEXES if not existe(indexes, label, prop)]
+    not_online = [i["name"] for i in indexes if i.get("state") != "ONLINE"]
+
+    usage = [{
+        "name": i["name"],
+        "label": (i.get("labelsOrTypes") or [None])[0],
+        "properties": i.get("properties"),
+        "state": i.get("state"),
+        "read_count": i.get("readCount"),
+        "last_read": str(i["lastRead"]) if i.get("lastRead") is not None else None,
+    } for i in indexes if i.get("type") != "LOOKUP"]
+
+    return {
+        "ok": not missing_constraints and not missing_indexes and not not_online,
+        "missing_constraints": missing_constraints,
+        "missing_indexes": missing_indexes,
+        "not_online": not_online,
+        "index_usage": usage,
+    }
+
+
+def asegurar_esquema(driver) -> dict:
+    """Aplica el esquema si falta algo y devuelve la verificación final (uso en el arranque)."""
+    report = verificar_esquema(driver)
+    if report["missing_constraints"] or report["missing_indexes"]:
+        logging.info("Aplicando esquema del grafo (restricciones e índices)...")
+        aplicar_esquema(driver)
+        report = verificar_esquema(driver)
+    return report
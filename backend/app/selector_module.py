@@ -1,17 +1,20 @@
 # app/selector_module.py
+import asyncio
+import multiprocessing
+import os
 import pandas as pd
 import numpy as np
 import random
-from neo4j import GraphDatabase
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
-# -----------------------------------------------------------
-# 🔗 CONFIGURACIÓN DE CONEXIÓN NEO4J
-# -----------------------------------------------------------
-NEO4J_URI = "bolt://sibi-neo4j:7687"
-NEO4J_USER = "neo4j"
-NEO4J_PASS = "recovery123"
-
-driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASS))
+from app.cache_module import LRUCache
+from app.chemistry_module import SquadChemistry
+from app.exact_module import cupos_por_posicion, resolver_exacto
+from app.optimizer_module import OPTIMIZERS, SquadState, optimizar
+from app.player_store import abrir_store
+from app.repository_module import obtener_repositorio
 
 # -----------------------------------------------------------
 # ⚖️ PESOS POR POSICIÓN Y ESTILO (TODAS LAS ESTADÍSTICAS)
@@ -103,6 +106,78 @@ STYLE_WEIGHTS = {
     "ofensivo": WEIGHTS_OFENSIVO
 }
 
+# Multiplicador por estilo para evitar inflar scores
+STYLE_MULTIPLIER = {"ofensivo": 0.97, "defensivo": 0.98, "balanceado": 1.0}
+
+# -----------------------------------------------------------
+# 🧮 MOTOR DE SCORING PRECOMPILADO (estilo × posición × estadística)
+# -----------------------------------------------------------
+
+STYLES = list(STYLE_WEIGHTS.keys())
+POSITIONS = ["POR", "DF", "MF", "FW"]
+
+# El dataset guarda la posición general en castellano; aceptamos ambas formas
+POSITION_CODES = {
+    "POR": 0, "Portero": 0,
+    "DF": 1, "Defensa": 1,
+    "MF": 2, "Mediocentro": 2,
+    "FW": 3, "Delantero": 3,
+}
+DEFAULT_POSITION_CODE = POSITION_CODES["MF"]
+
+# Posición general de cada posición específica (para los huecos sin candidatos)
+SPECIFIC_TO_GENERAL = {
+    "POR": "POR",
+    "DFC": "DF", "LD": "DF", "LI": "DF",
+    "MC": "MF", "MCD": "MF", "MCO": "MF",
+    "EI": "FW", "ED": "FW", "DC": "FW",
+}
+
+# Todas las estadísticas que aparecen en alguna tabla de pesos, en orden estable
+STAT_COLUMNS = sorted({
+    stat
+    for weights in STYLE_WEIGHTS.values()
+    for pos_weights in weights.values()
+    for stat in pos_weights
+})
+
+
+def _compilar_pesos() -> np.ndarray:
+    """Construye la matriz densa (estilo, posición, estadística) con el multiplicador de estilo aplicado."""
+    stat_idx = {stat: i for i, stat in enumerate(STAT_COLUMNS)}
+    matrix = np.zeros((len(STYLES), len(POSITIONS), len(STAT_COLUMNS)), dtype=np.float64)
+    for s, style_name in enumerate(STYLES):
+        for p, pos in enumerate(POSITIONS):
+            for stat, w in STYLE_WEIGHTS[style_name][pos].items():
+                matrix[s, p, stat_idx[stat]] = w
+        matrix[s] *= STYLE_MULTIPLIER[style_name]
+    return matrix
+
+
+WEIGHT_MATRIX = _compilar_pesos()
+
+
+def codificar_posiciones(positions) -> np.ndarray:
+    """Convierte posiciones generales (texto) a códigos enteros; las desconocidas cuentan como MF."""
+    return np.fromiter(
+        (POSITION_CODES.get(p, DEFAULT_POSITION_CODE) for p in positions),
+        dtype=np.int64,
+        count=len(positions),
+    )
+
+
+def calcular_scores(stats: np.ndarray, pos_codes: np.ndarray) -> np.ndarray:
+    """
+    Calcula el score individual de todos los jugadores para todos los estilos.
+    `stats` es (n, len(STAT_COLUMNS)) ya normalizado y `pos_codes` es (n,).
+    Devuelve una matriz (n, len(STYLES)).
+    """
+    n = stats.shape[0]
+    # Un único producto matricial: (n, stats) @ (stats, estilos·posiciones)
+    flat = stats @ WEIGHT_MATRIX.reshape(-1, len(STAT_COLUMNS)).T
+    by_pos = flat.reshape(n, len(STYLES), len(POSITIONS))
+    return by_pos[np.arange(n), :, pos_codes]
+
 # -----------------------------------------------------------
 # 🧮 PARÁMETROS GLOBALES
 # -----------------------------------------------------------
@@ -121,122 +196,315 @@ def generar_convocatoria(
     injured_allowed: bool = False,
     specific_positions_config: dict = None,
     fixed_players: list = None,
-    max_iterations: int = 300
+    max_iterations: int = 300,
+    optimizer: str = "first_improvement",
+    deadline_ms: float = None,
+    seed: int = None,
+    mode: str = "heuristic",
+    time_limit_s: float = 30.0,
+    tabla: tuple = None,
+    progress=None,
+    cancel=None
 ):
     """
     Genera la mejor convocatoria según rendimiento + química (club + liga).
     Si no se especifica estilo (balanceado por defecto), prueba todos los estilos
     y devuelve el de mayor total_score.
+
+    `optimizer` elige la estrategia de mejora (ver OPTIMIZERS) y `deadline_ms`
+    limita el tiempo total de búsqueda: al vencer se devuelve la mejor
+    convocatoria encontrada hasta entonces.
+
+    Con `mode="exact"` se resuelve además el problema como MILP (límite
+    `time_limit_s` por estilo) y el resultado incluye el óptimo probado o la
+    mejor cota y el gap respecto a ella en la clave "solver".
+
+    `tabla` permite pasar el par (tabla preparada, química) de `obtener_tabla`
+    ya obtenido, p. ej. una misma instantánea compartida por un lote.
+
+    `progress(evento)` recibe, por estilo, la convocatoria voraz inicial
+    ("greedy") y cada mejora de la búsqueda local ("improvement"). `cancel`
+    (threading.Event) corta la búsqueda y devuelve lo mejor encontrado.
+    Con cualquiera de los dos los estilos se optimizan en este proceso.
     """
+    if optimizer not in OPTIMIZERS:
+        return {"error": f"Optimizador desconocido: {optimizer}. Opciones: {', '.join(OPTIMIZERS)}"}
+    if mode not in ("heuristic", "exact"):
+        return {"error": f"Modo desconocido: {mode}. Opciones: heuristic, exact"}
+
+    # 1) Un único acceso a los datos (cacheado) y una única normalización para todos los estilos
+    df, chemistry = tabla if tabla is not None else obtener_tabla(nationality, injured_allowed)
+    if df.empty:
+        return {"error": f"No se encontraron jugadores de {nationality}"}
+
     # Si el usuario no especifica estilo (o usa "balanceado"), probamos los tres
-    if style == "balanceado":
-        styles_to_try = ["ofensivo", "defensivo", "balanceado"]
-        best_result = None
-        best_score = -1
-        best_style = "balanceado"
-        for candidate_style in styles_to_try:
-            result = generar_convocatoria_interna(
-                nationality, num_players, candidate_style,
-                injured_allowed, specific_positions_config, fixed_players, max_iterations
-            )
-            if result["total_score"] > best_score:
-                best_result = result
-                best_score = result["total_score"]
-                best_style = candidate_style
-        best_result["style"] = best_style
-        return best_result
+    styles_to_try = ["ofensivo", "defensivo", "balanceado"] if style == "balanceado" else [style]
+    run_style = partial(
+        optimizar_estilo, df, chemistry,
+        nationality=nationality,
+        num_players=num_players,
+        specific_positions_config=specific_positions_config,
+        fixed_players=fixed_players,
+        max_iterations=max_iterations,
+        optimizer=optimizer,
+        deadline_ms=deadline_ms,
+        seed=seed,
+        mode=mode,
+        time_limit_s=time_limit_s,
+        progress=progress,
+        cancel=cancel,
+    )
+    if len(styles_to_try) == 1:
+        return run_style(style)
+
+    # 2) Un estilo tras otro, o en el pool de procesos si está configurado
+    #    (la búsqueda local es Python puro: con hilos no hay paralelismo por el GIL)
+    executor = _style_executor() if progress is None and cancel is None else None
+    if executor is None:
+        results = [run_style(s) for s in styles_to_try]
     else:
-        # Si ya se especificó estilo, usamos ese directamente
-        return generar_convocatoria_interna(
-            nationality, num_players, style,
-            injured_allowed, specific_positions_config, fixed_players, max_iterations
-        )
+        run_style = partial(run_style.func, df[STYLE_TASK_COLUMNS], chemistry, **run_style.keywords)
+        results = list(executor.map(run_style, styles_to_try))
+    return max(results, key=lambda r: r["total_score"])
+
+
+# Procesos para optimizar los estilos en paralelo (0 o 1: en serie, en este proceso).
+# Solo compensa con varios núcleos libres: ver el apartado "styles" de benchmarks/bench_selector.py
+SELECTOR_STYLE_WORKERS = int(os.getenv("SELECTOR_STYLE_WORKERS", "0"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _style_executor():
+    """Pool de procesos compartido para los estilos (None si no está activado)."""
+    global _executor
+    if SELECTOR_STYLE_WORKERS <= 1:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            # spawn: el proceso del servidor tiene hilos (driver, threadpool) y fork no es seguro
+            _executor = ProcessPoolExecutor(
+                max_workers=min(SELECTOR_STYLE_WORKERS, len(STYLES)),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
 
 
 # -----------------------------------------------------------
-# 🔧 FUNCIÓN INTERNA PARA UN ESTILO ESPECÍFICO
+# 📥 OBTENCIÓN Y PREPARACIÓN DE JUGADORES
 # -----------------------------------------------------------
 
-def generar_convocatoria_interna(
-    nationality: str,
-    num_players: int,
-    style: str,
-    injured_allowed: bool,
-    specific_positions_config: dict,
-    fixed_players: list,
-    max_iterations: int
-):
-    # 1) Obtener jugadores desde Neo4j
-    with driver.session() as s:
-        q = f"""
-        MATCH (p:Player)
-        WHERE p.nationality = $nation
-        {'AND (p.injured IS NULL OR p.injured = "No")' if not injured_allowed else ''}
-        RETURN p.player_id AS player_id, p.name AS name, p.age AS age, p.nationality AS nationality,
-               p.team AS team, p.league AS league, p.position AS position,
-               p.specific_position AS specific_position, p.injured AS injured,
-               p.height_cm AS height_cm, p.weight_kg AS weight_kg, p.stamina AS stamina,
-               p.matches_played AS matches_played, p.minutes_played AS minutes_played,
-               p.yellow_cards AS yellow_cards, p.red_cards AS red_cards,
-               p.goals AS goals, p.assists AS assists, p.shots_per_game AS shots_per_game,
-               p.key_passes_per_game AS key_passes_per_game, p.dribbles_per_game AS dribbles_per_game,
-               p.tackles_per_game AS tackles_per_game, p.interceptions_per_game AS interceptions_per_game,
-               p.clearances_per_game AS clearances_per_game, p.aerial_duels_won_pct AS aerial_duels_won_pct,
-               p.fouls_per_game AS fouls_per_game, p.pass_accuracy_pct AS pass_accuracy_pct,
-               p.passes_per_game AS passes_per_game, p.long_balls_per_game AS long_balls_per_game,
-               p.crosses_per_game AS crosses_per_game, p.saves_per_game AS saves_per_game,
-               p.clean_sheets AS clean_sheets, p.goals_conceded AS goals_conceded,
-               p.penalty_save_pct AS penalty_save_pct
-        """
-        df = pd.DataFrame([r.data() for r in s.run(q, nation=nationality)])
-            # ✅ Guardar la edad original antes de normalizar (para mostrarla correctamente)
-        df["age_raw"] = pd.to_numeric(df["age"], errors="coerce")
+PLAYER_COLUMNS = [
+    "player_id", "name", "age", "nationality", "team", "league", "position",
+    "specific_position", "injured", "height_cm", "weight_kg", "stamina",
+    "matches_played", "minutes_played", "yellow_cards", "red_cards", "goals",
+    "assists", "shots_per_game", "key_passes_per_game", "dribbles_per_game",
+    "tackles_per_game", "interceptions_per_game", "clearances_per_game",
+    "aerial_duels_won_pct", "fouls_per_game", "pass_accuracy_pct", "passes_per_game",
+    "long_balls_per_game", "crosses_per_game", "saves_per_game", "clean_sheets",
+    "goals_conceded", "penalty_save_pct",
+]
+
+TEXT_COLUMNS = ["player_id", "name", "position", "specific_position", "team", "league", "nationality", "injured"]
+
+# Proyección de la lectura: identificación, edad (se muestra) y las estadísticas
+# que usa alguna tabla de pesos; el resto de propiedades no viaja por Bolt
+SELECTOR_COLUMNS = TEXT_COLUMNS + ["age"] + [c for c in STAT_COLUMNS if c not in TEXT_COLUMNS + ["age"]]
+
+# Columnas de la tabla preparada que usa `optimizar_estilo`: es lo único que se
+# envía a los procesos de los estilos (las estadísticas ya están en los scores)
+STYLE_TASK_COLUMNS = [
+    "player_id", "name", "age_raw", "nationality", "team", "league", "position",
+    "specific_position", "injured", "pos_code",
+] + [f"score_{s}" for s in STYLES]
+
+DEFAULT_POSITIONS_CONFIG = {
+    "POR": 3, "DFC": 4, "LD": 2, "LI": 2,
+    "MC": 4, "MCD": 2, "MCO": 2, "EI": 2, "ED": 2, "DC": 2
+}
+
+
+def obtener_jugadores(nationality: str, injured_allowed: bool) -> pd.DataFrame:
+    """
+    Jugadores de una nacionalidad (con o sin lesionados), solo con las columnas
+    que necesita el seleccionador. Se leen del almacén columnar compartido si
+    existe y, si no, del repositorio configurado (Neo4j o SQLite).
+    """
+    store = abrir_store()
+    if store is not None:
+        return store.tabla(nationality, injured_allowed, SELECTOR_COLUMNS)
+    return obtener_repositorio().jugadores(nationality, injured_allowed, SELECTOR_COLUMNS)
+
+
+async def obtener_jugadores_async(nationality: str, injured_allowed: bool) -> pd.DataFrame:
+    """Como `obtener_jugadores`, sin bloquear el event loop durante la lectura."""
+    store = abrir_store()
+    if store is not None:
+        return store.tabla(nationality, injured_allowed, SELECTOR_COLUMNS)
+    return await obtener_repositorio().jugadores_async(nationality, injured_allowed, SELECTOR_COLUMNS)
+
+
+def obtener_estadisticas(nationality: str):
+    """Mínimo/máximo precalculados en la importación (None si no existen)."""
+    store = abrir_store()
+    if store is not None:
+        return store.estadisticas(nationality)
+    return obtener_repositorio().estadisticas(nationality)
 
-    if df.empty:
-        return {"error": f"No se encontraron jugadores de {nationality}"}
+
+async def obtener_estadisticas_async(nationality: str):
+    store = abrir_store()
+    if store is not None:
+        return store.estadisticas(nationality)
+    return await obtener_repositorio().estadisticas_async(nationality)
+
+
+def _limites_estadisticas(stats: dict) -> tuple:
+    """Vectores (mínimo, escala) de STAT_COLUMNS; las columnas sin rango no se escalan."""
+    lo = np.array([stats["min"].get(c) for c in STAT_COLUMNS], dtype=np.float64)
+    hi = np.array([stats["max"].get(c) for c in STAT_COLUMNS], dtype=np.float64)
+    valid = np.isfinite(lo) & np.isfinite(hi) & (hi > lo)
+    offset = np.where(valid, lo, 0.0)
+    scale = np.where(valid, hi - lo, 1.0)
+    return offset, scale
+
+
+def normalizar_jugadores(df: pd.DataFrame, stats: dict = None) -> pd.DataFrame:
+    """
+    Ordena la tabla y normaliza las estadísticas a [0, 1]. Con las estadísticas
+    precalculadas (`stats`) es una única transformación afín vectorizada; sin
+    ellas se usa el mínimo/máximo del propio pool, como antes.
+    """
+    # Orden canónico: el resultado no depende del orden en que Neo4j devuelve las filas
+    df = df.sort_values("player_id", kind="stable").reset_index(drop=True)
+    # ✅ Guardar la edad original antes de normalizar (para mostrarla correctamente)
+    df["age_raw"] = pd.to_numeric(df["age"], errors="coerce")
+
+    if stats is not None:
+        for stat in STAT_COLUMNS:
+            if stat not in df.columns:
+                df[stat] = 0.0
+        values = df[STAT_COLUMNS].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+        offset, scale = _limites_estadisticas(stats)
+        normalized = np.nan_to_num((values - offset) / scale, nan=0.0)
+        df[STAT_COLUMNS] = normalized
+        return df
 
     # Normalizar columnas numéricas
-    exclude_cols = ["player_id", "name", "position", "specific_position", "team", "league", "nationality", "injured"]
+    exclude_cols = TEXT_COLUMNS + ["age_raw"]
     numeric_cols = [c for c in df.columns if c not in exclude_cols]
     for col in numeric_cols:
         df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
         if df[col].max() > df[col].min():
             df[col] = (df[col] - df[col].min()) / (df[col].max() - df[col].min())
+    return df
+
+
+def puntuar_jugadores(df: pd.DataFrame) -> pd.DataFrame:
+    """Añade el código de posición y una columna `score_<estilo>` por cada estilo."""
+    # Score individual (vectorizado para los tres estilos a la vez)
+    for stat in STAT_COLUMNS:
+        if stat not in df.columns:
+            df[stat] = 0.0
+    df["pos_code"] = codificar_posiciones(df["position"].tolist())
+    scores = calcular_scores(df[STAT_COLUMNS].to_numpy(dtype=np.float64), df["pos_code"].to_numpy())
+    for s_idx, style_name in enumerate(STYLES):
+        df[f"score_{style_name}"] = scores[:, s_idx]
+    return df
+
+
+def preparar_jugadores(df: pd.DataFrame, stats: dict = None) -> pd.DataFrame:
+    """Normaliza la tabla y calcula los scores de todos los estilos."""
+    return puntuar_jugadores(normalizar_jugadores(df, stats))
+
+
+# -----------------------------------------------------------
+# 🗃️ CACHÉ DE TABLAS PREPARADAS (por nacionalidad y lesionados)
+# -----------------------------------------------------------
+
+# Por ámbito de nacionalidad: una importación incremental solo invalida las nacionalidades que toca
+_player_cache = LRUCache(
+    "jugadores", max_entries=int(os.getenv("PLAYER_CACHE_SIZE", "32")), scope=lambda key: key[0]
+)
+
 
-    # Score individual (normalizado por estilo)
-    def calc_score(row):
-        weights = STYLE_WEIGHTS.get(style, STYLE_WEIGHTS["balanceado"]).get(
-            row.get("position"), STYLE_WEIGHTS["balanceado"]["MF"]
-        )
-        s = sum(float(row.get(stat, 0)) * w for stat, w in weights.items())
-        # Normalizamos por estilo para evitar inflar scores
-        style_multiplier = {"ofensivo": 0.97, "defensivo": 0.98, "balanceado": 1.0}[style]
-        return s * style_multiplier
-
-    df["score_individual"] = df.apply(calc_score, axis=1)
-
-    # Matriz de química
-    chem = {}
-    ids = df["player_id"].tolist()
-    for i in range(len(df)):
-        for j in range(i + 1, len(df)):
-            c = 1.0 if df.at[i, "team"] == df.at[j, "team"] else 0.5 if df.at[i, "league"] == df.at[j, "league"] else 0.0
-            chem[(df.at[i, "player_id"], df.at[j, "player_id"])] = c
-
-    # Default structure
+def _clave_tabla(nationality: str, injured_allowed: bool):
+    # La versión de la nacionalidad en el almacén forma parte de la clave: otro
+    # worker puede haber importado datos
+    store = abrir_store()
+    return (nationality, bool(injured_allowed), store.version(nationality) if store is not None else None)
+
+
+def _preparar_tabla(df: pd.DataFrame, stats: dict = None):
+    if df.empty:
+        return df, None
+    df = preparar_jugadores(df, stats)
+    return df, SquadChemistry(df["team"].tolist(), df["league"].tolist())
+
+
+def obtener_tabla(nationality: str, injured_allowed: bool):
+    """
+    Devuelve (tabla preparada, química codificada) de una nacionalidad.
+    Se sirve desde caché mientras no cambie la generación de datos; ambas
+    estructuras son de solo lectura para quien las recibe.
+    """
+    key = _clave_tabla(nationality, injured_allowed)
+    cached = _player_cache.get(key)
+    if cached is not None:
+        return cached
+
+    generation = _player_cache.generation(key)
+    df = obtener_jugadores(nationality, injured_allowed)
+    df, chemistry = _preparar_tabla(df, obtener_estadisticas(nationality))
+    if chemistry is not None:
+        _player_cache.put(key, (df, chemistry), generation)
+    return df, chemistry
+
+
+async def obtener_tabla_async(nationality: str, injured_allowed: bool):
+    """
+    Versión asíncrona de `obtener_tabla`: la lectura no ocupa un hilo y la
+    preparación (CPU) se hace en el threadpool para no bloquear el event loop.
+    """
+    key = _clave_tabla(nationality, injured_allowed)
+    cached = _player_cache.get(key)
+    if cached is not None:
+        return cached
+
+    generation = _player_cache.generation(key)
+    df, stats = await asyncio.gather(
+        obtener_jugadores_async(nationality, injured_allowed), obtener_estadisticas_async(nationality)
+    )
+    df, chemistry = await asyncio.to_thread(_preparar_tabla, df, stats)
+    if chemistry is not None:
+        _player_cache.put(key, (df, chemistry), generation)
+    return df, chemistry
+
+
+def player_cache_stats() -> dict:
+    """Estadísticas de aciertos/fallos de la caché de jugadores."""
+    return _player_cache.stats()
+
+
+def convocatoria_inicial(df: pd.DataFrame, nationality: str, num_players: int,
+                         specific_positions_config: dict, fixed_players: list):
+    """
+    Convocatoria voraz: fijos + mejores por posición específica + relleno.
+    Devuelve (índices de fila de `df`, índices de los fijos).
+    """
     fixed_players = fixed_players or []
     selected = df[
         (df["name"].isin(fixed_players)) &
      (df["nationality"] == nationality)
     ].copy()
 
-
     # Estructura por defecto si no viene personalizada
     if not specific_positions_config:
-        specific_positions_config = {
-            "POR": 3, "DFC": 4, "LD": 2, "LI": 2,
-            "MC": 4, "MCD": 2, "MCO": 2, "EI": 2, "ED": 2, "DC": 2
-        }
+        specific_positions_config = dict(DEFAULT_POSITIONS_CONFIG)
+    else:
+        # Copia: no modificamos el dict del llamante (se reutiliza entre estilos)
+        specific_positions_config = dict(specific_positions_config)
 
     # --- Restar plazas en función de los jugadores fijos ---
     for _, row in selected.iterrows():
@@ -252,8 +520,8 @@ def generar_convocatoria_interna(
             continue
         pool = df[(df["specific_position"] == pos) & (~df["name"].isin(selected["name"]))]
         if pool.empty:
-            general = "DF" if pos in ["DFC", "LD", "LI"] else "MF" if pos in ["MC", "MCD", "MCO"] else "FW" if pos in ["EI", "ED", "DC"] else "POR"
-            pool = df[(df["position"] == general) & (~df["name"].isin(selected["name"]))]
+            general = POSITION_CODES[SPECIFIC_TO_GENERAL.get(pos, "POR")]
+            pool = df[(df["pos_code"] == general) & (~df["name"].isin(selected["name"]))]
         selected = pd.concat([selected, pool.sort_values("score_individual", ascending=False).head(needed)])
 
     if len(selected) < num_players:
@@ -261,45 +529,27 @@ def generar_convocatoria_interna(
         selected = pd.concat([selected, pool.sort_values("score_individual", ascending=False).head(num_players - len(selected))])
 
     selected = selected.drop_duplicates(subset=["name"]).head(num_players)
-
-    # Score del equipo
-    def team_score(team_df):
-        mean_ind = float(team_df["score_individual"].mean()) if not team_df.empty else 0.0
-        pid_list = team_df["player_id"].tolist()
-        chem_sum, count = 0.0, 0
-        for i in range(len(pid_list)):
-            for j in range(i + 1, len(pid_list)):
-                chem_sum += chem.get((pid_list[i], pid_list[j]), chem.get((pid_list[j], pid_list[i]), 0.0))
-                count += 1
-        mean_chem = (chem_sum / count) if count > 0 else 0.0
-        return ALPHA * mean_ind + BETA * mean_chem, mean_ind, mean_chem
-
-    best_score, _, _ = team_score(selected)
-
-    # Mejora iterativa
-    for _ in range(max_iterations):
-        improved = False
-        for out_idx in list(selected.index):
-            out_pos = selected.at[out_idx, "specific_position"]
-            pool = df[df["specific_position"] == out_pos]
-            if pool.empty:
-                pool = df[df["position"] == selected.at[out_idx, "position"]]
-            for _, cand in pool.sort_values("score_individual", ascending=False).iterrows():
-                if cand["name"] in selected["name"].values:
-                    continue
-                new_team = pd.concat([selected.drop(out_idx), pd.DataFrame([cand])]).drop_duplicates(subset=["name"]).head(num_players)
-                new_score, _, _ = team_score(new_team)
-                if new_score > best_score + 1e-9:
-                    selected = new_team.reset_index(drop=True)
-                    best_score = new_score
-                    improved = True
-                    break
-            if improved:
-                break
-        if not improved:
-            break
-
-    total, mean_ind, mean_chem = team_score(selected)
+    locked = selected.index[selected["name"].isin(fixed_players)].to_numpy()
+    return selected.index.to_numpy(), locked
+
+
+def construir_estado(df: pd.DataFrame, squad, locked, chemistry: SquadChemistry = None) -> SquadState:
+    """Estado array para la optimización a partir de la tabla preparada."""
+    return SquadState(
+        scores=df["score_individual"].to_numpy(),
+        specific_positions=df["specific_position"].tolist(),
+        pos_codes=df["pos_code"].to_numpy(),
+        chemistry=chemistry or SquadChemistry(df["team"].tolist(), df["league"].tolist()),
+        squad=squad,
+        alpha=ALPHA,
+        beta=BETA,
+        locked=locked,
+    )
+
+
+def formatear_resultado(df: pd.DataFrame, state: SquadState, nationality: str, style: str) -> dict:
+    """Convierte la convocatoria final (índices) en el dict de respuesta."""
+    total, mean_ind, mean_chem = state.total()
     players_selected = [{
         "player_id": r.get("player_id"),
         "name": r.get("name"),
@@ -311,14 +561,155 @@ def generar_convocatoria_interna(
         "specific_position": r.get("specific_position"),
         "injured": r.get("injured"),
         "score_individual": float(r.get("score_individual"))
-    } for _, r in selected.iterrows()]
-
+    } for _, r in df.iloc[state.squad].iterrows()]
 
     return {
         "nationality": nationality,
         "style": style,
-        "total_score": round(total, 4),
-        "rendimiento_medio": round(mean_ind, 4),
-        "quimica_media": round(mean_chem, 4),
+        "total_score": round(float(total), 4),
+        "rendimiento_medio": round(float(mean_ind), 4),
+        "quimica_media": round(float(mean_chem), 4),
         "players_selected": players_selected
     }
+
+
+def _evento_progreso(stage: str, df: pd.DataFrame, state: SquadState, style: str, totals) -> dict:
+    """Evento de progreso con los totales y la convocatoria actual (nombre y posición)."""
+    total, mean_ind, mean_chem = totals
+    rows = df.iloc[state.squad]
+    return {
+        "stage": stage,
+        "style": style,
+        "total_score": round(float(total), 4),
+        "rendimiento_medio": round(float(mean_ind), 4),
+        "quimica_media": round(float(mean_chem), 4),
+        "players": [
+            {"name": name, "specific_position": pos}
+            for name, pos in zip(rows["name"].tolist(), rows["specific_position"].tolist())
+        ],
+    }
+
+
+def _resolver_exacto(df: pd.DataFrame, state: SquadState, specific_positions_config: dict,
+                     time_limit_s: float) -> dict:
+    """
+    Modo exacto: mismas entradas que la heurística (scores, química, fijos) y
+    las plazas por posición de `specific_positions_config`.
+    Deja `state` en la solución del solver y devuelve el informe del solver.
+    """
+    heuristic_score = state.total()[0]
+    config = specific_positions_config or DEFAULT_POSITIONS_CONFIG
+    fixed = np.flatnonzero(state.locked)
+    quotas = cupos_por_posicion(
+        df["specific_position"].tolist(), df["pos_code"].to_numpy(), config,
+        {pos: POSITION_CODES[SPECIFIC_TO_GENERAL.get(pos, "POR")] for pos in config},
+        k=state.size, fixed=fixed,
+    )
+
+    report = resolver_exacto(
+        scores=state.scores,
+        teams=df["team"].tolist(),
+        leagues=df["league"].tolist(),
+        quotas=quotas,
+        fixed=fixed,
+        k=state.size,
+        alpha=ALPHA,
+        beta=BETA,
+        time_limit_s=time_limit_s,
+        incumbent=state.snapshot(),
+    )
+    # Si el solver se queda sin tiempo con una solución peor, nos quedamos con la heurística
+    if report["squad"] is not None and report["objective"] is not None \
+            and report["objective"] > heuristic_score + 1e-12:
+        state.restore(report["squad"])
+    total = state.total()[0]
+    if report["bound"] is not None:
+        report["gap"] = max(0.0, (report["bound"] - total) / abs(report["bound"])) if report["bound"] else 0.0
+    return {
+        "optimal": report["optimal"],
+        "status": report["status"],
+        "objective": round(float(total), 6),
+        "bound": None if report["bound"] is None else round(float(report["bound"]), 6),
+        "gap": None if report["gap"] is None else round(float(report["gap"]), 6),
+        "heuristic_score": round(float(heuristic_score), 6),
+        "tiempo_s": report["tiempo_s"],
+    }
+
+
+# -----------------------------------------------------------
+# 🔧 OPTIMIZACIÓN DE UN ESTILO SOBRE LA TABLA COMPARTIDA
+# -----------------------------------------------------------
+
+def optimizar_estilo(
+    df: pd.DataFrame,
+    chemistry: SquadChemistry,
+    style: str,
+    nationality: str,
+    num_players: int,
+    specific_positions_config: dict,
+    fixed_players: list,
+    max_iterations: int,
+    optimizer: str = "first_improvement",
+    deadline_ms: float = None,
+    seed: int = None,
+    mode: str = "heuristic",
+    time_limit_s: float = 30.0,
+    progress=None,
+    cancel=None
+):
+    """
+    Optimiza la convocatoria de un estilo sobre una tabla ya preparada.
+    No modifica `df` ni `chemistry`, así que varios estilos pueden ejecutarse a la vez.
+    """
+    style_key = style if style in STYLES else "balanceado"
+    df = df.assign(score_individual=df[f"score_{style_key}"])
+
+    # Convocatoria inicial y representación con arrays (índices de fila de `df`)
+    squad, locked = convocatoria_inicial(df, nationality, num_players, specific_positions_config, fixed_players)
+    state = construir_estado(df, squad, locked, chemistry.fresh())
+
+    on_improvement = None
+    if progress is not None:
+        progress(_evento_progreso("greedy", df, state, style, state.total()))
+        on_improvement = lambda st, *totals: progress(_evento_progreso("improvement", df, st, style, totals))
+
+    # Mejora (evaluación incremental de cada cambio) con la estrategia elegida
+    optimizar(state, optimizer, max_iterations, deadline_ms, seed, progress=on_improvement, cancel=cancel)
+
+    solver = None
+    if mode == "exact":
+        # La heurística aporta la solución de referencia para el gap
+        solver = _resolver_exacto(df, state, specific_positions_config, time_limit_s)
+
+    result = formatear_resultado(df, state, nationality, style)
+    if solver is not None:
+        result["solver"] = solver
+    return result
+
+
+# -----------------------------------------------------------
+# 🔧 FUNCIÓN INTERNA PARA UN ESTILO ESPECÍFICO
+# -----------------------------------------------------------
+
+def generar_convocatoria_interna(
+    nationality: str,
+    num_players: int,
+    style: str,
+    injured_allowed: bool,
+    specific_positions_config: dict,
+    fixed_players: list,
+    max_iterations: int,
+    optimizer: str = "first_improvement",
+    deadline_ms: float = None,
+    seed: int = None,
+    mode: str = "heuristic",
+    time_limit_s: float = 30.0
+):
+    """Convocatoria para un único estilo."""
+    df, chemistry = obtener_tabla(nationality, injured_allowed)
+    if df.empty:
+        return {"error": f"No se encontraron jugadores de {nationality}"}
+    return optimizar_estilo(
+        df, chemistry, style, nationality, num_players, specific_positions_config,
+        fixed_players, max_iterations, optimizer, deadline_ms, seed, mode, time_limit_s
+    )
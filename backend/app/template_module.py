@@ -0,0 +1,235 @@
+# app/template_module.py
+"""
+Respuesta directa a las preguntas más frecuentes del chat, sin pasar por el LLM.
+
+Reconoce unas pocas formas de pregunta con el vocabulario que ya usa el backend
+(NATIONALITY_MAP, posiciones y estadísticas del GRAFO_SCHEMA):
+
+  - jugadores de un equipo, liga, nacionalidad o posición ("delanteros argentinos")
+  - los N mejores/peores en una estadística ("top 5 goleadores del Real Madrid")
+  - equipos de una liga o nacionalidad, ligas y nacionalidades
+
+y las compila a Cypher parametrizado: solo los nombres de propiedad (de una
+lista blanca) forman parte del texto, los valores van como parámetros. Lo que no
+encaja con seguridad devuelve None y sigue el camino del LLM.
+"""
+import re
+import unicodedata
+
+from app.llama_integration import GRAFO_SCHEMA, NATIONALITY_MAP, numero_pregunta
+
+# -----------------------------------------------------------
+# 📚 VOCABULARIO
+# -----------------------------------------------------------
+
+PLAYER_PROPERTIES = [
+    p.strip() for p in re.search(r"Player \{([^}]*)\}", GRAFO_SCHEMA).group(1).split(",")
+]
+TEXT_PROPERTIES = {"player_id", "name", "nationality", "team", "league", "position", "specific_position", "injured"}
+STAT_PROPERTIES = [p for p in PLAYER_PROPERTIES if p not in TEXT_PROPERTIES]
+
+POSITION_WORDS = {
+    "portero": "Portero", "porteros": "Portero",
+    "defensa": "Defensa", "defensas": "Defensa", "defensores": "Defensa",
+    "mediocentro": "Mediocentro", "mediocentros": "Mediocentro",
+    "centrocampista": "Mediocentro", "centrocampistas": "Mediocentro",
+    "delantero": "Delantero", "delanteros": "Delantero",
+}
+SPECIFIC_POSITIONS = ["POR", "DFC", "LD", "LI", "MC", "MCD", "MCO", "EI", "ED", "DC"]
+
+LEAGUE_WORDS = {
+    "laliga": "LaLiga", "la liga": "LaLiga", "liga española": "LaLiga",
+    "premier": "Premier", "premier league": "Premier", "liga inglesa": "Premier",
+    "serie a": "Serie A", "liga italiana": "Serie A",
+    "bundesliga": "Bundesliga", "liga alemana": "Bundesliga",
+    "ligue 1": "Ligue 1", "liga francesa": "Ligue 1",
+}
+
+# Palabra -> (propiedad, orden implícito o None si hace falta "más"/"menos")
+STAT_WORDS = {
+    "goleadores": ("goals", "DESC"), "goles": ("goals", None),
+    "asistentes": ("assists", "DESC"), "asistencias": ("assists", None),
+    "tarjetas amarillas": ("yellow_cards", None), "amarillas": ("yellow_cards", None),
+    "tarjetas rojas": ("red_cards", None), "rojas": ("red_cards", None),
+    "partidos": ("matches_played", None), "minutos": ("minutes_played", None),
+    "tiros": ("shots_per_game", None), "disparos": ("shots_per_game", None),
+    "pases clave": ("key_passes_per_game", None), "regates": ("dribbles_per_game", None),
+    "entradas": ("tackles_per_game", None), "intercepciones": ("interceptions_per_game", None),
+    "despejes": ("clearances_per_game", None), "duelos aereos": ("aerial_duels_won_pct", None),
+    "faltas": ("fouls_per_game", None), "precision de pase": ("pass_accuracy_pct", None),
+    "pases": ("passes_per_game", None), "balones largos": ("long_balls_per_game", None),
+    "centros": ("crosses_per_game", None), "paradas": ("saves_per_game", None),
+    "porterias a cero": ("clean_sheets", None), "goles encajados": ("goals_conceded", None),
+    "penaltis parados": ("penalty_save_pct", None), "resistencia": ("stamina", None),
+    "altura": ("height_cm", None), "altos": ("height_cm", "DESC"), "peso": ("weight_kg", None),
+    "jovenes": ("age", "ASC"), "veteranos": ("age", "DESC"),
+}
+STAT_LABELS = {"age": "edad"}
+for _word, (_prop, _implicit) in STAT_WORDS.items():
+    if _implicit is None:
+        STAT_LABELS.setdefault(_prop, _word)
+
+MORE_WORDS = ["mas", "mejores", "top", "maximos", "mayor"]
+LESS_WORDS = ["menos", "peores", "menor"]
+
+# Construcciones que las plantillas no cubren (sobre el texto plegado): mejor que las responda el LLM
+UNSUPPORTED = re.compile(
+    r"\b(?:companer\w*|promedio|media|cuant\w*|total|suma|entre|anos|edad|entrenamiento\w*|relacion\w*"
+    r"|(?:mas|menos|mayor|menor|mayores|menores) de)\b"
+)
+
+CAPITALIZED = r"[A-ZÁÉÍÓÚÑ][\wÀ-ÿ\.]*"
+TEAM_PATTERN = re.compile(
+    rf"\b(?:del|de la|de los|de|en el|en)\s+({CAPITALIZED}(?:\s+(?:{CAPITALIZED}|SG|FC|\d+))*)"
+)
+
+
+def plegar(text: str) -> str:
+    """Minúsculas y sin tildes (la ñ también se pliega a n)."""
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def _contiene(text: str, word: str) -> bool:
+    return re.search(rf"\b{re.escape(plegar(word))}\b", text) is not None
+
+
+def _buscar(text: str, vocabulary: dict):
+    """Valor de la entrada más larga de `vocabulary` que aparece en `text` (o None)."""
+    for word in sorted(vocabulary, key=len, reverse=True):
+        if _contiene(text, word):
+            return vocabulary[word]
+    return None
+
+
+NATIONALITY_WORDS = {**NATIONALITY_MAP, **{v.lower(): v for v in NATIONALITY_MAP.values()},
+                     **{v.lower() + "s": v for v in NATIONALITY_MAP.values()}}
+
+
+# -----------------------------------------------------------
+# 🧩 COMPILACIÓN DE LA PREGUNTA
+# -----------------------------------------------------------
+
+def _es_posicion(candidate: str) -> bool:
+    """"MC", "DC" o "Porteros" tras 'en/de' son posiciones, no equipos."""
+    return candidate in SPECIFIC_POSITIONS or plegar(candidate) in POSITION_WORDS
+
+
+def _equipo(pregunta: str):
+    """
+    Nombre de equipo escrito con mayúsculas tras 'del/de/en' que no sea país,
+    liga ni posición. Devuelve el match (grupo 1 = nombre) o None.
+    """
+    for m in TEAM_PATTERN.finditer(pregunta):
+        candidate = m.group(1).strip()
+        folded = plegar(candidate)
+        if _es_posicion(candidate) or _buscar(folded, NATIONALITY_WORDS) is not None \
+                or _buscar(folded, LEAGUE_WORDS) is not None:
+            continue
+        return m
+    return None
+
+
+def _filtros(pregunta: str, text: str, team):
+    """Predicados WHERE y parámetros para los filtros reconocidos en la pregunta (`team` es el match de _equipo)."""
+    where, params = [], {}
+    league = _buscar(text, LEAGUE_WORDS)
+    if league:
+        where.append("p.league = $league")
+        params["league"] = league
+        # "liga inglesa" es una liga, no una nacionalidad
+        for word in sorted(LEAGUE_WORDS, key=len, reverse=True):
+            text = re.sub(rf"\b{re.escape(plegar(word))}\b", " ", text)
+    nationality = _buscar(text, NATIONALITY_WORDS)
+    if nationality:
+        where.append("p.nationality = $nationality")
+        params["nationality"] = nationality
+    if team:
+        where.append("toLower(p.team) CONTAINS $team")
+        params["team"] = team.group(1).strip().lower()
+    specific = [pos for pos in SPECIFIC_POSITIONS if re.search(rf"\b{pos}\b", pregunta)]
+    position = _buscar(text, POSITION_WORDS)
+    if len(specific) == 1:
+        where.append("p.specific_position = $specific_position")
+        params["specific_position"] = specific[0]
+    elif position:
+        where.append("p.position = $position")
+        params["position"] = position
+    if "sin lesionados" in text or "no lesionados" in text:
+        where.append('(p.injured IS NULL OR p.injured = "No")')
+    elif _contiene(text, "lesionados"):
+        where.append('p.injured IS NOT NULL AND p.injured <> "No"')
+    return where, params, bool(position or specific)
+
+
+def _orden(text: str, implicit):
+    """ASC/DESC: lo fija la propia palabra ("más jóvenes") o el "más"/"menos" que la acompaña."""
+    if implicit is not None:
+        return implicit
+    if any(_contiene(text, w) for w in LESS_WORDS):
+        return "ASC"
+    if any(_contiene(text, w) for w in MORE_WORDS):
+        return "DESC"
+    return None
+
+
+def compilar_pregunta(pregunta: str):
+    """
+    Cypher parametrizado para la pregunta, o None si no encaja en ninguna plantilla.
+    Devuelve {"cypher", "params", "shape", "stat"}; las filas traen `name` (y `value`
+    en los rankings por estadística).
+    """
+    text = plegar(pregunta)
+    if UNSUPPORTED.search(text):
+        return None
+
+    team = _equipo(pregunta)
+    where, params, has_position = _filtros(pregunta, text, team)
+    # Ni el 1 de "Ligue 1" ni el 04 de "Schalke 04" son el número de resultados pedido
+    rest = pregunta if team is None else pregunta[:team.start(1)] + " " + pregunta[team.end(1):]
+    params["limit"] = numero_pregunta(re.sub(r"ligue\s+1", "", rest, flags=re.IGNORECASE))
+    match_where = "MATCH (p:Player)" + (f"\nWHERE {' AND '.join(where)}" if where else "")
+    stat = _buscar(text, STAT_WORDS)
+
+    if _contiene(text, "equipos") or _contiene(text, "clubes"):
+        if stat or has_position:
+            return None
+        return {"cypher": f"{match_where}\nRETURN DISTINCT p.team AS name\nORDER BY rand()\nLIMIT $limit",
+                "params": params, "shape": "equipos", "stat": None}
+
+    if _contiene(text, "ligas") or _contiene(text, "nacionalidades"):
+        if stat or has_position:
+            return None
+        prop, shape = ("league", "ligas") if _contiene(text, "ligas") else ("nationality", "nacionalidades")
+        return {"cypher": f"{match_where}\nRETURN DISTINCT p.{prop} AS name\nORDER BY rand()\nLIMIT $limit",
+                "params": params, "shape": shape, "stat": None}
+
+    if not (_contiene(text, "jugadores") or has_position or stat):
+        return None
+
+    if stat:
+        prop, implicit = stat
+        order = _orden(text, implicit)
+        if order is None or prop not in STAT_PROPERTIES:
+            return None
+        cypher = (
+            f"{match_where}\n{'AND' if where else 'WHERE'} p.{prop} IS NOT NULL\n"
+            f"RETURN p.name AS name, p.{prop} AS value\n"
+            f"ORDER BY value {order}, name\nLIMIT $limit"
+        )
+        return {"cypher": cypher, "params": params, "shape": "ranking", "stat": prop}
+
+    if not where:
+        return None  # "jugadores" sin más: la respuesta no aporta nada sin filtro
+    if any(_contiene(text, w) for w in MORE_WORDS + LESS_WORDS):
+        return None  # "los mejores porteros" sin estadística: el criterio lo decide el LLM
+    return {"cypher": f"{match_where}\nRETURN p.name AS name\nORDER BY rand()\nLIMIT $limit",
+            "params": params, "shape": "jugadores", "stat": None}
+
+
+def formatear_filas(plantilla: dict, rows: list) -> list:
+    """Valores para el chat: nombres, y en los rankings también la estadística."""
+    if plantilla["shape"] != "ranking":
+        return [r["name"] for r in rows]
+    label = STAT_LABELS.get(plantilla["stat"], plantilla["stat"])
+    return [f"{r['name']} ({label}: {r['value']})" for r in rows]
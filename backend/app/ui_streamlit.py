@@ -48,39 +48,91 @@ for msg in st.session_state["messages"]:
     else:
         st.markdown(f"<div class='chat-bubble-ai'><b>FootBase:</b><br>{msg['content']}</div>", unsafe_allow_html=True)
 
-user_input = st.text_input("Escribe tu consulta aquí...")
+STREAM_URL = f"{API_URL}/stream"
 
-if user_input:
+
+def _texto_progreso(params: dict, estilos: dict) -> str:
+    """Progreso de la convocatoria: parámetros, total por estilo y la mejor convocatoria hasta ahora."""
+    lines = []
+    if params:
+        lines.append(
+            f"🧾 {params['nationality']} · {params['num_players']} jugadores · estilo {params['style']}"
+            + ("" if params["injured_allowed"] else " · sin lesionados")
+        )
+    for style, ev in estilos.items():
+        icon = "🧩" if ev["stage"] == "greedy" else "🔎"
+        lines.append(f"{icon} {style}: total {ev['total_score']} (rendimiento {ev['rendimiento_medio']}, química {ev['quimica_media']})")
+    if estilos:
+        best = max(estilos.values(), key=lambda ev: ev["total_score"])
+        lines.append(f"\n⭐ Mejor hasta ahora ({best['style']}):")
+        lines += [f" - {p['name']} ({p['specific_position']})" for p in best["players"]]
+    return "\n".join(lines)
+
+
+def _detener():
+    """Se queda con la mejor convocatoria recibida; al recargar se cierra el stream y el backend para la búsqueda."""
+    parcial = st.session_state.get("parcial")
+    if parcial and st.session_state.get("en_curso"):
+        st.session_state["en_curso"] = False
+        st.session_state["messages"].append({"role": "ai", "content": parcial + "\n\n⏹️ Búsqueda detenida"})
+
+
+def _enviar():
+    """Cada envío del formulario es un evento nuevo, aunque repita la pregunta anterior."""
+    st.session_state["envios"] = st.session_state.get("envios", 0) + 1
+    st.session_state["pregunta"] = st.session_state["entrada"]
+
+
+with st.form("consulta", clear_on_submit=True):
+    st.text_input("Escribe tu consulta aquí...", key="entrada")
+    st.form_submit_button("Enviar", on_click=_enviar)
+
+user_input = st.session_state.get("pregunta")
+envio = st.session_state.get("envios", 0)
+
+# Cada envío se procesa una vez (las recargas por otros widgets, como el botón de parar, no lo repiten)
+if user_input and st.session_state.get("procesada") != envio:
+    st.session_state["procesada"] = envio
+    st.session_state["parcial"] = None
+    st.session_state["en_curso"] = True
     st.session_state["messages"].append({"role": "user", "content": user_input})
-    with st.spinner("SIBI está pensando... 🧩"):
-        try:
-            start_time = time.time()
-            response = requests.get(API_URL, params={"pregunta": user_input}, timeout=120)
-            duration = round(time.time() - start_time, 2)
-
-            if response.status_code == 200:
-                data = response.json()
-
-                # 🔥 Protección total contra None o respuestas raras
-                if not isinstance(data, dict):
-                    ai_msg = f"⚠️ Respuesta inesperada del backend: {data}"
-                else:
-                    ai_msg = data.get("respuesta", "⚠️ Respuesta no válida del servidor.")
-
-                # Si la respuesta es lista o dict → formatear bonito en JSON
-                if isinstance(ai_msg, (list, dict)):
-                    ai_msg = json.dumps(ai_msg, indent=2, ensure_ascii=False)
-
-
-                st.session_state["messages"].append({"role": "ai", "content": ai_msg})
-                st.markdown(
-                    f"<div class='chat-bubble-ai'><b>FootBase:</b><br>{ai_msg}</div>",
-                    unsafe_allow_html=True
-                )
-                st.caption(f"⏱️ Respondido en {duration}s")
-            else:
-                st.session_state["messages"].append({"role": "ai", "content": "❌ Error: backend no disponible."})
-                st.error("❌ Error al conectar con el backend.")
-        except Exception as e:
-            st.session_state["messages"].append({"role": "ai", "content": f"❌ Error de conexión: {e}"})
-            st.error(f"❌ Error de conexión: {e}")
\ No newline at end of file
+    st.markdown(f"<div class='chat-bubble-user'><b>Tú:</b><br>{user_input}</div>", unsafe_allow_html=True)
+    st.button("⏹️ Quedarme con la mejor hasta ahora", on_click=_detener)
+    bubble = st.empty()
+    bubble.markdown("<div class='chat-bubble-ai'><b>FootBase:</b><br>SIBI está pensando... 🧩</div>", unsafe_allow_html=True)
+    try:
+        start_time = time.time()
+        params, estilos, partes = None, {}, []
+        # Timeout de lectura por evento, no para la respuesta completa
+        with requests.get(STREAM_URL, params={"pregunta": user_input}, stream=True, timeout=(5, 120)) as response:
+            if response.status_code != 200:
+                raise RuntimeError(f"backend no disponible (HTTP {response.status_code})")
+            for line in response.iter_lines(decode_unicode=True):
+                if not line:
+                    continue
+                ev = json.loads(line)
+                stage = ev.get("stage")
+                if stage == "params":
+                    params = ev
+                elif stage in ("greedy", "improvement"):
+                    estilos[ev["style"]] = ev
+                elif stage in ("squad", "analysis", "answer", "error"):
+                    respuesta = ev.get("respuesta", "⚠️ Respuesta no válida del servidor.")
+                    # Si la respuesta es lista o dict → formatear bonito en JSON
+                    if isinstance(respuesta, (list, dict)):
+                        respuesta = json.dumps(respuesta, indent=2, ensure_ascii=False)
+                    partes.append(respuesta)
+                elif stage == "done":
+                    break
+                ai_msg = "\n\n".join(partes) if partes else _texto_progreso(params, estilos)
+                st.session_state["parcial"] = ai_msg
+                bubble.markdown(f"<div class='chat-bubble-ai'><b>FootBase:</b><br>{ai_msg}</div>", unsafe_allow_html=True)
+
+        st.session_state["en_curso"] = False
+        ai_msg = st.session_state["parcial"] or "⚠️ Respuesta no válida del servidor."
+        st.session_state["messages"].append({"role": "ai", "content": ai_msg})
+        st.caption(f"⏱️ Respondido en {round(time.time() - start_time, 2)}s")
+    except Exception as e:
+        st.session_state["en_curso"] = False
+        st.session_state["messages"].append({"role": "ai", "content": f"❌ Error de conexión: {e}"})
+        st.error(f"❌ Error de conexión: {e}")
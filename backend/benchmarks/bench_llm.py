@@ -0,0 +1,76 @@
+# benchmarks/bench_llm.py
+"""
+Benchmark del cliente asíncrono del LLM contra el servidor falso local.
+
+Escenarios:
+  - coalesced: N peticiones concurrentes con el mismo prompt (una sola llamada)
+  - distinct: N prompts distintos (limitados por el semáforo de concurrencia)
+  - flaky: prompts distintos con fallos 500/429 simulados (reintentos con jitter)
+  - timeout: servidor más lento que el timeout del cliente
+
+Uso (desde backend/):
+    python -m benchmarks.bench_llm --requests 50 --concurrency 4 --delay-ms 200
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from app.llm_module import ClienteLLM
+from benchmarks.fake_llm_server import iniciar_servidor
+
+
+async def _lanzar(client: ClienteLLM, prompts: list) -> dict:
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*(client.completar(p) for p in prompts), return_exceptions=True)
+    return {
+        "ms": round((time.perf_counter() - t0) * 1000, 1),
+        "ok": sum(not isinstance(r, Exception) for r in results),
+        "failed": sum(isinstance(r, Exception) for r in results),
+    }
+
+
+async def escenario(name: str, prompts: list, args, delay_ms: float, fail_rate: float = 0.0,
+                    rate_limit_rate: float = 0.0, timeout: float = None) -> dict:
+    server = iniciar_servidor(delay_ms=delay_ms, fail_rate=fail_rate, rate_limit_rate=rate_limit_rate, seed=args.seed)
+    try:
+        client = ClienteLLM(api_key="local", base_url=server.url, timeout=timeout or args.timeout,
+                            max_concurrency=args.concurrency, max_retries=args.retries, backoff=args.backoff)
+        summary = await _lanzar(client, prompts)
+        return {"scenario": name, **summary, "server_requests": server.requests, "client": client.stats()}
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+async def run(args) -> list:
+    n = args.requests
+    distinct = [f"pregunta {i}" for i in range(n)]
+    return [
+        await escenario("coalesced", ["misma pregunta"] * n, args, args.delay_ms),
+        await escenario("distinct", distinct, args, args.delay_ms),
+        await escenario("flaky", distinct, args, args.delay_ms, fail_rate=0.15, rate_limit_rate=0.1),
+        await escenario("timeout", distinct[:args.concurrency], args, args.delay_ms * 5,
+                        timeout=args.delay_ms * 2 / 1000),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del cliente asíncrono del LLM")
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--delay-ms", type=float, default=100)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--backoff", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for result in asyncio.run(run(args)):
+        client = result.pop("client")
+        print(f"⏱️ {result['scenario']}: {json.dumps(result)}")
+        print(f"   cliente: {json.dumps(client)}")
+
+
+if __name__ == "__main__":
+    main()
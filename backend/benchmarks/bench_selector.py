@@ -0,0 +1,212 @@
+# benchmarks/bench_selector.py
+"""
+Benchmark del seleccionador con pools sintéticos y un Neo4j en memoria.
+
+Mide por separado cada etapa de `generar_convocatoria` (lectura, normalización,
+scoring, química, relleno voraz y búsqueda local) para varios tamaños de pool,
+los tres estilos y distintos escenarios, y guarda el resultado en JSON para
+poder comparar ejecuciones. `--backend` elige el repositorio de jugadores
+(Neo4j falso en memoria o SQLite embebido) para comparar la lectura de ambos.
+El apartado "styles" compara los tres estilos en serie con el pool de procesos
+(SELECTOR_STYLE_WORKERS).
+
+Uso (desde backend/):
+    python -m benchmarks.bench_selector --sizes 1000 10000 --skew 1.2
+    python -m benchmarks.bench_selector --sizes 10000 --backend sqlite
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from app import selector_module as sm
+from app.chemistry_module import SquadChemistry
+from app.optimizer_module import optimizar
+from app.repository_module import Neo4jPlayerRepository, SQLitePlayerRepository
+from benchmarks.fake_neo4j import SYNTHETIC_NATIONALITY, FakeDriver, filas_jugadores, generar_jugadores
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+CUSTOM_QUOTAS = {"POR": 2, "DFC": 3, "LD": 1, "LI": 1, "MC": 3, "MCO": 2, "EI": 2, "ED": 2, "DC": 3}
+
+
+class Cronometro:
+    """Acumula tiempos (ms) por etapa."""
+
+    def __init__(self):
+        self.stages = {}
+
+    def medir(self, stage, fn, *args, **kwargs):
+        t0 = time.perf_counter()
+        value = fn(*args, **kwargs)
+        self.stages[stage] = round((time.perf_counter() - t0) * 1000, 3)
+        return value
+
+
+def _escenarios(df: pd.DataFrame) -> dict:
+    """Escenarios: estructura por defecto, jugadores fijos y cupos personalizados."""
+    fixed = df.groupby("specific_position")["name"].first().head(3).tolist()
+    return {
+        "default": {"num_players": 23, "specific_positions_config": None, "fixed_players": []},
+        "fixed_players": {"num_players": 23, "specific_positions_config": None, "fixed_players": fixed},
+        "custom_quotas": {"num_players": 19, "specific_positions_config": CUSTOM_QUOTAS, "fixed_players": []},
+    }
+
+
+def medir_pool(size: int, args) -> dict:
+    """Mide todas las etapas para un tamaño de pool."""
+    players = generar_jugadores(size, n_teams=args.teams, n_leagues=args.leagues, skew=args.skew, seed=args.seed)
+    if args.backend == "sqlite":
+        repo = SQLitePlayerRepository(":memory:")
+        repo.cargar(filas_jugadores(players))
+    else:
+        repo = Neo4jPlayerRepository(FakeDriver(players))
+    sm.obtener_repositorio = lambda: repo
+
+    shared = Cronometro()
+    raw = shared.medir("fetch", sm.obtener_jugadores, SYNTHETIC_NATIONALITY, False)
+    stats = shared.medir("stats", sm.obtener_estadisticas, SYNTHETIC_NATIONALITY)
+    df = shared.medir("normalize", sm.normalizar_jugadores, raw, stats)
+    df = shared.medir("score", sm.puntuar_jugadores, df)
+    chemistry = shared.medir("chemistry", SquadChemistry, df["team"].tolist(), df["league"].tolist())
+
+    runs = []
+    for scenario, params in _escenarios(df).items():
+        for style in sm.STYLES:
+            timer = Cronometro()
+            styled = df.assign(score_individual=df[f"score_{style}"])
+            squad, locked = timer.medir(
+                "greedy_fill", sm.convocatoria_inicial, styled, SYNTHETIC_NATIONALITY,
+                params["num_players"], params["specific_positions_config"], params["fixed_players"],
+            )
+            state = sm.construir_estado(styled, squad, locked, chemistry.fresh())
+            greedy_score = state.total()[0]
+            timer.medir("local_search", optimizar, state, args.optimizer, args.max_iterations, args.deadline_ms, args.seed)
+            runs.append({
+                "scenario": scenario,
+                "style": style,
+                "stages_ms": timer.stages,
+                "greedy_score": round(float(greedy_score), 6),
+                "total_score": round(float(state.total()[0]), 6),
+            })
+
+    # Extremo a extremo con la caché vacía (los tres estilos en serie)
+    end_to_end = {}
+    for scenario, params in _escenarios(df).items():
+        sm._player_cache.invalidate()
+        t0 = time.perf_counter()
+        result = sm.generar_convocatoria(
+            SYNTHETIC_NATIONALITY, optimizer=args.optimizer, max_iterations=args.max_iterations,
+            deadline_ms=args.deadline_ms, seed=args.seed, **params,
+        )
+        end_to_end[scenario] = {
+            "ms": round((time.perf_counter() - t0) * 1000, 3),
+            "style": result.get("style"),
+            "total_score": result.get("total_score"),
+        }
+
+    return {
+        "pool_size": size,
+        "pool_after_filter": len(df),
+        "shared_stages_ms": shared.stages,
+        "runs": runs,
+        "end_to_end": end_to_end,
+        "styles": medir_estilos(args),
+    }
+
+
+def medir_estilos(args, repeats: int = 3) -> dict:
+    """
+    Tres estilos con la tabla ya en caché: en serie frente al pool de procesos
+    (mejor de `repeats`, con el pool ya arrancado). Los resultados deben coincidir.
+    """
+    def mejor_tiempo(workers):
+        sm.SELECTOR_STYLE_WORKERS = workers
+        run = lambda: sm.generar_convocatoria(SYNTHETIC_NATIONALITY, optimizer=args.optimizer,
+                                              max_iterations=args.max_iterations, seed=args.seed)
+        result = run()  # calienta la caché y los procesos
+        times = []
+        for _ in range(repeats):
+            t0 = time.perf_counter()
+            run()
+            times.append((time.perf_counter() - t0) * 1000)
+        return round(min(times), 3), result["total_score"]
+
+    sequential_ms, sequential_score = mejor_tiempo(0)
+    pool_ms, pool_score = mejor_tiempo(args.style_workers)
+    return {
+        "cpus": os.cpu_count(),
+        "workers": args.style_workers,
+        "sequential_ms": sequential_ms,
+        "process_pool_ms": pool_ms,
+        "same_result": sequential_score == pool_score,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del seleccionador con pools sintéticos")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--teams", type=int, default=100, help="número de clubes")
+    parser.add_argument("--leagues", type=int, default=5, help="número de ligas")
+    parser.add_argument("--skew", type=float, default=1.0, help="exponente Zipf del tamaño de los clubes")
+    parser.add_argument("--backend", choices=["neo4j", "sqlite"], default="neo4j",
+                        help="repositorio de jugadores (Neo4j falso o SQLite embebido)")
+    parser.add_argument("--optimizer", default="first_improvement")
+    parser.add_argument("--max-iterations", type=int, default=300)
+    parser.add_argument("--deadline-ms", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--style-workers", type=int, default=3, help="procesos del apartado styles")
+    parser.add_argument("--output", default=None, help="fichero JSON de salida")
+    args = parser.parse_args()
+
+    # Sin almacén columnar: todas las lecturas pasan por el driver falso
+    sm.abrir_store = lambda *a, **k: None
+    sm._executor = ProcessPoolExecutor(max_workers=args.style_workers,
+                                       mp_context=multiprocessing.get_context("spawn"))
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "config": vars(args),
+        "pools": [],
+    }
+    for size in args.sizes:
+        print(f"⏱️ Pool de {size} jugadores...")
+        pool = medir_pool(size, args)
+        report["pools"].append(pool)
+        print(f"   etapas comunes: {pool['shared_stages_ms']}")
+        print(f"   extremo a extremo: {pool['end_to_end']}")
+        print(f"   estilos: {pool['styles']}")
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"selector_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"✅ Resultados guardados en {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/fake_llm_server.py
+"""
+Servidor HTTP local que imita el endpoint de chat de Groq (compatible con OpenAI).
+
+Sirve `POST /openai/v1/chat/completions` con un retardo configurable y una
+proporción de respuestas 500 y 429 para probar el cliente asíncrono
+(app/llm_module.py) sin red ni API key. La respuesta es siempre una consulta
+Cypher válida para el chat, con el LIMIT que pide el prompt.
+
+Uso (desde backend/):
+    python -m benchmarks.fake_llm_server --port 8089 --delay-ms 300 --fail-rate 0.1
+    GROQ_BASE_URL=http://127.0.0.1:8089 uvicorn app.main:app
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CYPHER = "MATCH (p:Player) RETURN p.name ORDER BY rand() LIMIT {limit}"
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, delay_ms: float = 200, fail_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, seed: int = 0):
+        super().__init__(address, _Handler)
+        self.delay_ms = delay_ms
+        self.fail_rate = fail_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def _limite(request: dict) -> int:
+    prompt = " ".join(m.get("content", "") for m in request.get("messages", []))
+    m = re.search(r"LIMIT (\d+)", prompt)
+    return int(m.group(1)) if m else 5
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def _responder(self, status: int, body: dict):
+        data = json.dumps(body).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # el cliente abandonó la petición (timeout)
+
+    def do_POST(self):
+        server = self.server
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        with server._lock:
+            server.requests += 1
+            roll = server.random.random()
+        time.sleep(server.delay_ms / 1000)
+        if roll < server.fail_rate + server.rate_limit_rate:
+            with server._lock:
+                server.failures += 1
+            status = 500 if roll < server.fail_rate else 429
+            self._responder(status, {"error": {"message": "fallo simulado", "type": "server_error"}})
+            return
+        self._responder(200, {
+            "id": f"fake-{server.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": CYPHER.format(limit=_limite(request))},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        })
+
+
+def iniciar_servidor(port: int = 0, **kwargs) -> FakeLLMServer:
+    """Arranca el servidor en un hilo (puerto libre si `port` es 0) y lo devuelve."""
+    server = FakeLLMServer(("127.0.0.1", port), **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor LLM falso compatible con Groq")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--delay-ms", type=float, default=200)
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="proporción de respuestas 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="proporción de respuestas 429")
+    args = parser.parse_args()
+
+    server = FakeLLMServer(("127.0.0.1", args.port), delay_ms=args.delay_ms,
+                           fail_rate=args.fail_rate, rate_limit_rate=args.rate_limit_rate)
+    print(f"🤖 LLM falso escuchando en {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# benchmarks/fake_neo4j.py
+"""
+Sustituto en memoria de Neo4j para medir el seleccionador sin base de datos.
+
+Genera jugadores sintéticos con el mismo esquema que `Player` y expone un
+driver/sesión mínimos compatibles con lo que usa `selector_module`
+(`driver.session()` como context manager y `session.run(q, nation=...)`).
+"""
+import re
+
+import numpy as np
+
+from app.importer_module import NUMERIC_FIELDS
+from app.selector_module import PLAYER_COLUMNS
+
+SYNTHETIC_NATIONALITY = "Sintética"
+
+SPECIFIC_POSITIONS = {
+    "POR": "Portero",
+    "DFC": "Defensa", "LD": "Defensa", "LI": "Defensa",
+    "MC": "Mediocentro", "MCD": "Mediocentro", "MCO": "Mediocentro",
+    "EI": "Delantero", "ED": "Delantero", "DC": "Delantero",
+}
+# Reparto aproximado del dataset real
+SPECIFIC_WEIGHTS = np.array([10.4, 12.4, 10.5, 13.1, 11.7, 10.2, 12.1, 7.0, 7.0, 5.6])
+
+INT_RANGES = {
+    "age": (17, 38), "height_cm": (165, 200), "weight_kg": (60, 95), "stamina": (50, 100),
+    "matches_played": (0, 38), "minutes_played": (0, 3420), "yellow_cards": (0, 12),
+    "red_cards": (0, 3), "goals": (0, 30), "assists": (0, 20),
+    "clean_sheets": (0, 20), "goals_conceded": (0, 60),
+}
+
+
+def generar_jugadores(n: int, n_teams: int = 100, n_leagues: int = 5, skew: float = 1.0,
+                      injured_pct: float = 0.05, seed: int = 0) -> dict:
+    """
+    Genera `n` jugadores sintéticos de una misma nacionalidad en forma columnar.
+    `skew` es el exponente de Zipf del tamaño de los clubes (0 = uniforme).
+    """
+    rng = np.random.default_rng(seed)
+    ranks = np.arange(1, n_teams + 1, dtype=np.float64)
+    team_p = ranks ** -skew
+    team_p /= team_p.sum()
+    team_idx = rng.choice(n_teams, size=n, p=team_p)
+    league_of_team = rng.integers(0, n_leagues, size=n_teams)
+
+    spec_names = list(SPECIFIC_POSITIONS)
+    spec_idx = rng.choice(len(spec_names), size=n, p=SPECIFIC_WEIGHTS / SPECIFIC_WEIGHTS.sum())
+
+    cols = {
+        "player_id": [str(i) for i in range(1, n + 1)],
+        "name": [f"Jugador {i}" for i in range(1, n + 1)],
+        "nationality": [SYNTHETIC_NATIONALITY] * n,
+        "team": [f"Club {t}" for t in team_idx],
+        "league": [f"Liga {league_of_team[t]}" for t in team_idx],
+        "specific_position": [spec_names[s] for s in spec_idx],
+        "injured": np.where(rng.random(n) < injured_pct, "Sí", "No").tolist(),
+    }
+    cols["position"] = [SPECIFIC_POSITIONS[s] for s in cols["specific_position"]]
+    for col in PLAYER_COLUMNS:
+        if col in cols:
+            continue
+        if col in INT_RANGES:
+            lo, hi = INT_RANGES[col]
+            cols[col] = rng.integers(lo, hi + 1, size=n).tolist()
+        elif col.endswith("_pct"):
+            cols[col] = np.round(rng.uniform(0, 100, size=n), 2).tolist()
+        else:
+            cols[col] = np.round(rng.uniform(0, 5, size=n), 2).tolist()
+    return cols
+
+
+def filas_jugadores(players: dict):
+    """Jugadores columnares como filas tipo dict (para cargar otros backends)."""
+    keys = list(players)
+    for values in zip(*(players[k] for k in keys)):
+        yield dict(zip(keys, values))
+
+
+class FakeRecord:
+    def __init__(self, keys, values):
+        self._keys = keys
+        self._values = values
+
+    def data(self):
+        return dict(zip(self._keys, self._values))
+
+    def __getitem__(self, key):
+        return self._values[self._keys.index(key)]
+
+
+class FakeResult:
+    def __init__(self, records):
+        self._records = records
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def data(self):
+        return [r.data() for r in self._records]
+
+
+class FakeSession:
+    def __init__(self, players: dict):
+        self.players = players
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def close(self):
+        pass
+
+    def _estadisticas(self, nation):
+        """Mínimo/máximo por columna numérica, como los nodos PlayerStats de la importación."""
+        values = {}
+        mask = np.array(self.players["nationality"]) == nation
+        if not mask.any():
+            return []
+        for col in NUMERIC_FIELDS:
+            column = np.asarray(self.players[col], dtype=np.float64)[mask]
+            values[f"min_{col}"] = float(column.min())
+            values[f"max_{col}"] = float(column.max())
+        return [FakeRecord(["scope", "values"], [nation, {**values, "scope": nation}])]
+
+    def run(self, query, parameters=None, **kwargs):
+        """
+        Responde a la consulta del seleccionador (solo las columnas proyectadas),
+        a la exportación de todos los jugadores (sin $nation) y a la de estadísticas.
+        """
+        params = dict(parameters or {}, **kwargs)
+        if "PlayerStats" in query:
+            return FakeResult(self._estadisticas(params.get("nationality")))
+        if ":Meta" in query:
+            return FakeResult([])  # sin generación compartida: los datos no cambian
+        nation = params.get("nation")
+        skip_injured = 'p.injured = "No"' in query
+        keys = re.findall(r"AS (\w+)", query)
+        columns = [self.players[k] for k in keys]
+        nationality = self.players["nationality"]
+        injured = self.players["injured"]
+        return FakeResult([
+            FakeRecord(keys, [c[i] for c in columns])
+            for i in range(len(nationality))
+            if (nation is None or nationality[i] == nation) and not (skip_injured and injured[i] != "No")
+        ])
+
+
+class FakeDriver:
+    def __init__(self, players: dict):
+        self.players = players
+
+    def session(self, **kwargs):
+        return FakeSession(self.players)
+
+    def close(self):
+        pass
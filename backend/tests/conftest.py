@@ -0,0 +1,60 @@
+# tests/conftest.py
+"""
+Pruebas del backend sin Neo4j ni red: SQLite embebido, el Neo4j falso y el
+servidor LLM falso de benchmarks/.
+
+Uso (desde backend/):
+    python -m pytest -q
+"""
+import csv
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_neo4j import filas_jugadores, generar_jugadores  # noqa: E402
+
+
+@pytest.fixture
+def jugadores():
+    """Pool sintético pequeño (columnar) de una única nacionalidad."""
+    return generar_jugadores(300, n_teams=12, n_leagues=3, seed=7)
+
+
+@pytest.fixture
+def repo_sqlite(jugadores):
+    from app.repository_module import SQLitePlayerRepository
+
+    repo = SQLitePlayerRepository(":memory:")
+    repo.cargar(filas_jugadores(jugadores))
+    return repo
+
+
+@pytest.fixture
+def escribir_csv(tmp_path):
+    """Escribe filas de jugadores en un CSV como el de datasets/ y devuelve su ruta."""
+    from app.importer_module import PLAYER_FIELDS
+
+    def escribir(rows, name="jugadores.csv"):
+        path = tmp_path / name
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=PLAYER_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(rows)
+        return str(path)
+
+    return escribir
+
+
+@pytest.fixture
+def selector(repo_sqlite, monkeypatch):
+    """selector_module leyendo del repositorio SQLite de prueba, sin almacén columnar y con la caché vacía."""
+    from app import selector_module as sm
+
+    monkeypatch.setattr(sm, "abrir_store", lambda *a, **k: None)
+    monkeypatch.setattr(sm, "obtener_repositorio", lambda: repo_sqlite)
+    sm._player_cache.invalidate()
+    yield sm
+    sm._player_cache.invalidate()
@@ -0,0 +1,44 @@
+# tests/test_batch.py
+import pytest
+
+from app import batch_module
+from app.batch_module import claves_lote, generar_lote
+from benchmarks.fake_neo4j import SYNTHETIC_NATIONALITY
+
+PETICIONES = [
+    {"nationality": SYNTHETIC_NATIONALITY, "style": "ofensivo", "max_iterations": 30, "seed": 1},
+    {"nationality": SYNTHETIC_NATIONALITY, "num_players": 18, "max_iterations": 30, "seed": 2},
+    {"nationality": SYNTHETIC_NATIONALITY, "injured_allowed": True, "optimizer": "tabu",
+     "max_iterations": 20, "seed": 3},
+    {"nationality": SYNTHETIC_NATIONALITY, "optimizer": "no_existe"},
+    {"nationality": "Nadie"},
+]
+
+
+def convocados(result) -> list:
+    return [p["name"] for p in result.get("players", [])] if "players" in result else result
+
+
+@pytest.fixture
+def pool_lote():
+    yield
+    if batch_module._executor is not None:
+        batch_module._executor.shutdown()
+        batch_module._executor = None
+
+
+def test_claves_lote():
+    assert claves_lote(PETICIONES) == [(SYNTHETIC_NATIONALITY, False), (SYNTHETIC_NATIONALITY, True), ("Nadie", False)]
+
+
+@pytest.mark.parametrize("max_workers", [0, 2])
+def test_el_lote_da_lo_mismo_que_cada_convocatoria(selector, pool_lote, max_workers):
+    expected = [selector.generar_convocatoria(**params) for params in PETICIONES]
+    items = sorted(generar_lote(PETICIONES, max_workers=max_workers), key=lambda item: item["index"])
+
+    assert [item["index"] for item in items] == list(range(len(PETICIONES)))
+    assert all("error" not in item for item in items)
+    for item, single in zip(items, expected):
+        assert convocados(item["result"]) == convocados(single)
+        assert item["result"].get("total_score") == single.get("total_score")
+    assert (batch_module._executor is not None) == (max_workers > 1)
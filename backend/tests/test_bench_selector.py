@@ -0,0 +1,81 @@
+# tests/test_bench_selector.py
+import argparse
+import json
+import sys
+
+import pytest
+
+from app import selector_module as sm
+from app.repository_module import Neo4jPlayerRepository
+from benchmarks import bench_selector
+from benchmarks.fake_neo4j import SPECIFIC_POSITIONS, SYNTHETIC_NATIONALITY, FakeDriver, generar_jugadores
+
+
+def argumentos(**kwargs):
+    defaults = {"teams": 12, "leagues": 3, "skew": 1.0, "backend": "neo4j", "optimizer": "first_improvement",
+                "max_iterations": 20, "deadline_ms": None, "seed": 0, "style_workers": 1}
+    return argparse.Namespace(**{**defaults, **kwargs})
+
+
+@pytest.fixture
+def aislado(monkeypatch):
+    """El benchmark cambia atributos de selector_module: se restauran al terminar."""
+    for attr in ("obtener_repositorio", "abrir_store", "SELECTOR_STYLE_WORKERS", "_executor"):
+        monkeypatch.setattr(sm, attr, getattr(sm, attr))
+    monkeypatch.setattr(sm, "abrir_store", lambda *a, **k: None)
+    sm._player_cache.invalidate()
+    yield
+    if sm._executor is not None:
+        sm._executor.shutdown()
+    sm._player_cache.invalidate()
+
+
+def test_jugadores_sinteticos():
+    players = generar_jugadores(500, n_teams=20, n_leagues=4, skew=1.2, seed=3)
+    assert generar_jugadores(500, n_teams=20, n_leagues=4, skew=1.2, seed=3) == players
+    assert all(len(values) == 500 for values in players.values())
+    assert set(players) >= set(sm.PLAYER_COLUMNS)
+    assert set(players["nationality"]) == {SYNTHETIC_NATIONALITY}
+    assert all(SPECIFIC_POSITIONS[s] == p for s, p in zip(players["specific_position"], players["position"]))
+    # Cada club está en una sola liga y con Zipf el primero es el más grande
+    assert len(set(zip(players["team"], players["league"]))) == len(set(players["team"]))
+    sizes = {team: players["team"].count(team) for team in set(players["team"])}
+    assert max(sizes, key=sizes.get) == "Club 0"
+
+
+def test_el_driver_falso_responde_como_el_repositorio(jugadores, repo_sqlite):
+    fake = Neo4jPlayerRepository(FakeDriver(jugadores))
+    for injured_allowed in (False, True):
+        expected = repo_sqlite.jugadores(SYNTHETIC_NATIONALITY, injured_allowed, sm.SELECTOR_COLUMNS)
+        got = fake.jugadores(SYNTHETIC_NATIONALITY, injured_allowed, sm.SELECTOR_COLUMNS)
+        assert sorted(got["player_id"]) == sorted(expected["player_id"])
+        assert list(got.columns) == sm.SELECTOR_COLUMNS
+    assert len(fake.jugadores("Nadie", True, sm.SELECTOR_COLUMNS)) == 0
+    assert fake.estadisticas(SYNTHETIC_NATIONALITY) == repo_sqlite.estadisticas(SYNTHETIC_NATIONALITY)
+
+
+def test_medir_pool_con_los_dos_backends(aislado):
+    reports = {backend: bench_selector.medir_pool(300, argumentos(backend=backend)) for backend in ("neo4j", "sqlite")}
+    for report in reports.values():
+        assert report["pool_size"] == 300 and 0 < report["pool_after_filter"] <= 300
+        assert set(report["shared_stages_ms"]) == {"fetch", "stats", "normalize", "score", "chemistry"}
+        assert len(report["runs"]) == 3 * len(sm.STYLES)
+        for run in report["runs"]:
+            assert set(run["stages_ms"]) == {"greedy_fill", "local_search"}
+            assert run["total_score"] >= run["greedy_score"] - 1e-9
+        assert set(report["end_to_end"]) == {"default", "fixed_players", "custom_quotas"}
+        assert report["styles"]["same_result"]
+    # Mismos datos y misma semilla: el backend no cambia las convocatorias
+    assert ({k: v["total_score"] for k, v in reports["neo4j"]["end_to_end"].items()}
+            == {k: v["total_score"] for k, v in reports["sqlite"]["end_to_end"].items()})
+
+
+def test_main_escribe_el_informe(aislado, tmp_path, monkeypatch):
+    output = tmp_path / "informe.json"
+    monkeypatch.setattr(sys, "argv", ["bench_selector", "--sizes", "200", "--teams", "10", "--max-iterations", "10",
+                                      "--style-workers", "1", "--output", str(output)])
+    bench_selector.main()
+    report = json.loads(output.read_text(encoding="utf-8"))
+    assert report["config"]["sizes"] == [200]
+    assert [pool["pool_size"] for pool in report["pools"]] == [200]
+    assert {"timestamp", "git_commit", "python", "numpy", "pandas"} <= set(report)
@@ -0,0 +1,112 @@
+# tests/test_bulk_import.py
+import csv
+import os
+
+import pytest
+
+from app.bulk_import_module import FILES, comando_importacion, generar_ficheros
+from app.graph_module import construir_grafo
+from app.importer_module import FLOAT_FIELDS, INTEGER_FIELDS, PLAYER_FIELDS, importar_jugadores, leer_jugadores_csv
+from benchmarks.fake_neo4j import filas_jugadores
+from test_importer import GrafoFalso
+
+# Tipos de cabecera de neo4j-admin y cómo se leen (las cadenas vacías se ignoran al importar)
+TIPOS = {"long": int, "double": float, "boolean": lambda v: v == "true"}
+NODOS = {"players": "Player", "teams": "Team", "leagues": "League", "countries": "Country"}
+RELACIONES = {"plays_for": ("Player", "Team"), "part_of": ("Team", "League"),
+              "represents": ("Player", "Country"), "teammate_of": ("Player", "Player")}
+
+
+def leer_fichero(out_dir: str, key: str):
+    """(cabecera, filas) de un fichero de importación."""
+    with open(os.path.join(out_dir, FILES[key]), newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    return rows[0], rows[1:]
+
+
+def leer_nodos(out_dir: str, key: str) -> dict:
+    """Nodos de un fichero por su :ID, con las propiedades ya tipadas según la cabecera."""
+    header, rows = leer_fichero(out_dir, key)
+    ids = [i for i, h in enumerate(header) if ":ID(" in h]
+    assert len(ids) == 1
+    nodes = {}
+    for row in rows:
+        props = {}
+        for h, value in zip(header, row):
+            name, _, kind = h.partition(":")
+            props[name] = None if value == "" else TIPOS.get(kind, str)(value)
+        assert row[ids[0]] not in nodes  # ID únicos dentro de su espacio
+        nodes[row[ids[0]]] = props
+    return nodes
+
+
+@pytest.fixture
+def csv_sintetico(jugadores, escribir_csv):
+    filas = list(filas_jugadores(jugadores))
+    # Sin liga ni nacionalidad no hay estructura (como en create-graph)
+    filas[0] = {**filas[0], "league": ""}
+    filas[1] = {**filas[1], "nationality": ""}
+    return escribir_csv(filas)
+
+
+def test_cabeceras_y_espacios_de_ids(csv_sintetico, tmp_path):
+    out = str(tmp_path / "bulk")
+    counts = generar_ficheros(leer_jugadores_csv(csv_sintetico), out)
+
+    header, _ = leer_fichero(out, "players")
+    assert header[0] == "player_id:ID(Player)"
+    assert header[-2:] == ["content_hash", "graph_dirty:boolean"]
+    for h in header[1:-2]:
+        name, _, kind = h.partition(":")
+        assert kind == ("long" if name in INTEGER_FIELDS else "double" if name in FLOAT_FIELDS else "")
+    assert [h.partition(":")[0] for h in header[:-2]] == PLAYER_FIELDS
+
+    nodes = {label: leer_nodos(out, key) for key, label in NODOS.items()}
+    for key, label in NODOS.items():
+        assert len(nodes[label]) == counts[key]
+        if key != "players":
+            assert leer_fichero(out, key)[0] == [f"name:ID({label})"]
+    for key, (start, end) in RELACIONES.items():
+        header, rows = leer_fichero(out, key)
+        assert header == [f":START_ID({start})", f":END_ID({end})"]
+        assert len(rows) == counts[key]
+        # Toda relación apunta a nodos de su espacio de ids
+        assert all(a in nodes[start] and b in nodes[end] for a, b in rows)
+
+    command = comando_importacion(out).split()
+    path = lambda key: os.path.join(os.path.abspath(out), FILES[key])
+    for key, label in NODOS.items():
+        assert f"--nodes={label}={path(key)}" in command
+    for key in RELACIONES:
+        assert f"--relationships={key.upper()}={path(key)}" in command
+
+
+def test_mismo_grafo_que_create_graph(csv_sintetico, tmp_path):
+    out = str(tmp_path / "bulk")
+    generar_ficheros(leer_jugadores_csv(csv_sintetico), out)
+
+    graph = GrafoFalso()
+    importar_jugadores(graph, csv_sintetico, chunk_size=100)
+    construir_grafo(graph)
+
+    # Jugadores con las mismas propiedades tipadas y ya enlazados (graph_dirty = false)
+    players = leer_nodos(out, "players")
+    assert players.keys() == graph.players.keys()
+    for player_id, props in players.items():
+        assert props == graph.players[player_id]
+
+    _, plays_for = leer_fichero(out, "plays_for")
+    assert dict(plays_for) == graph.plays_for
+    _, teammates = leer_fichero(out, "teammate_of")
+    assert len(teammates) == len(graph.teammates)
+    assert set(map(tuple, teammates)) == graph.teammates
+
+    linked = [p for i, p in graph.players.items() if i in graph.plays_for]
+    assert len(linked) == len(graph.players) - 2
+    _, represents = leer_fichero(out, "represents")
+    assert dict(represents) == {p["player_id"]: p["nationality"] for p in linked}
+    _, part_of = leer_fichero(out, "part_of")
+    assert set(map(tuple, part_of)) == {(p["team"], p["league"]) for p in linked}
+    assert set(leer_nodos(out, "teams")) == {p["team"] for p in linked}
+    assert set(leer_nodos(out, "leagues")) == {p["league"] for p in linked}
+    assert set(leer_nodos(out, "countries")) == {p["nationality"] for p in linked}
@@ -0,0 +1,96 @@
+# tests/test_cache.py
+import json
+import time
+
+from app.cache_module import LRUCache, TTLCache, bump_generation
+
+
+def test_ttl_cache_vuelca_cada_flush_interval_y_no_en_cada_put(tmp_path):
+    path = tmp_path / "cache.json"
+    cache = TTLCache("t", path=str(path), fingerprint="modelo-a", flush_interval=3600)
+    cache.put("¿quién?", "MATCH (p) RETURN p", cost_ms=120)
+    cache.put("¿cuántos?", "MATCH (p) RETURN count(p)")
+    assert not path.exists()
+    assert cache.stats()["pending_flush"]
+
+    assert cache.flush()
+    assert not cache.flush()  # sin cambios no se vuelve a escribir
+    assert cache.stats()["flushes"] == 1
+    assert [e[0] for e in json.loads(path.read_text(encoding="utf-8"))["entries"]] == ["¿quién?", "¿cuántos?"]
+
+    # Volver a guardar el mismo valor no deja cambios pendientes
+    cache.put("¿quién?", "MATCH (p) RETURN p")
+    assert not cache.stats()["pending_flush"]
+
+    eager = TTLCache("t", path=str(tmp_path / "eager.json"), flush_interval=0)
+    eager.put("a", "b")
+    assert (tmp_path / "eager.json").exists()
+
+
+def test_ttl_cache_se_recarga_del_fichero(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = TTLCache("t", path=path, fingerprint="modelo-a")
+    cache.put("pregunta", "MATCH (n) RETURN n", cost_ms=50)
+    cache.flush()
+
+    reloaded = TTLCache("t", path=path, fingerprint="modelo-a")
+    assert reloaded.get("pregunta") == "MATCH (n) RETURN n"
+    assert reloaded.stats()["saved_ms"] == 50
+    # Otro modelo o prompt: el fichero se descarta entero
+    assert TTLCache("t", path=path, fingerprint="modelo-b").get("pregunta") is None
+
+
+def test_ttl_cache_caduca_y_expulsa(tmp_path):
+    cache = TTLCache("t", max_entries=2, ttl=0.05)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("c", 3)
+    assert cache.get("a") is None and cache.stats()["evictions"] == 1
+    time.sleep(0.06)
+    assert cache.get("b") is None and cache.stats()["expirations"] == 1
+
+
+def test_ttl_cache_lee_mientras_se_escribe_el_fichero(tmp_path):
+    cache = TTLCache("t", path=str(tmp_path / "cache.json"), flush_interval=3600)
+    cache.put("a", 1)
+    # Un volcado en curso solo tiene el lock de escritura: las lecturas no esperan
+    with cache._write_lock:
+        assert cache.get("a") == 1
+    assert cache.flush()
+
+
+def test_lru_cache_caduca_al_cambiar_la_generacion():
+    cache = LRUCache("t", max_entries=4)
+    cache.put("a", [1])
+    assert cache.get("a") == [1]
+    bump_generation()
+    assert cache.get("a") is None
+    # Un valor calculado con la generación anterior no vale para la nueva
+    stale = cache.generation("a")
+    bump_generation()
+    cache.put("a", [2], stale)
+    assert cache.get("a") is None
+
+
+def test_lru_cache_por_ambito_conserva_los_demas():
+    cache = LRUCache("t", max_entries=4, scope=lambda key: key[0])
+    cache.put(("España", 23), "es")
+    cache.put(("Francia", 23), "fr")
+    bump_generation(scopes=["España"])
+    assert cache.get(("España", 23)) is None
+    assert cache.get(("Francia", 23)) == "fr"
+    bump_generation()
+    assert cache.get(("Francia", 23)) is None
+
+
+def test_lru_cache_acotada_en_bytes_y_en_tiempo():
+    cache = LRUCache("t", max_entries=10, max_bytes=100, max_entry_bytes=60, ttl=0.05)
+    assert not cache.put("grande", "x", size=61)
+    cache.put("a", 1, size=50)
+    cache.put("b", 2, size=40)
+    cache.put("c", 3, size=30)  # 120 bytes: sale la menos usada
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 70
+    assert (cache.stats()["rejected"], cache.stats()["evictions"]) == (1, 1)
+    time.sleep(0.06)
+    assert cache.get("b") is None and cache.stats()["expirations"] == 1
@@ -0,0 +1,75 @@
+# tests/test_chemistry.py
+import itertools
+
+import numpy as np
+import pytest
+
+from app.chemistry_module import CHEM_SAME_LEAGUE, CHEM_SAME_TEAM, SquadChemistry, quimica_media
+
+
+def suma_por_parejas(teams, leagues, squad) -> float:
+    """Química de la convocatoria recorriendo todas las parejas (la definición)."""
+    total = 0.0
+    for i, j in itertools.combinations(squad, 2):
+        if teams[i] == teams[j]:
+            total += CHEM_SAME_TEAM
+        elif leagues[i] == leagues[j]:
+            total += CHEM_SAME_LEAGUE
+    return total
+
+
+@pytest.fixture
+def pool():
+    rng = np.random.default_rng(3)
+    n = 60
+    # Clubes repartidos entre ligas, y un club con jugadores en dos ligas
+    teams = [f"Club {t}" for t in rng.integers(0, 8, size=n)]
+    leagues = [f"Liga {int(t.split()[1]) % 3}" for t in teams]
+    leagues[:5] = ["Liga 9"] * 5
+    teams[:5] = ["Club 0"] * 5
+    return teams, leagues
+
+
+def test_suma_acumulada_coincide_con_las_parejas(pool):
+    teams, leagues = pool
+    chem = SquadChemistry(teams, leagues)
+    squad = list(range(0, 60, 3))
+    for i in squad:
+        chem.add(i)
+    assert chem.chem_sum == pytest.approx(suma_por_parejas(teams, leagues, squad))
+    k = len(squad)
+    assert chem.mean() == pytest.approx(suma_por_parejas(teams, leagues, squad) / (k * (k - 1) / 2))
+    assert quimica_media([teams[i] for i in squad], [leagues[i] for i in squad]) == pytest.approx(chem.mean())
+
+
+def test_swap_delta_coincide_con_recalcular(pool):
+    teams, leagues = pool
+    chem = SquadChemistry(teams, leagues)
+    squad = [0, 1, 7, 12, 20, 33, 41, 55]
+    for i in squad:
+        chem.add(i)
+    base = suma_por_parejas(teams, leagues, squad)
+    outside = np.array([i for i in range(len(teams)) if i not in squad])
+
+    for out_i in squad:
+        deltas = chem.swap_delta(out_i, outside)
+        for in_i, delta in zip(outside, deltas):
+            swapped = [i for i in squad if i != out_i] + [int(in_i)]
+            assert base + delta == pytest.approx(suma_por_parejas(teams, leagues, swapped))
+        # La versión escalar da lo mismo que la vectorizada
+        assert chem.swap_delta(out_i, int(outside[0])) == pytest.approx(deltas[0])
+
+
+def test_add_remove_deltas_y_restaurar(pool):
+    teams, leagues = pool
+    chem = SquadChemistry(teams, leagues)
+    for i in (2, 4, 6):
+        chem.add(i)
+    before = chem.chem_sum
+    delta = chem.add_delta(8)
+    chem.add(8)
+    assert chem.chem_sum == pytest.approx(before + delta)
+    assert chem.remove_delta(8) == pytest.approx(-delta)
+    chem.remove(8)
+    assert chem.chem_sum == pytest.approx(before)
+    assert chem.fresh().chem_sum == 0.0 and chem.fresh().size == 0
@@ -0,0 +1,108 @@
+# tests/test_exact.py
+import itertools
+
+import numpy as np
+import pytest
+
+pytest.importorskip("scipy")
+
+from app import selector_module as sm  # noqa: E402
+from app.chemistry_module import quimica_media  # noqa: E402
+from app.exact_module import cupos_por_posicion, resolver_exacto  # noqa: E402
+from benchmarks.fake_neo4j import SYNTHETIC_NATIONALITY  # noqa: E402
+
+ALPHA, BETA = 0.7, 0.3
+
+
+@pytest.fixture
+def pool():
+    """Pool de 12 jugadores: 3 porteros, 5 defensas y 4 delanteros en 3 clubes de 2 ligas."""
+    rng = np.random.default_rng(5)
+    spec = ["POR"] * 3 + ["DFC"] * 3 + ["LD"] * 2 + ["DC"] * 4
+    gen = np.array([0] * 3 + [1] * 5 + [3] * 4)
+    teams = [f"Club {i % 3}" for i in range(12)]
+    leagues = ["Liga A" if t != "Club 2" else "Liga B" for t in teams]
+    return rng.random(12), spec, gen, teams, leagues
+
+
+def objetivo(scores, teams, leagues, squad):
+    squad = list(squad)
+    return ALPHA * scores[squad].mean() + BETA * quimica_media([teams[i] for i in squad], [leagues[i] for i in squad])
+
+
+def fuerza_bruta(scores, teams, leagues, quotas, fixed, k):
+    """Mejor convocatoria enumerando todas las combinaciones que cumplen las plazas."""
+    best = None
+    for squad in itertools.combinations(range(len(scores)), k):
+        chosen = set(squad)
+        if not set(fixed) <= chosen:
+            continue
+        if any(not lo <= len(chosen & set(members.tolist())) <= hi for members, lo, hi in quotas):
+            continue
+        value = objetivo(scores, teams, leagues, squad)
+        if best is None or value > best[0]:
+            best = (value, squad)
+    return best
+
+
+@pytest.mark.parametrize("config, fixed", [
+    ({"POR": 1, "DFC": 2, "DC": 1}, ()),           # plazas mínimas (suman k)
+    ({"POR": 1, "DFC": 1, "LD": 1, "DC": 3}, ()),  # plazas máximas (suman más de k)
+    ({"POR": 1, "DFC": 2, "DC": 1}, (10,)),        # con un fijo
+])
+def test_optimo_coincide_con_fuerza_bruta(pool, config, fixed):
+    scores, spec, gen, teams, leagues = pool
+    k = 5
+    general_of = {"POR": 0, "DFC": 1, "LD": 1, "DC": 3}
+    quotas = cupos_por_posicion(spec, gen, config, general_of, k, fixed)
+    report = resolver_exacto(scores, teams, leagues, quotas, fixed, k, ALPHA, BETA, time_limit_s=10)
+
+    expected, _ = fuerza_bruta(scores, teams, leagues, quotas, fixed, k)
+    assert report["optimal"]
+    assert report["objective"] == pytest.approx(expected)
+    assert objetivo(scores, teams, leagues, report["squad"]) == pytest.approx(expected)
+    assert report["gap"] == pytest.approx(0.0, abs=1e-6)
+    assert set(fixed) <= set(report["squad"].tolist())
+
+
+def test_cupos_minimos_maximos_y_posicion_general(pool):
+    _, spec, gen, _, _ = pool
+    general_of = {"POR": 0, "DFC": 1, "LD": 1, "DC": 3}
+
+    # Suman k o menos: mínimos, sin máximo
+    quotas = cupos_por_posicion(spec, gen, {"POR": 1, "DC": 2}, general_of, k=5)
+    assert [(m.tolist(), lo) for m, lo, _ in quotas] == [([0, 1, 2], 1), ([8, 9, 10, 11], 2)]
+    assert all(hi == len(spec) for _, _, hi in quotas)
+
+    # Suman más de k: máximos, y el resto de posiciones no se convoca
+    quotas = cupos_por_posicion(spec, gen, {"POR": 1, "DC": 4, "DFC": 1}, general_of, k=5)
+    assert [(m.tolist(), hi) for m, _, hi in quotas] == [([0, 1, 2], 1), ([8, 9, 10, 11], 4), ([3, 4, 5], 1), ([6, 7], 0)]
+    assert all(lo == 0 for _, lo, _ in quotas)
+
+    # Sin candidatos suficientes (4 DFC de 3): la defensa completa cubre las plazas
+    quotas = cupos_por_posicion(spec, gen, {"DFC": 4}, general_of, k=5)
+    assert [(m.tolist(), lo) for m, lo, _ in quotas] == [([3, 4, 5, 6, 7], 4), ([3, 4, 5], 3)]
+
+
+def test_modo_exacto_mejora_o_iguala_la_heuristica(repo_sqlite, monkeypatch):
+    monkeypatch.setattr(sm, "abrir_store", lambda *a, **k: None)
+    raw = repo_sqlite.jugadores(SYNTHETIC_NATIONALITY, False, sm.SELECTOR_COLUMNS)
+    df, chemistry = sm._preparar_tabla(raw, repo_sqlite.estadisticas(SYNTHETIC_NATIONALITY))
+    df = df.assign(score_individual=df["score_ofensivo"])
+    squad, locked = sm.convocatoria_inicial(df, SYNTHETIC_NATIONALITY, 23, None, [])
+    state = sm.construir_estado(df, squad, locked, chemistry.fresh())
+    heuristic = state.total()[0]
+
+    report = sm._resolver_exacto(df, state, None, time_limit_s=20)
+
+    assert report["objective"] >= round(heuristic, 6) - 1e-6
+    assert state.total()[0] == pytest.approx(report["objective"], abs=1e-6)
+    if report["optimal"]:
+        assert report["gap"] == pytest.approx(0.0, abs=1e-4)
+    # La estructura por defecto suma más de 23 plazas: son máximos, como en la voraz
+    counts = df["specific_position"].iloc[state.squad].value_counts()
+    assert set(counts.index) <= set(sm.DEFAULT_POSITIONS_CONFIG)
+    for pos, quota in sm.DEFAULT_POSITIONS_CONFIG.items():
+        if (df["specific_position"] == pos).sum() >= quota:
+            assert counts.get(pos, 0) <= quota
+    assert len(set(state.squad.tolist())) == 23
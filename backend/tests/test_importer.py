@@ -0,0 +1,400 @@
+# tests/test_importer.py
+import asyncio
+
+import pytest
+
+from app import importer_module
+from app.importer_module import (
+    ALL_NATIONALITIES, ALL_PLAYER_IDS, BUMP_DATA_GENERATION, DELETE_PLAYERS, DELETE_STATS, GLOBAL_STATS,
+    MAX_RETRIES, NATIONALITY_STATS, NUMERIC_FIELDS, PLAYER_FIELDS, SAVE_STATS, UPSERT_PLAYERS,
+    ProgresoImportacion, convertir_fila, errores_transitorios, huella_fila, importar_jugadores,
+    importar_por_bloques, importar_por_bloques_async,
+)
+from app.graph_module import LINK_STRUCTURE, LINK_TEAMMATES, MARK_ALL_DIRTY, PENDING_PLAYERS, construir_grafo
+from app.repository_module import Neo4jPlayerRepository
+from benchmarks.fake_neo4j import filas_jugadores
+
+
+class Registro(dict):
+    def data(self):
+        return dict(self)
+
+
+class Resultado:
+    def __init__(self, records=()):
+        self.records = list(records)
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def data(self):
+        return self.records
+
+    def single(self):
+        return Registro(self.records[0]) if self.records else None
+
+    def consume(self):
+        return None
+
+
+def min_max(scope: str, players) -> dict:
+    """Como NATIONALITY_STATS: mínimo y máximo de cada campo numérico ignorando los nulos."""
+    stats = {"scope": scope}
+    for f in NUMERIC_FIELDS:
+        values = [p[f] for p in players if p[f] is not None]
+        stats[f"min_{f}"], stats[f"max_{f}"] = (min(values), max(values)) if values else (None, None)
+    return stats
+
+
+class GrafoFalso:
+    """
+    Lo justo de Neo4j para el importador y la construcción del grafo: UPSERT_PLAYERS
+    con el mismo criterio de huella y de `graph_dirty` que la consulta, borrado,
+    listado de ids, generación de datos, los nodos PlayerStats y los enlaces de
+    graph_module (`relinked` guarda, por fase, los jugadores recalculados).
+    """
+
+    def __init__(self):
+        self.players = {}
+        self.generation = 0
+        self.upserted = 0
+        self.plays_for = {}
+        self.teammates = set()
+        self.relinked = {LINK_STRUCTURE: [], LINK_TEAMMATES: []}
+        self.stats = {}
+
+    def session(self, **kwargs):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute_write(self, work, rows):
+        return work(self, rows)
+
+    def run(self, query, **params):
+        if query == UPSERT_PLAYERS:
+            changed = []
+            for row in params["rows"]:
+                old = self.players.get(row["player_id"])
+                if old is None or old["content_hash"] != row["content_hash"]:
+                    changed.append({"inserted": old is None, "nationality": row["nationality"],
+                                    "previous_nationality": old and old["nationality"]})
+                    old = old or {}
+                    moved = any(old.get(f) != row[f] for f in ("team", "league", "nationality"))
+                    dirty = old.get("graph_dirty")
+                    self.players[row["player_id"]] = {**row, "graph_dirty": (dirty is None or dirty) or moved}
+            self.upserted += len(changed)
+            return Resultado(changed)
+        if query == BUMP_DATA_GENERATION:
+            self.generation += 1
+            return Resultado()
+        if query == DELETE_PLAYERS:
+            for player_id in params["ids"]:
+                del self.players[player_id]
+            return Resultado()
+        if query == ALL_NATIONALITIES:
+            return Resultado({"nationality": n} for n in {p["nationality"] for p in self.players.values()} - {None})
+        if query == NATIONALITY_STATS:
+            return Resultado(min_max(n, [p for p in self.players.values() if p["nationality"] == n])
+                             for n in params["nationalities"]
+                             if any(p["nationality"] == n for p in self.players.values()))
+        if query == SAVE_STATS:
+            self.stats.update({s["scope"]: dict(s) for s in params["stats"]})
+            return Resultado()
+        if query == DELETE_STATS:
+            for scope in params["scopes"]:
+                self.stats.pop(scope, None)
+            return Resultado()
+        if query == GLOBAL_STATS:
+            scopes = [v for k, v in self.stats.items() if k != params["global_scope"]]
+            overall = {}
+            for f in NUMERIC_FIELDS:
+                lows = [v[f"min_{f}"] for v in scopes if v.get(f"min_{f}") is not None]
+                highs = [v[f"max_{f}"] for v in scopes if v.get(f"max_{f}") is not None]
+                overall[f"min_{f}"], overall[f"max_{f}"] = min(lows, default=None), max(highs, default=None)
+            return Resultado([overall])
+        if query == Neo4jPlayerRepository.STATS_QUERY:
+            return Resultado({"scope": k, "values": v} for k, v in self.stats.items()
+                             if k in (params["nationality"], params["global_scope"]))
+        if query == PENDING_PLAYERS:
+            return Resultado({"player_id": i} for i, p in self.players.items() if p.get("graph_dirty") is not False)
+        if query == MARK_ALL_DIRTY:
+            for p in self.players.values():
+                p["graph_dirty"] = True
+            return Resultado()
+        if query == LINK_STRUCTURE:
+            self.relinked[query] += params["ids"]
+            for player_id in params["ids"]:
+                self.plays_for.pop(player_id, None)
+                self.teammates = {pair for pair in self.teammates if player_id not in pair}
+                p = self.players[player_id]
+                if all(p[f] is not None for f in ("team", "league", "nationality")):
+                    self.plays_for[player_id] = p["team"]
+            return Resultado()
+        if query == LINK_TEAMMATES:
+            self.relinked[query] += params["ids"]
+            for player_id in params["ids"]:
+                self.players[player_id]["graph_dirty"] = False
+                team = self.plays_for.get(player_id)
+                for other, other_team in self.plays_for.items():
+                    if other != player_id and team is not None and other_team == team:
+                        self.teammates |= {(player_id, other), (other, player_id)}
+            return Resultado()
+        if query == ALL_PLAYER_IDS:
+            return Resultado({"player_id": p["player_id"], "nationality": p["nationality"]}
+                             for p in self.players.values())
+        raise AssertionError(f"Consulta inesperada: {query}")
+
+
+class GrafoInestable(GrafoFalso):
+    """GrafoFalso cuyas `fallos` primeras transacciones fallan con un error transitorio."""
+
+    def __init__(self, fallos: int = 0):
+        super().__init__()
+        self.fallos = fallos
+        self.transactions = 0
+
+    def execute_write(self, work, rows):
+        self.transactions += 1
+        if self.fallos:
+            self.fallos -= 1
+            raise errores_transitorios()[0]("Neo4j ocupado")
+        return super().execute_write(work, rows)
+
+
+class ResultadoAsync:
+    def __init__(self, result):
+        self.result = result
+
+    async def data(self):
+        return self.result.data()
+
+    async def consume(self):
+        return self.result.consume()
+
+
+class GrafoAsync:
+    """El mismo grafo falso con la interfaz del driver asíncrono."""
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def session(self, **kwargs):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute_write(self, work, rows):
+        self.graph.execute_write(lambda tx, r: None, rows)  # cuenta (y falla) como la versión síncrona
+        return await work(self, rows)
+
+    async def run(self, query, **params):
+        return ResultadoAsync(self.graph.run(query, **params))
+
+
+@pytest.fixture
+def filas(jugadores):
+    return list(filas_jugadores(jugadores))
+
+
+def test_la_huella_es_estable_y_cambia_con_el_contenido(filas):
+    row = convertir_fila({f: str(filas[0][f]) for f in PLAYER_FIELDS})
+    # Leer la misma fila otra vez da la misma huella; la huella no se incluye a sí misma
+    assert convertir_fila({f: str(filas[0][f]) for f in PLAYER_FIELDS})["content_hash"] == row["content_hash"]
+    assert huella_fila(row) == row["content_hash"]
+    for field in ("name", "goals", "pass_accuracy_pct", "injured"):
+        changed = {**row, field: "otro" if field in ("name", "injured") else (row[field] or 0) + 1}
+        assert huella_fila(changed) != row["content_hash"]
+
+
+def test_reimportar_sin_cambios_no_escribe(filas, escribir_csv):
+    graph, path = GrafoFalso(), escribir_csv(filas)
+    first = importar_jugadores(graph, path, chunk_size=64)
+    assert (first["inserted"], first["updated"], first["unchanged"]) == (300, 0, 0)
+    assert graph.generation == first["chunks"] == 5
+
+    second = importar_jugadores(graph, path, chunk_size=64)
+    assert (second["inserted"], second["updated"], second["unchanged"]) == (0, 0, 300)
+    assert second["nationalities"] == []
+    # Sin filas cambiadas no se invalida nada
+    assert graph.generation == 5 and graph.upserted == 300
+
+
+def test_solo_se_escriben_las_filas_cambiadas(filas, escribir_csv):
+    graph = GrafoFalso()
+    importar_jugadores(graph, escribir_csv(filas), chunk_size=100)
+
+    filas[3] = {**filas[3], "goals": filas[3]["goals"] + 1}
+    filas[7] = {**filas[7], "nationality": "Otra"}
+    summary = importar_jugadores(graph, escribir_csv(filas), chunk_size=100)
+    assert (summary["inserted"], summary["updated"], summary["unchanged"]) == (0, 2, 298)
+    # Cambian la nacionalidad nueva y la anterior del jugador que se ha movido
+    assert summary["nationalities"] == sorted({"Otra", filas[3]["nationality"]})
+    assert graph.players[filas[3]["player_id"]]["goals"] == filas[3]["goals"]
+
+
+def test_delete_missing_borra_los_ausentes(filas, escribir_csv):
+    graph = GrafoFalso()
+    importar_jugadores(graph, escribir_csv(filas), chunk_size=100)
+    partial = escribir_csv(filas[:250], "parcial.csv")
+
+    assert importar_jugadores(graph, partial, chunk_size=100)["removed"] == 0
+    assert len(graph.players) == 300
+
+    generation = graph.generation
+    summary = importar_jugadores(graph, partial, chunk_size=100, delete_missing=True)
+    assert summary["removed"] == 50
+    assert set(graph.players) == {r["player_id"] for r in filas[:250]}
+    assert graph.generation == generation + 1
+
+
+def test_sin_delete_missing_no_se_guardan_los_ids(filas):
+    rows = [convertir_fila({f: str(r[f]) for f in PLAYER_FIELDS}) for r in filas[:10]]
+    progress = ProgresoImportacion()
+    progress.bloque(rows, [])
+    assert progress.seen_ids is None
+
+    progress = ProgresoImportacion(delete_missing=True)
+    progress.bloque(rows, [])
+    assert progress.seen_ids == {r["player_id"] for r in rows}
+    existing = [{"player_id": "fuera", "nationality": "X"}] + [{"player_id": r["player_id"], "nationality": None} for r in rows]
+    assert progress.ausentes(existing) == ["fuera"]
+    assert progress.info(done=True)["nationalities"] == ["X"]
+
+
+def sin_tiempos(info: dict) -> dict:
+    return {k: v for k, v in info.items() if k not in ("elapsed_s", "rows_per_s")}
+
+
+def test_progreso_por_bloques(filas, escribir_csv):
+    graph, path = GrafoFalso(), escribir_csv(filas)
+    progress = list(importar_por_bloques(graph, path, chunk_size=128))
+    assert [(p["chunk"], p["imported"], p["inserted"]) for p in progress[:-1]] == [(1, 128, 128), (2, 256, 256), (3, 300, 300)]
+    assert all(p["rows_per_s"] is None or p["rows_per_s"] > 0 for p in progress)
+    assert progress[-1]["done"] and progress[-1]["nationalities"] == sorted({r["nationality"] for r in filas})
+    assert "done" not in progress[0]
+
+    again = [sin_tiempos(p) for p in importar_por_bloques(graph, path, chunk_size=128)]
+    assert [p["unchanged"] for p in again] == [128, 256, 300, 300]
+    assert again[-1]["nationalities"] == []
+
+
+def test_el_progreso_async_es_el_mismo(filas, escribir_csv):
+    path = escribir_csv(filas)
+
+    async def run(graph):
+        return [p async for p in importar_por_bloques_async(graph, path, chunk_size=128, delete_missing=True)]
+
+    graph = GrafoFalso()
+    expected = [sin_tiempos(p) for p in importar_por_bloques(graph, path, chunk_size=128, delete_missing=True)]
+    async_graph = GrafoFalso()
+    assert [sin_tiempos(p) for p in asyncio.run(run(GrafoAsync(async_graph)))] == expected
+    assert async_graph.players == graph.players
+
+
+def test_los_errores_transitorios_se_reintentan_con_espera(filas, escribir_csv, monkeypatch):
+    waits = []
+    monkeypatch.setattr(importer_module.time, "sleep", waits.append)
+    graph = GrafoInestable(fallos=3)
+    summary = importar_jugadores(graph, escribir_csv(filas), chunk_size=100)
+    # El primer bloque falla tres veces con espera exponencial y luego todo sigue igual
+    assert waits == [2, 4, 8]
+    assert graph.transactions == 3 + 3
+    assert (summary["inserted"], summary["chunks"]) == (300, 3)
+    assert len(graph.players) == 300
+
+
+def test_se_rinde_tras_max_retries(filas, escribir_csv, monkeypatch):
+    waits = []
+    monkeypatch.setattr(importer_module.time, "sleep", waits.append)
+    graph = GrafoInestable(fallos=MAX_RETRIES)
+    progress = importar_por_bloques(graph, escribir_csv(filas), chunk_size=100)
+    with pytest.raises(errores_transitorios()):
+        next(progress)
+    assert graph.transactions == MAX_RETRIES
+    assert len(waits) == MAX_RETRIES - 1
+    assert graph.players == {}
+
+
+def test_los_demas_errores_no_se_reintentan(filas, escribir_csv, monkeypatch):
+    monkeypatch.setattr(importer_module.time, "sleep", lambda s: pytest.fail("no debe esperar"))
+    graph = GrafoFalso()
+
+    def roto(work, rows):
+        raise ValueError("fila inválida")
+
+    monkeypatch.setattr(graph, "execute_write", roto)
+    with pytest.raises(ValueError):
+        importar_jugadores(graph, escribir_csv(filas), chunk_size=100)
+
+
+def test_reintentos_async(filas, escribir_csv, monkeypatch):
+    waits = []
+
+    async def sleep(seconds):
+        waits.append(seconds)
+
+    monkeypatch.setattr(importer_module.asyncio, "sleep", sleep)
+    graph = GrafoInestable(fallos=2)
+
+    async def run():
+        return [p async for p in importar_por_bloques_async(GrafoAsync(graph), escribir_csv(filas), chunk_size=100)]
+
+    assert asyncio.run(run())[-1]["inserted"] == 300
+    assert waits == [2, 4]
+
+
+def companeros(graph) -> set:
+    """TEAMMATE_OF que debería haber según el equipo actual de cada jugador."""
+    return {(a, b) for a, p in graph.players.items() for b, o in graph.players.items()
+            if a != b and p["team"] == o["team"]}
+
+
+def test_el_grafo_solo_recalcula_los_jugadores_marcados(filas, escribir_csv):
+    graph = GrafoFalso()
+    importar_jugadores(graph, escribir_csv(filas), chunk_size=100)
+    summary = construir_grafo(graph, batch_size=64)
+    assert (summary["players_updated"], summary["batches"]) == (300, 5)
+    assert not any(p["graph_dirty"] for p in graph.players.values())
+    assert graph.teammates == companeros(graph)
+
+    # Un cambio de estadísticas no toca el grafo; un cambio de equipo solo a ese jugador
+    other_team = next(r["team"] for r in filas if r["team"] != filas[7]["team"])
+    filas[3] = {**filas[3], "goals": filas[3]["goals"] + 1}
+    filas[7] = {**filas[7], "team": other_team}
+    importar_jugadores(graph, escribir_csv(filas), chunk_size=100)
+    assert [i for i, p in graph.players.items() if p["graph_dirty"]] == [filas[7]["player_id"]]
+
+    graph.relinked = {LINK_STRUCTURE: [], LINK_TEAMMATES: []}
+    generation = graph.generation
+    summary = construir_grafo(graph, batch_size=64)
+    assert (summary["players_updated"], summary["batches"]) == (1, 1)
+    assert graph.relinked == {LINK_STRUCTURE: [filas[7]["player_id"]], LINK_TEAMMATES: [filas[7]["player_id"]]}
+    assert graph.generation == generation + 2
+    assert not any(p["graph_dirty"] for p in graph.players.values())
+    # Sale de su antiguo equipo y entra en el nuevo en ambos sentidos
+    assert graph.teammates == companeros(graph)
+
+    # Sin nada marcado no se hace nada; con full se recalcula todo
+    assert construir_grafo(graph)["players_updated"] == 0
+    summary = construir_grafo(graph, batch_size=64, full=True)
+    assert summary["players_updated"] == 300
+    assert not any(p["graph_dirty"] for p in graph.players.values())
+    assert graph.teammates == companeros(graph)
+
+
+def test_los_jugadores_sin_marca_se_tratan_como_pendientes(filas, escribir_csv):
+    graph = GrafoFalso()
+    importar_jugadores(graph, escribir_csv(filas[:20]), chunk_size=100)
+    for p in graph.players.values():
+        del p["graph_dirty"]  # grafo creado antes de existir la marca
+    assert construir_grafo(graph)["players_updated"] == 20
+    assert all(p["graph_dirty"] is False for p in graph.players.values())
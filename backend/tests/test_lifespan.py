@@ -0,0 +1,35 @@
+# tests/test_lifespan.py
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app import main
+
+
+def test_el_ciclo_de_vida_prepara_neo4j_y_cierra_los_drivers(monkeypatch):
+    calls = []
+
+    async def preparar_neo4j():
+        calls.append("preparar")
+        try:
+            await asyncio.sleep(3600)  # Neo4j todavía no responde
+        except asyncio.CancelledError:
+            calls.append("cancelada")
+            raise
+
+    async def cerrar_drivers():
+        calls.append("cerrar")
+
+    monkeypatch.setattr(main, "_preparar_neo4j", preparar_neo4j)
+    monkeypatch.setattr(main, "cerrar_drivers", cerrar_drivers)
+    monkeypatch.setattr(main.webbrowser, "open_new_tab", lambda url: calls.append(url))
+
+    with TestClient(main.app) as client:
+        # El servidor responde sin esperar a Neo4j
+        assert client.get("/health/ready").status_code in (200, 503)
+        assert len(main._tareas_arranque) == 1
+        assert calls == ["http://localhost:8000/health", "preparar"]
+
+    assert calls[2:] == ["cancelada", "cerrar"]
+    assert not main._tareas_arranque
+    assert not main.app.router.on_startup and not main.app.router.on_shutdown
@@ -0,0 +1,112 @@
+# tests/test_llm.py
+import asyncio
+
+import pytest
+
+pytest.importorskip("groq")
+
+from app.llm_module import ClienteLLM, errores_transitorios  # noqa: E402
+from benchmarks.fake_llm_server import iniciar_servidor  # noqa: E402
+
+
+@pytest.fixture
+def arrancar():
+    """Arranca servidores LLM falsos (delay_ms, fail_rate...) y los para al terminar el test."""
+    servers = []
+
+    def start(**kwargs):
+        servers.append(iniciar_servidor(**kwargs))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def cliente(server, **kwargs) -> ClienteLLM:
+    return ClienteLLM(base_url=server.url, **{"timeout": 5, "backoff": 0.01, **kwargs})
+
+
+def test_peticiones_identicas_comparten_una_llamada(arrancar):
+    servidor = arrancar(delay_ms=100)
+
+    async def run():
+        llm = cliente(servidor)
+        answers = await asyncio.gather(*(llm.completar("Cypher para LIMIT 7") for _ in range(40)))
+        return llm, answers
+
+    llm, answers = asyncio.run(run())
+    assert servidor.requests == 1
+    assert (llm.stats()["calls"], llm.stats()["coalesced"]) == (1, 39)
+    assert set(answers) == {"MATCH (p:Player) RETURN p.name ORDER BY rand() LIMIT 7"}
+    assert llm.stats()["in_flight"] == 0
+
+
+def test_cancelar_una_espera_no_cancela_la_llamada_compartida(arrancar):
+    servidor = arrancar(delay_ms=100)
+
+    async def run():
+        llm = cliente(servidor)
+        first = asyncio.ensure_future(llm.completar("LIMIT 3"))
+        second = asyncio.ensure_future(llm.completar("LIMIT 3"))
+        await asyncio.sleep(0.02)
+        first.cancel()
+        return llm, await second
+
+    llm, answer = asyncio.run(run())
+    assert answer.endswith("LIMIT 3")
+    assert llm.stats()["calls"] == 1
+
+
+def test_la_concurrencia_esta_acotada(arrancar):
+    servidor = arrancar(delay_ms=50)
+
+    async def run():
+        llm = cliente(servidor, max_concurrency=2)
+        await asyncio.gather(*(llm.completar(f"LIMIT {i}") for i in range(6)))
+        return llm.stats()
+
+    stats = asyncio.run(run())
+    assert stats["calls"] == servidor.requests == 6
+    assert stats["max_queue_depth"] == 4
+    assert stats["running"] == 0
+
+
+def test_los_errores_transitorios_se_reintentan(arrancar):
+    servidor = arrancar(delay_ms=5, fail_rate=0.3, rate_limit_rate=0.2, seed=3)
+
+    async def run():
+        llm = cliente(servidor, max_retries=20)
+        answers = await asyncio.gather(*(llm.completar(f"LIMIT {i}") for i in range(10)))
+        return llm.stats(), answers
+
+    stats, answers = asyncio.run(run())
+    assert answers == [f"MATCH (p:Player) RETURN p.name ORDER BY rand() LIMIT {i}" for i in range(10)]
+    assert servidor.failures > 0
+    assert stats["retries"] == servidor.failures
+    assert stats["calls"] == servidor.requests == 10 + servidor.failures
+    assert stats["errors"] == 0
+
+
+def test_se_rinde_tras_max_retries(arrancar):
+    servidor = arrancar(delay_ms=5, fail_rate=1.0)
+    llm = cliente(servidor, max_retries=2)
+    with pytest.raises(errores_transitorios()):
+        asyncio.run(llm.completar("LIMIT 1"))
+    assert servidor.requests == llm.stats()["calls"] == 3
+    assert (llm.stats()["retries"], llm.stats()["errors"]) == (2, 1)
+
+
+def test_timeout_por_intento(arrancar):
+    servidor = arrancar(delay_ms=500)
+    llm = cliente(servidor, timeout=0.05, max_retries=1)
+    with pytest.raises(errores_transitorios()):
+        asyncio.run(llm.completar("LIMIT 1"))
+    assert llm.stats()["calls"] == 2
+    assert llm.stats()["errors"] == 1
+
+
+def test_sin_configurar():
+    with pytest.raises(RuntimeError):
+        asyncio.run(ClienteLLM(api_key=None, base_url=None).completar("hola"))
@@ -0,0 +1,83 @@
+# tests/test_normalization.py
+import pandas as pd
+import pytest
+
+from app import selector_module as sm
+from app.importer_module import GLOBAL_STATS_SCOPE, actualizar_estadisticas, importar_jugadores
+from app.player_store import abrir_store, escribir_store
+from app.repository_module import Neo4jPlayerRepository
+from benchmarks.fake_neo4j import SYNTHETIC_NATIONALITY, filas_jugadores
+from test_importer import GrafoFalso, min_max
+
+SCORES = [f"score_{style}" for style in sm.STYLES]
+
+
+def pool(repo, nationality=SYNTHETIC_NATIONALITY) -> pd.DataFrame:
+    # Con lesionados: las estadísticas guardadas son las de toda la nacionalidad
+    return repo.jugadores(nationality, True, sm.SELECTOR_COLUMNS)
+
+
+def assert_misma_normalizacion(raw: pd.DataFrame, stats: dict):
+    assert stats is not None
+    stored = sm.preparar_jugadores(raw.copy(), stats)
+    on_the_fly = sm.preparar_jugadores(raw.copy())
+    for col in sm.STAT_COLUMNS + SCORES:
+        assert stored[col].tolist() == pytest.approx(on_the_fly[col].tolist(), abs=1e-12), col
+
+
+@pytest.fixture
+def grafo(jugadores, escribir_csv):
+    graph = GrafoFalso()
+    importar_jugadores(graph, escribir_csv(list(filas_jugadores(jugadores))), chunk_size=100)
+    actualizar_estadisticas(graph)
+    return graph
+
+
+def test_playerstats_de_la_importacion(grafo, repo_sqlite):
+    assert set(grafo.stats) == {SYNTHETIC_NATIONALITY, GLOBAL_STATS_SCOPE}
+    stats = Neo4jPlayerRepository(driver=grafo).estadisticas(SYNTHETIC_NATIONALITY)
+    assert_misma_normalizacion(pool(repo_sqlite), stats)
+
+
+def test_estadisticas_del_sqlite_y_del_almacen(repo_sqlite, tmp_path):
+    assert_misma_normalizacion(pool(repo_sqlite), repo_sqlite.estadisticas(SYNTHETIC_NATIONALITY))
+    escribir_store(repo_sqlite.exportar(), str(tmp_path))
+    store = abrir_store(str(tmp_path))
+    raw = store.tabla(SYNTHETIC_NATIONALITY, True, sm.SELECTOR_COLUMNS)
+    assert_misma_normalizacion(raw, store.estadisticas(SYNTHETIC_NATIONALITY))
+    assert store.estadisticas(SYNTHETIC_NATIONALITY) == repo_sqlite.estadisticas(SYNTHETIC_NATIONALITY)
+
+
+def test_el_seleccionador_usa_las_estadisticas_guardadas(selector, repo_sqlite, monkeypatch):
+    leidas = []
+    estadisticas = repo_sqlite.estadisticas
+    monkeypatch.setattr(repo_sqlite, "estadisticas", lambda n: leidas.append(n) or estadisticas(n))
+    df, _ = selector.obtener_tabla(SYNTHETIC_NATIONALITY, True)
+    assert leidas == [SYNTHETIC_NATIONALITY]
+    on_the_fly = sm.preparar_jugadores(pool(repo_sqlite))
+    for col in SCORES:
+        assert df[col].tolist() == pytest.approx(on_the_fly[col].tolist(), abs=1e-12)
+
+
+def test_la_importacion_incremental_solo_recalcula_lo_que_cambia(grafo, jugadores, escribir_csv):
+    filas = list(filas_jugadores(jugadores))
+    filas[3] = {**filas[3], "goals": 999}                # nuevo máximo de su nacionalidad
+    filas[7] = {**filas[7], "nationality": "Otra"}       # nacionalidad nueva
+    summary = importar_jugadores(grafo, escribir_csv(filas), chunk_size=100)
+    assert summary["nationalities"] == sorted({"Otra", SYNTHETIC_NATIONALITY})
+    actualizar_estadisticas(grafo, summary["nationalities"])
+
+    players = list(grafo.players.values())
+    for nationality in summary["nationalities"]:
+        expected = min_max(nationality, [p for p in players if p["nationality"] == nationality])
+        assert grafo.stats[nationality] == {k: v for k, v in expected.items() if v is not None}
+    assert grafo.stats[SYNTHETIC_NATIONALITY]["max_goals"] == 999
+    assert grafo.stats[GLOBAL_STATS_SCOPE]["max_goals"] == 999
+
+    # Si una nacionalidad se queda sin jugadores se borran sus estadísticas y se usan las globales
+    filas[7] = {**filas[7], "nationality": SYNTHETIC_NATIONALITY}
+    summary = importar_jugadores(grafo, escribir_csv(filas), chunk_size=100)
+    actualizar_estadisticas(grafo, summary["nationalities"])
+    assert "Otra" not in grafo.stats
+    repo = Neo4jPlayerRepository(driver=grafo)
+    assert repo.estadisticas("Otra") == repo.estadisticas("Nadie") is not None
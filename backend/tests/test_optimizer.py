@@ -0,0 +1,78 @@
+# tests/test_optimizer.py
+import threading
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from app import selector_module as sm
+from app.optimizer_module import OPTIMIZERS, optimizar
+from benchmarks.fake_neo4j import SYNTHETIC_NATIONALITY
+
+
+@pytest.fixture
+def tabla(repo_sqlite, monkeypatch):
+    """Tabla preparada (scores de los tres estilos) y química del pool sintético."""
+    monkeypatch.setattr(sm, "abrir_store", lambda *a, **k: None)
+    raw = repo_sqlite.jugadores(SYNTHETIC_NATIONALITY, False, sm.SELECTOR_COLUMNS)
+    df, chemistry = sm._preparar_tabla(raw, repo_sqlite.estadisticas(SYNTHETIC_NATIONALITY))
+    return df.assign(score_individual=df["score_ofensivo"]), chemistry
+
+
+def estado(df, chemistry, fixed=()):
+    squad, locked = sm.convocatoria_inicial(df, SYNTHETIC_NATIONALITY, 23, None, list(fixed))
+    return sm.construir_estado(df, squad, locked, chemistry.fresh())
+
+
+def test_sumas_incrementales_coinciden_con_recalcular(tabla):
+    df, chemistry = tabla
+    state = estado(df, chemistry)
+    optimizar(state, "simulated_annealing", max_iterations=20, seed=1)
+    recomputed = sm.construir_estado(df, state.squad, [], chemistry.fresh())
+    assert state.score_sum == pytest.approx(recomputed.score_sum)
+    assert state.chemistry.chem_sum == pytest.approx(recomputed.chemistry.chem_sum)
+    assert state.total()[0] == pytest.approx(recomputed.total()[0])
+
+
+@pytest.mark.parametrize("optimizer", sorted(OPTIMIZERS))
+def test_los_fijos_no_salen_y_se_respetan_las_posiciones(tabla, optimizer):
+    df, chemistry = tabla
+    # Los peores de cada posición, para que cualquier optimizador quiera cambiarlos
+    fixed = df.sort_values("score_individual").groupby("specific_position")["name"].first().head(3).tolist()
+    state = estado(df, chemistry, fixed)
+    locked = set(np.flatnonzero(state.locked).tolist())
+    assert len(locked) == 3
+    initial_total = state.total()[0]
+    initial_positions = Counter(df["specific_position"].iloc[state.squad])
+
+    optimizar(state, optimizer, max_iterations=30, seed=0)
+
+    assert locked <= set(state.squad.tolist())
+    assert len(set(state.squad.tolist())) == state.size == 23
+    assert Counter(df["specific_position"].iloc[state.squad]) == initial_positions
+    assert state.total()[0] >= initial_total - 1e-9
+
+
+def test_cancelar_devuelve_la_convocatoria_actual(tabla):
+    df, chemistry = tabla
+    state = estado(df, chemistry)
+    initial = state.snapshot()
+    cancel = threading.Event()
+    cancel.set()
+    optimizar(state, "best_improvement", cancel=cancel)
+    assert np.array_equal(state.squad, initial)
+
+
+def test_progreso_solo_notifica_mejoras(tabla):
+    df, chemistry = tabla
+    state = estado(df, chemistry)
+    totals = []
+    optimizar(state, "tabu", max_iterations=30, progress=lambda st, total, *_: totals.append(total))
+    assert totals == sorted(totals)
+    assert state.on_improvement is None
+
+
+def test_optimizador_desconocido(tabla):
+    df, chemistry = tabla
+    with pytest.raises(ValueError):
+        optimizar(estado(df, chemistry), "no_existe")
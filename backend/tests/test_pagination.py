@@ -0,0 +1,66 @@
+# tests/test_pagination.py
+import pytest
+
+from app.player_store import abrir_store, escribir_store
+from benchmarks.fake_neo4j import SYNTHETIC_NATIONALITY
+
+FIELDS = ["name", "team", "specific_position", "injured"]
+
+
+@pytest.fixture(params=["sqlite", "store"])
+def paginar(request, repo_sqlite, tmp_path):
+    """`pagina(after, limit, filters)` del repositorio SQLite o del almacén columnar escrito desde él."""
+    if request.param == "sqlite":
+        return lambda after, limit, filters=None: repo_sqlite.pagina(
+            SYNTHETIC_NATIONALITY, FIELDS, after, limit, filters)
+    escribir_store(repo_sqlite.exportar(), str(tmp_path))
+    store = abrir_store(str(tmp_path))
+    return lambda after, limit, filters=None: store.pagina(
+        SYNTHETIC_NATIONALITY, ["player_id"] + FIELDS, after, limit, filters).to_dict(orient="records")
+
+
+def recorrer(paginar, limit, filters=None) -> list:
+    """Todas las páginas siguiendo el cursor, como hace un cliente del listado."""
+    players, after = [], None
+    while True:
+        page = paginar(after, limit, filters)
+        assert len(page) <= limit
+        players += page
+        if len(page) < limit:
+            return players
+        after = page[-1]["player_id"]
+
+
+@pytest.mark.parametrize("limit", [1, 7, 100, 1000])
+def test_las_paginas_concatenadas_son_el_listado_completo(paginar, jugadores, limit):
+    players = recorrer(paginar, limit)
+    ids = [p["player_id"] for p in players]
+    assert ids == sorted(jugadores["player_id"])
+    assert all(set(p) == {"player_id", *FIELDS} for p in players)
+
+
+def test_el_cursor_empieza_despues_de_after(paginar, jugadores):
+    ids = sorted(jugadores["player_id"])
+    page = paginar(ids[41], 5)
+    assert [p["player_id"] for p in page] == ids[42:47]
+    assert paginar(ids[-1], 5) == []
+
+
+@pytest.mark.parametrize("filters", [
+    {"specific_position": "DC"},
+    {"injured": True},
+    {"injured": False, "team": "Club 0"},
+])
+def test_filtros(paginar, jugadores, filters):
+    def cumple(i):
+        for field, value in filters.items():
+            if field == "injured":
+                if (jugadores["injured"][i] != "No") != value:
+                    return False
+            elif jugadores[field][i] != value:
+                return False
+        return True
+
+    expected = sorted(jugadores["player_id"][i] for i in range(len(jugadores["player_id"])) if cumple(i))
+    assert expected
+    assert [p["player_id"] for p in recorrer(paginar, 10, filters)] == expected
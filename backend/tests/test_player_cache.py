@@ -0,0 +1,90 @@
+# tests/test_player_cache.py
+import asyncio
+
+import pytest
+
+from app.cache_module import bump_generation
+from benchmarks.fake_neo4j import SYNTHETIC_NATIONALITY
+
+
+@pytest.fixture
+def lecturas(selector, repo_sqlite, monkeypatch):
+    """Nacionalidades leídas del repositorio (cada lectura es un fallo de la caché)."""
+    reads = []
+    jugadores = repo_sqlite.jugadores
+    monkeypatch.setattr(repo_sqlite, "jugadores", lambda n, *args: reads.append(n) or jugadores(n, *args))
+    return reads
+
+
+def aciertos_y_fallos(selector) -> tuple:
+    stats = selector.player_cache_stats()
+    return stats["hits"], stats["misses"]
+
+
+def test_la_tabla_preparada_se_sirve_de_la_cache(selector, lecturas):
+    hits, misses = aciertos_y_fallos(selector)
+    first = selector.obtener_tabla(SYNTHETIC_NATIONALITY, True)
+    second = selector.obtener_tabla(SYNTHETIC_NATIONALITY, True)
+    assert second[0] is first[0] and second[1] is first[1]
+    assert lecturas == [SYNTHETIC_NATIONALITY]
+    # Con y sin lesionados son entradas distintas
+    selector.obtener_tabla(SYNTHETIC_NATIONALITY, False)
+    assert len(lecturas) == 2
+    assert aciertos_y_fallos(selector) == (hits + 1, misses + 2)
+    assert selector.player_cache_stats()["entries"] == 2
+
+
+def test_la_version_async_comparte_la_cache(selector, lecturas):
+    df, _ = asyncio.run(selector.obtener_tabla_async(SYNTHETIC_NATIONALITY, True))
+    assert selector.obtener_tabla(SYNTHETIC_NATIONALITY, True)[0] is df
+    assert lecturas == [SYNTHETIC_NATIONALITY]
+
+
+def test_se_invalida_solo_con_cambios_de_su_nacionalidad(selector, lecturas):
+    selector.obtener_tabla(SYNTHETIC_NATIONALITY, True)
+    bump_generation(scopes=["Otra"])
+    selector.obtener_tabla(SYNTHETIC_NATIONALITY, True)
+    assert len(lecturas) == 1
+
+    bump_generation(scopes=[SYNTHETIC_NATIONALITY])
+    selector.obtener_tabla(SYNTHETIC_NATIONALITY, True)
+    assert len(lecturas) == 2
+
+    bump_generation()  # create-graph o importación completa
+    selector.obtener_tabla(SYNTHETIC_NATIONALITY, True)
+    assert len(lecturas) == 3
+
+
+def test_no_se_guarda_una_tabla_leida_durante_una_importacion(selector, repo_sqlite, monkeypatch):
+    reads = []
+    jugadores = repo_sqlite.jugadores
+
+    def leer_mientras_se_importa(n, *args):
+        reads.append(n)
+        bump_generation(scopes=[n])
+        return jugadores(n, *args)
+
+    monkeypatch.setattr(repo_sqlite, "jugadores", leer_mientras_se_importa)
+    selector.obtener_tabla(SYNTHETIC_NATIONALITY, True)
+    selector.obtener_tabla(SYNTHETIC_NATIONALITY, True)
+    assert len(reads) == 2
+
+
+def test_las_nacionalidades_sin_jugadores_no_se_cachean(selector, lecturas):
+    for _ in range(2):
+        df, chemistry = selector.obtener_tabla("Nadie", True)
+        assert df.empty and chemistry is None
+    assert lecturas == ["Nadie", "Nadie"]
+    assert selector.player_cache_stats()["entries"] == 0
+
+
+def test_endpoint_de_estadisticas(selector, lecturas):
+    from fastapi.testclient import TestClient
+
+    from app.main import API_KEY, app
+
+    selector.obtener_tabla(SYNTHETIC_NATIONALITY, True)
+    selector.obtener_tabla(SYNTHETIC_NATIONALITY, True)
+    stats = TestClient(app).get("/api/admin/cache", headers={"X-API-Key": API_KEY}).json()["jugadores"]
+    assert stats == selector.player_cache_stats()
+    assert (stats["name"], stats["entries"]) == ("jugadores", 1)
@@ -0,0 +1,58 @@
+# tests/test_player_store.py
+import pytest
+
+from app import main, player_store, repository_module
+from app.player_store import abrir_store
+from benchmarks.fake_neo4j import SYNTHETIC_NATIONALITY, filas_jugadores
+
+
+@pytest.fixture
+def store_dir(repo_sqlite, tmp_path, monkeypatch):
+    """Repositorio activo = SQLite de prueba y almacén columnar en un directorio temporal."""
+    monkeypatch.setattr(repository_module, "_repository", repo_sqlite)
+    monkeypatch.setattr(player_store, "STORE_DIR", str(tmp_path / "store"))
+    return str(tmp_path / "store")
+
+
+def test_tras_una_importacion_parcial_el_almacen_tiene_todos_los_jugadores(store_dir, jugadores, escribir_csv):
+    rows = list(filas_jugadores(jugadores))
+    changed = [{**r, "goals": r["goals"] + 100} for r in rows[:10]]
+    added = [{**rows[0], "player_id": "nuevo", "name": "Jugador nuevo"}]
+
+    # Como al finalizar /api/admin/import/players con un fichero de 11 filas
+    main._actualizar_repositorio(escribir_csv(changed + added), False)
+    main._publicar_store()
+
+    table = abrir_store(store_dir).tabla(SYNTHETIC_NATIONALITY, True, ["player_id", "name", "goals"])
+    assert len(table) == len(rows) + 1
+    goals = dict(zip(table["player_id"], table["goals"]))
+    assert all(goals[r["player_id"]] == r["goals"] for r in changed + rows[10:])
+    assert "nuevo" in goals
+
+
+def test_el_almacen_coincide_con_el_repositorio(store_dir, repo_sqlite):
+    main._publicar_store()
+    store = abrir_store(store_dir)
+    columns = ["player_id", "team", "specific_position", "age", "pass_accuracy_pct"]
+
+    from_store = store.tabla(SYNTHETIC_NATIONALITY, False, columns).sort_values("player_id")
+    from_repo = repo_sqlite.jugadores(SYNTHETIC_NATIONALITY, False, columns).sort_values("player_id")
+    assert from_store["player_id"].tolist() == from_repo["player_id"].tolist()
+    assert from_store["team"].tolist() == from_repo["team"].tolist()
+    assert from_store["age"].tolist() == pytest.approx(from_repo["age"].tolist())
+    assert from_store["pass_accuracy_pct"].tolist() == pytest.approx(from_repo["pass_accuracy_pct"].tolist())
+    assert store.estadisticas(SYNTHETIC_NATIONALITY)["max"]["goals"] == \
+        repo_sqlite.estadisticas(SYNTHETIC_NATIONALITY)["max"]["goals"]
+
+
+def test_la_version_de_la_nacionalidad_solo_cambia_con_sus_jugadores(store_dir, jugadores, escribir_csv):
+    main._publicar_store()
+    before = abrir_store(store_dir).version(SYNTHETIC_NATIONALITY)
+
+    main._publicar_store()
+    assert abrir_store(store_dir).version(SYNTHETIC_NATIONALITY) == before
+
+    row = next(filas_jugadores(jugadores))
+    main._actualizar_repositorio(escribir_csv([{**row, "stamina": row["stamina"] + 1}]), False)
+    main._publicar_store()
+    assert abrir_store(store_dir).version(SYNTHETIC_NATIONALITY) != before
@@ -0,0 +1,126 @@
+# tests/test_query_cache.py
+import pytest
+
+from app import query_cache_module as qc
+from app.cache_module import bump_generation
+from app.importer_module import DATA_GENERATION
+from benchmarks.fake_neo4j import FakeRecord, FakeResult
+
+PLAYERS = "MATCH (p:Player) WHERE p.nationality = $nation RETURN p.name AS name"
+SAMPLE = PLAYERS + " ORDER BY rand() LIMIT $n"
+# Resultado completo de SAMPLE para muestrearlo, acotado a RESULT_CACHE_MAX_SAMPLE_ROWS + 1 filas
+FULL = PLAYERS + "\nLIMIT $cache_max_rows"
+
+
+class DriverContador:
+    """
+    Neo4j falso: 50 jugadores (o los de $cache_max_rows / $n), la generación
+    compartida en `generation` y las consultas ejecutadas.
+    """
+
+    def __init__(self):
+        self.generation = 1
+        self.queries = []
+        self.fail_generation = False
+
+    def session(self, **kwargs):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def run(self, query, parameters=None, **kwargs):
+        if query == DATA_GENERATION:
+            if self.fail_generation:
+                raise ConnectionError("Neo4j no disponible")
+            return FakeResult([FakeRecord(["generation"], [self.generation])])
+        self.queries.append(query)
+        params = dict(parameters or {}, **kwargs)
+        limit = min(params.get("cache_max_rows", 50), params.get("n", 50), 50)
+        return FakeResult([FakeRecord(["name"], [f"Jugador {i}"]) for i in range(limit)])
+
+
+@pytest.fixture
+def driver(monkeypatch):
+    monkeypatch.setattr(qc, "RESULT_CACHE_GENERATION_CHECK_S", 0)
+    monkeypatch.setattr(qc, "_compartida", {"generation": None, "checked_at": None})
+    monkeypatch.setattr(qc, "_sin_cache", {})
+    qc._resultados.invalidate()
+    return DriverContador()
+
+
+def test_la_segunda_lectura_sale_de_la_cache(driver):
+    first = qc.leer(PLAYERS, {"nation": "España"}, driver)
+    assert qc.leer(PLAYERS, {"nation": "España"}, driver) == first
+    assert len(driver.queries) == 1
+    qc.leer(PLAYERS, {"nation": "Francia"}, driver)
+    assert len(driver.queries) == 2
+
+
+def test_invalida_con_la_generacion_del_proceso(driver):
+    qc.leer(PLAYERS, {"nation": "España"}, driver)
+    bump_generation()
+    qc.leer(PLAYERS, {"nation": "España"}, driver)
+    assert len(driver.queries) == 2
+
+
+def test_invalida_cuando_otro_worker_escribe(driver, monkeypatch):
+    qc.leer(PLAYERS, {"nation": "España"}, driver)
+    driver.generation += 1  # importación hecha por otro proceso
+    qc.leer(PLAYERS, {"nation": "España"}, driver)
+    assert len(driver.queries) == 2
+    assert qc.resultados_cache_stats()["shared_generation"] == driver.generation
+
+    # Entre comprobaciones se sirve lo cacheado sin preguntar a Neo4j
+    monkeypatch.setattr(qc, "RESULT_CACHE_GENERATION_CHECK_S", 3600)
+    driver.generation += 1
+    qc.leer(PLAYERS, {"nation": "España"}, driver)
+    assert len(driver.queries) == 2
+
+
+def test_sin_generacion_compartida_caduca_por_ttl(driver, monkeypatch):
+    driver.fail_generation = True
+    qc.leer(PLAYERS, {"nation": "España"}, driver)
+    qc.leer(PLAYERS, {"nation": "España"}, driver)
+    assert len(driver.queries) == 1
+
+    monkeypatch.setattr(qc._resultados, "ttl", 0)
+    qc.leer(PLAYERS, {"nation": "España"}, driver)
+    assert len(driver.queries) == 2
+
+
+def test_el_muestreo_cachea_el_resultado_completo(driver):
+    samples = [qc.leer(SAMPLE, {"nation": "España", "n": 5}, driver) for _ in range(20)]
+    assert driver.queries == [FULL]
+    everyone = {f"Jugador {i}" for i in range(50)}
+    assert all(len(s) == 5 and {r["name"] for r in s} <= everyone for s in samples)
+    assert len({tuple(r["name"] for r in s) for s in samples}) > 1
+
+    # Otros usos de rand() no se cachean
+    other = "MATCH (p:Player) WHERE rand() < 0.5 RETURN p.name AS name"
+    qc.leer(other, {}, driver)
+    qc.leer(other, {}, driver)
+    assert driver.queries[1:] == [other, other]
+
+
+def test_muestreo_demasiado_grande_va_directo_a_neo4j(driver, monkeypatch):
+    monkeypatch.setattr(qc._resultados, "max_entry_bytes", 10)
+    qc.leer(SAMPLE, {"nation": "España", "n": 5}, driver)
+    qc.leer(SAMPLE, {"nation": "España", "n": 5}, driver)
+    # Solo la primera vez se trae el resultado completo; después la consulta va tal cual
+    assert driver.queries == [FULL, SAMPLE]
+
+
+def test_muestreo_con_demasiadas_filas_no_trae_el_resultado_completo(driver, monkeypatch):
+    monkeypatch.setattr(qc, "RESULT_CACHE_MAX_SAMPLE_ROWS", 10)
+    first = qc.leer(SAMPLE, {"nation": "España", "n": 5}, driver)
+    # El resultado acotado llega al LIMIT (11 filas): se responde con la consulta original
+    assert driver.queries == [FULL, SAMPLE]
+    assert len(first) == 5
+    qc.leer(SAMPLE, {"nation": "España", "n": 5}, driver)
+    assert driver.queries == [FULL, SAMPLE, SAMPLE]
+    assert qc.resultados_cache_stats()["sampling_bypassed"] == 1
+    assert qc.resultados_cache_stats()["entries"] == 0
@@ -0,0 +1,49 @@
+# tests/test_repository.py
+from app.repository_module import SQLitePlayerRepository
+from benchmarks.fake_neo4j import SYNTHETIC_NATIONALITY, filas_jugadores
+
+
+def ids(repo) -> set:
+    return {p["player_id"] for p in repo.exportar()}
+
+
+def test_reimportar_el_mismo_csv_no_escribe_nada(repo_sqlite, jugadores, escribir_csv):
+    path = escribir_csv(filas_jugadores(jugadores))
+    assert repo_sqlite.actualizar(path) == {"written": 0, "removed": 0}
+
+
+def test_solo_se_escriben_filas_nuevas_o_cambiadas(repo_sqlite, jugadores, escribir_csv):
+    rows = list(filas_jugadores(jugadores))
+    rows[0] = {**rows[0], "goals": rows[0]["goals"] + 1}
+    rows.append({**rows[1], "player_id": "nuevo", "name": "Jugador nuevo"})
+
+    assert repo_sqlite.actualizar(escribir_csv(rows), chunk_size=50) == {"written": 2, "removed": 0}
+    exported = {p["player_id"]: p for p in repo_sqlite.exportar()}
+    assert exported[rows[0]["player_id"]]["goals"] == rows[0]["goals"]
+    assert exported["nuevo"]["name"] == "Jugador nuevo"
+    assert len(exported) == len(rows)
+
+
+def test_un_fichero_parcial_solo_borra_con_delete_missing(repo_sqlite, jugadores, escribir_csv):
+    rows = list(filas_jugadores(jugadores))
+    partial = escribir_csv(rows[:100])
+
+    assert repo_sqlite.actualizar(partial) == {"written": 0, "removed": 0}
+    assert len(ids(repo_sqlite)) == len(rows)
+
+    assert repo_sqlite.actualizar(partial, delete_missing=True, chunk_size=30) == {"written": 0, "removed": 200}
+    assert ids(repo_sqlite) == {r["player_id"] for r in rows[:100]}
+    # Las estadísticas de normalización se recalculan con lo que queda
+    stats = repo_sqlite.estadisticas(SYNTHETIC_NATIONALITY)
+    assert stats["max"]["goals"] == max(r["goals"] for r in rows[:100])
+
+
+def test_la_base_en_disco_se_reutiliza(tmp_path, jugadores, escribir_csv):
+    db_path = str(tmp_path / "players.db")
+    path = escribir_csv(filas_jugadores(jugadores))
+    SQLitePlayerRepository.desde_csv(path, db_path).actualizar(path, delete_missing=True)
+
+    # Otro proceso abre la misma base: no vuelve a cargar el CSV y aplica solo los cambios
+    repo = SQLitePlayerRepository.desde_csv(escribir_csv([], "vacio.csv"), db_path)
+    assert len(ids(repo)) == len(jugadores["player_id"])
+    assert repo.actualizar(path) == {"written": 0, "removed": 0}
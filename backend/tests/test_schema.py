@@ -0,0 +1,143 @@
+# tests/test_schema.py
+import asyncio
+import os
+import re
+
+import pytest
+
+from app.schema_module import CONSTRAINTS, INDEXES, aplicar_esquema, asegurar_esquema, sentencias_esquema, verificar_esquema
+from test_importer import Registro, Resultado
+
+INIT_CYPHER = os.path.join(os.path.dirname(__file__), "..", "..", "neo4j", "init.cypher")
+
+CREATE_CONSTRAINT = re.compile(r"CREATE CONSTRAINT (\w+) IF NOT EXISTS\s+FOR \(\w+:(\w+)\) REQUIRE \w+\.(\w+) IS UNIQUE")
+CREATE_INDEX = re.compile(r"CREATE INDEX (\w+) IF NOT EXISTS\s+FOR \(\w+:(\w+)\) ON \(\w+\.(\w+)\)")
+
+
+class EsquemaFalso:
+    """
+    Restricciones e índices de Neo4j: CREATE ... IF NOT EXISTS (una restricción
+    crea también su índice), SHOW CONSTRAINTS y SHOW INDEXES. Las sentencias de
+    `failing` fallan (p. ej. duplicados) y los índices nuevos quedan en `state`.
+    """
+
+    def __init__(self, failing=(), state="ONLINE"):
+        self.failing = set(failing)
+        self.state = state
+        self.constraints = {}
+        self.indexes = {"index_343aff4e": {"type": "LOOKUP", "labelsOrTypes": None, "properties": None,
+                                           "owningConstraint": None, "state": "ONLINE",
+                                           "readCount": 0, "lastRead": None}}
+        self.created = []
+
+    def session(self, **kwargs):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def _indice(self, name, label, prop, owner=None):
+        self.indexes.setdefault(name, {"type": "RANGE", "labelsOrTypes": [label], "properties": [prop],
+                                       "owningConstraint": owner, "state": self.state,
+                                       "readCount": 0, "lastRead": None})
+
+    def run(self, query, **params):
+        for pattern, constraint in ((CREATE_CONSTRAINT, True), (CREATE_INDEX, False)):
+            match = pattern.fullmatch(query)
+            if match:
+                name, label, prop = match.groups()
+                if name in self.failing:
+                    raise RuntimeError(f"No se puede crear {name}: hay valores duplicados")
+                self.created.append(name)
+                if constraint:
+                    self.constraints.setdefault(name, (label, prop))
+                self._indice(name, label, prop, owner=name if constraint else None)
+                return Resultado()
+        if query.startswith("SHOW CONSTRAINTS"):
+            return Resultado(Registro(name=name, type="UNIQUENESS", labelsOrTypes=[label], properties=[prop])
+                             for name, (label, prop) in self.constraints.items())
+        if query.startswith("SHOW INDEXES"):
+            return Resultado(Registro(name=name, populationPercent=100.0, **index)
+                             for name, index in self.indexes.items())
+        raise AssertionError(f"Consulta inesperada: {query}")
+
+
+def test_init_cypher_declara_el_mismo_esquema():
+    with open(INIT_CYPHER, encoding="utf-8") as f:
+        script = f.read()
+    assert set(CREATE_CONSTRAINT.findall(script)) == set(CONSTRAINTS)
+    assert set(CREATE_INDEX.findall(script)) == set(INDEXES)
+    # Las sentencias del backend son las mismas, con IF NOT EXISTS para poder repetirlas
+    statements = "\n".join(sentencias_esquema())
+    assert set(CREATE_CONSTRAINT.findall(statements)) == set(CONSTRAINTS)
+    assert set(CREATE_INDEX.findall(statements)) == set(INDEXES)
+
+
+def test_el_arranque_crea_lo_que_falta_una_sola_vez():
+    graph = EsquemaFalso()
+    assert verificar_esquema(graph)["missing_constraints"] == [name for name, _, _ in CONSTRAINTS]
+
+    report = asegurar_esquema(graph)
+    assert report["ok"]
+    assert (report["missing_constraints"], report["missing_indexes"], report["not_online"]) == ([], [], [])
+    assert len(graph.created) == len(CONSTRAINTS) + len(INDEXES)
+    # El uso se informa por índice (incluidos los de las restricciones), sin el LOOKUP
+    assert {u["name"] for u in report["index_usage"]} == {name for name, _, _ in CONSTRAINTS + INDEXES}
+
+    assert asegurar_esquema(graph)["ok"]
+    assert len(graph.created) == len(CONSTRAINTS) + len(INDEXES)
+
+
+def test_un_fallo_no_impide_aplicar_el_resto():
+    graph = EsquemaFalso(failing={"player_id_unique"})
+    applied = aplicar_esquema(graph)
+    assert applied["applied"] == len(CONSTRAINTS) + len(INDEXES) - 1
+    assert [e["statement"] for e in applied["errors"]] == [sentencias_esquema()[0]]
+    report = verificar_esquema(graph)
+    assert not report["ok"]
+    assert (report["missing_constraints"], report["missing_indexes"]) == (["player_id_unique"], [])
+
+
+def test_indices_que_aun_se_estan_construyendo():
+    report = asegurar_esquema(EsquemaFalso(state="POPULATING"))
+    assert not report["ok"]
+    assert sorted(report["not_online"]) == sorted(name for name, _, _ in CONSTRAINTS + INDEXES)
+
+
+def test_preparar_neo4j_espera_y_aplica_el_esquema(monkeypatch):
+    from app import main
+
+    graph = EsquemaFalso()
+    answers = iter([False, False, True])
+    waits = []
+
+    async def comprobar_conexion():
+        return {"ready": next(answers)}
+
+    async def sleep(seconds):
+        waits.append(seconds)
+
+    monkeypatch.setattr(main, "comprobar_conexion", comprobar_conexion)
+    monkeypatch.setattr(main, "estado_conexion", lambda: {"ready": False, "error": "sin conexión"})
+    monkeypatch.setattr(main.asyncio, "sleep", sleep)
+    monkeypatch.setattr(main, "obtener_driver", lambda: graph)
+    asyncio.run(main._preparar_neo4j())
+    assert waits == [5.0, 10.0]
+    assert verificar_esquema(graph)["ok"]
+
+
+def test_endpoints_de_esquema(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app import main
+
+    graph = EsquemaFalso()
+    monkeypatch.setattr(main, "obtener_driver", lambda: graph)
+    client = TestClient(main.app, headers={"X-API-Key": main.API_KEY})
+    assert not client.get("/api/admin/schema").json()["ok"]
+    applied = client.post("/api/admin/schema").json()
+    assert applied["ok"] and applied["applied"] == len(CONSTRAINTS) + len(INDEXES)
+    assert client.get("/api/admin/schema").json()["ok"]
@@ -0,0 +1,44 @@
+# tests/test_scoring.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from app import selector_module as sm
+from benchmarks.fake_neo4j import SYNTHETIC_NATIONALITY
+
+# Tabla de pesos de cada posición general tal y como aparece en el dataset (o ya en código)
+WEIGHTS_KEY = {
+    "Portero": "POR", "POR": "POR",
+    "Defensa": "DF", "DF": "DF",
+    "Mediocentro": "MF", "MF": "MF",
+    "Delantero": "FW", "FW": "FW",
+}
+
+
+def score_fila(row, style: str) -> float:
+    """Score de referencia, jugador a jugador con los diccionarios de pesos (las desconocidas como MF)."""
+    weights = sm.STYLE_WEIGHTS[style][WEIGHTS_KEY.get(row["position"], "MF")]
+    return sum(w * row[stat] for stat, w in weights.items()) * sm.STYLE_MULTIPLIER[style]
+
+
+@pytest.mark.parametrize("position", sorted(WEIGHTS_KEY) + ["Desconocida"])
+def test_weight_matrix_coincide_con_los_pesos_por_posicion(position):
+    rng = np.random.default_rng(11)
+    df = pd.DataFrame(rng.random((20, len(sm.STAT_COLUMNS))), columns=sm.STAT_COLUMNS)
+    df["position"] = position
+    scored = sm.puntuar_jugadores(df.copy())
+    for style in sm.STYLES:
+        expected = [score_fila(row, style) for _, row in df.iterrows()]
+        assert scored[f"score_{style}"].tolist() == pytest.approx(expected)
+
+
+def test_cada_posicion_del_dataset_puntua_con_sus_pesos(repo_sqlite):
+    raw = repo_sqlite.jugadores(SYNTHETIC_NATIONALITY, True, sm.SELECTOR_COLUMNS)
+    df = sm.preparar_jugadores(raw, repo_sqlite.estadisticas(SYNTHETIC_NATIONALITY))
+    for general, key in [("Portero", "POR"), ("Defensa", "DF"), ("Mediocentro", "MF"), ("Delantero", "FW")]:
+        rows = df[df["position"] == general]
+        assert len(rows) > 0
+        assert (rows["pos_code"] == sm.POSITIONS.index(key)).all()
+        for style in sm.STYLES:
+            expected = [score_fila(row, style) for _, row in rows.iterrows()]
+            assert rows[f"score_{style}"].tolist() == pytest.approx(expected)
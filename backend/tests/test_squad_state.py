@@ -0,0 +1,82 @@
+# tests/test_squad_state.py
+import itertools
+
+import numpy as np
+import pytest
+
+from app import selector_module as sm
+from app.chemistry_module import CHEM_SAME_LEAGUE, CHEM_SAME_TEAM
+from benchmarks.fake_neo4j import SYNTHETIC_NATIONALITY
+
+
+@pytest.fixture
+def tabla(repo_sqlite):
+    raw = repo_sqlite.jugadores(SYNTHETIC_NATIONALITY, True, sm.SELECTOR_COLUMNS)
+    df, chemistry = sm._preparar_tabla(raw, repo_sqlite.estadisticas(SYNTHETIC_NATIONALITY))
+    return df.assign(score_individual=df["score_balanceado"]), chemistry
+
+
+def total_de_referencia(df, squad) -> float:
+    """Total recalculado desde la tabla: rendimiento medio y química recorriendo todas las parejas."""
+    rows = df.iloc[list(squad)]
+    chem = 0.0
+    for (_, a), (_, b) in itertools.combinations(rows.iterrows(), 2):
+        chem += CHEM_SAME_TEAM if a["team"] == b["team"] else CHEM_SAME_LEAGUE if a["league"] == b["league"] else 0.0
+    k = len(rows)
+    return sm.ALPHA * rows["score_individual"].mean() + sm.BETA * chem / (k * (k - 1) / 2)
+
+
+def estado(df, chemistry):
+    squad, locked = sm.convocatoria_inicial(df, SYNTHETIC_NATIONALITY, 23, None, [])
+    return sm.construir_estado(df, squad, locked, chemistry.fresh())
+
+
+def test_swap_scores_coincide_con_recalcular_la_convocatoria(tabla):
+    df, chemistry = tabla
+    state = estado(df, chemistry)
+    assert state.total()[0] == pytest.approx(total_de_referencia(df, state.squad))
+    for slot in (0, 7, state.size - 1):
+        candidates = state.candidates(slot)[:4]
+        assert len(candidates) > 0
+        expected = [total_de_referencia(df, [*np.delete(state.squad, slot), c]) for c in candidates]
+        assert state.swap_scores(slot, candidates).tolist() == pytest.approx(expected)
+
+
+def test_los_candidatos_son_de_la_misma_posicion_y_no_convocados(tabla):
+    df, chemistry = tabla
+    state = estado(df, chemistry)
+    for slot in range(state.size):
+        out = df.iloc[int(state.squad[slot])]
+        candidates = state.candidates(slot)
+        assert not state.in_squad[candidates].any()
+        assert (df["specific_position"].iloc[candidates] == out["specific_position"]).all()
+        # Ordenados por score individual, de mayor a menor
+        assert np.all(np.diff(state.scores[candidates]) <= 0)
+
+
+def test_apply_swap_y_restore_mantienen_las_sumas(tabla):
+    df, chemistry = tabla
+    state = estado(df, chemistry)
+    initial, initial_total = state.snapshot(), state.total()
+    rng = np.random.default_rng(5)
+    for _ in range(15):
+        slot = int(rng.integers(state.size))
+        candidates = state.candidates(slot)
+        expected = state.swap_scores(slot, candidates[:1])[0]
+        state.apply_swap(slot, int(candidates[0]))
+        assert state.total()[0] == pytest.approx(expected)
+    assert state.total()[0] == pytest.approx(total_de_referencia(df, state.squad))
+    assert state.in_squad.sum() == state.size == len(set(state.squad.tolist()))
+
+    state.restore(initial)
+    assert np.array_equal(state.squad, initial)
+    assert state.total() == pytest.approx(initial_total)
+
+
+def test_no_modifica_la_configuracion_del_llamante(selector):
+    config = {"POR": 2, "DFC": 3, "MC": 3, "DC": 2}
+    fixed = selector.obtener_tabla(SYNTHETIC_NATIONALITY, True)[0].query("specific_position == 'DC'")["name"].head(1).tolist()
+    result = selector.generar_convocatoria(SYNTHETIC_NATIONALITY, num_players=10, specific_positions_config=config,
+                                           fixed_players=list(fixed), injured_allowed=True, seed=1)
+    assert config == {"POR": 2, "DFC": 3, "MC": 3, "DC": 2}
+    assert fixed[0] in {p["name"] for p in result["players_selected"]}
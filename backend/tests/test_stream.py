@@ -0,0 +1,114 @@
+# tests/test_stream.py
+import asyncio
+import json
+import threading
+
+import pytest
+
+from app import llama_integration as li
+from benchmarks.fake_neo4j import SYNTHETIC_NATIONALITY
+
+
+def eventos(pregunta: str) -> list:
+    async def run():
+        return [ev async for ev in li.query_grafo_stream(pregunta, user_id="test-stream")]
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def sintetica(selector, monkeypatch):
+    """Las convocatorias pedidas salen de la nacionalidad del dataset sintético."""
+    extraer = li.extraer_parametros
+    monkeypatch.setattr(li, "extraer_parametros", lambda p: {**extraer(p), "nationality": SYNTHETIC_NATIONALITY})
+    return selector
+
+
+def test_secuencia_de_etapas_de_una_convocatoria(sintetica):
+    evs = eventos("dame la convocatoria ofensiva")
+    stages = [ev["stage"] for ev in evs]
+    assert stages[0] == "params" and evs[0]["nationality"] == SYNTHETIC_NATIONALITY
+    assert stages[-2:] == ["squad", "analysis"]
+    progress = evs[1:-2]
+    assert progress and {ev["stage"] for ev in progress} <= {"greedy", "improvement"}
+    # Cada estilo empieza por su convocatoria voraz y solo después llegan sus mejoras
+    greedy = set()
+    for ev in progress:
+        if ev["stage"] == "greedy":
+            assert ev["style"] in sintetica.STYLES and ev["style"] not in greedy
+            greedy.add(ev["style"])
+        else:
+            assert ev["style"] in greedy
+    assert evs[-2]["result"]["style"] == "ofensivo"
+    assert "players_selected" in evs[-2]["result"]
+    assert evs[-1]["respuesta"]
+
+
+def test_convocatoria_sin_jugadores_termina_en_error(selector):
+    evs = eventos("dame la convocatoria de España")  # el dataset de prueba no tiene españoles
+    assert [ev["stage"] for ev in evs] == ["params", "error"]
+    assert evs[-1]["respuesta"].startswith("❌")
+
+
+def test_una_consulta_es_un_unico_evento(monkeypatch):
+    async def consulta(pregunta, user_id):
+        return {"type": "consulta_limpia", "respuesta": ["A", "B"]}
+
+    monkeypatch.setattr(li, "query_grafo_async", consulta)
+    assert eventos("jugadores del Real Madrid") == [
+        {"stage": "answer", "respuesta": {"type": "consulta_limpia", "respuesta": ["A", "B"]}}
+    ]
+
+
+def test_si_el_consumidor_se_va_la_busqueda_se_detiene(monkeypatch):
+    visto = {}
+    terminada = threading.Event()
+
+    def convocatoria_lenta(progress, cancel, **params):
+        """Mejora sin parar hasta que la cancelan (como mucho 5 s)."""
+        progress({"stage": "greedy", "style": "balanceado", "total_score": 0})
+        total = 0
+        while not cancel.wait(0.01) and total < 500:
+            total += 1
+            progress({"stage": "improvement", "style": "balanceado", "total_score": total})
+        visto["cancelada"] = cancel.is_set()
+        terminada.set()
+        return {"error": "cancelada"}
+
+    monkeypatch.setattr("app.selector_module.generar_convocatoria", convocatoria_lenta)
+
+    async def run():
+        stream = li.query_grafo_stream("dame la convocatoria", user_id="test-stream")
+        stages = [(await stream.__anext__())["stage"] for _ in range(3)]
+        await stream.aclose()  # el cliente cierra la conexión
+        return stages
+
+    assert asyncio.run(run()) == ["params", "greedy", "improvement"]
+    assert terminada.wait(5)
+    assert visto["cancelada"]
+
+
+def test_endpoint_ndjson(sintetica):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    response = TestClient(app).get("/api/query/public/stream", params={"pregunta": "dame la convocatoria"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    evs = [json.loads(line) for line in response.text.splitlines()]
+    assert [ev["stage"] for ev in (evs[0], *evs[-3:])] == ["params", "squad", "analysis", "done"]
+    assert evs[-1]["ok"] is True
+
+
+def test_endpoint_ndjson_con_error(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    def rota(pregunta, user_id):
+        raise RuntimeError("Neo4j caído")
+
+    monkeypatch.setattr(li, "detectar_intencion", rota)
+    response = TestClient(app).get("/api/query/public/stream", params={"pregunta": "dame la convocatoria"})
+    evs = [json.loads(line) for line in response.text.splitlines()]
+    assert evs == [{"stage": "error", "ok": False, "respuesta": "Error procesando la pregunta: Neo4j caído"}]
@@ -0,0 +1,45 @@
+# tests/test_styles.py
+import threading
+
+import pytest
+
+from benchmarks.fake_neo4j import SYNTHETIC_NATIONALITY
+
+
+@pytest.fixture
+def pool_estilos(selector, monkeypatch):
+    """selector_module con SELECTOR_STYLE_WORKERS = 3; el pool se cierra al terminar."""
+    monkeypatch.setattr(selector, "SELECTOR_STYLE_WORKERS", 3)
+    yield selector
+    if selector._executor is not None:
+        selector._executor.shutdown()
+        selector._executor = None
+
+
+@pytest.mark.parametrize("params", [
+    {"max_iterations": 30, "seed": 1},
+    {"optimizer": "simulated_annealing", "max_iterations": 40, "seed": 2, "num_players": 18},
+    {"optimizer": "tabu", "max_iterations": 20, "seed": 3, "injured_allowed": True},
+])
+def test_el_pool_de_estilos_da_lo_mismo_que_en_serie(pool_estilos, monkeypatch, params):
+    pool = pool_estilos.generar_convocatoria(SYNTHETIC_NATIONALITY, **params)
+    assert pool_estilos._executor is not None
+
+    monkeypatch.setattr(pool_estilos, "SELECTOR_STYLE_WORKERS", 0)
+    sequential = pool_estilos.generar_convocatoria(SYNTHETIC_NATIONALITY, **params)
+    assert pool == sequential
+
+
+def test_con_progreso_o_cancelacion_los_estilos_van_en_este_proceso(pool_estilos):
+    events = []
+    result = pool_estilos.generar_convocatoria(SYNTHETIC_NATIONALITY, max_iterations=10, seed=1,
+                                               progress=events.append, cancel=threading.Event())
+    assert "error" not in result
+    assert pool_estilos._executor is None
+    assert {ev["style"] for ev in events if ev["stage"] == "greedy"} == set(pool_estilos.STYLES)
+
+
+def test_sin_workers_no_hay_pool(selector, monkeypatch):
+    monkeypatch.setattr(selector, "SELECTOR_STYLE_WORKERS", 1)
+    selector.generar_convocatoria(SYNTHETIC_NATIONALITY, max_iterations=10, seed=1)
+    assert selector._executor is None
@@ -0,0 +1,92 @@
+# tests/test_template.py
+import pytest
+
+from app.template_module import compilar_pregunta, formatear_filas
+
+
+def cypher(*lines) -> str:
+    return "\n".join(lines)
+
+
+@pytest.mark.parametrize("pregunta, expected_cypher, expected_params", [
+    # Las posiciones específicas en mayúsculas no son equipos
+    ("jugadores en MC",
+     cypher("MATCH (p:Player)", "WHERE p.specific_position = $specific_position",
+            "RETURN p.name AS name", "ORDER BY rand()", "LIMIT $limit"),
+     {"specific_position": "MC", "limit": 5}),
+    ("jugadores españoles en DC",
+     cypher("MATCH (p:Player)", "WHERE p.nationality = $nationality AND p.specific_position = $specific_position",
+            "RETURN p.name AS name", "ORDER BY rand()", "LIMIT $limit"),
+     {"nationality": "Española", "specific_position": "DC", "limit": 5}),
+    ("jugadores en DC del Real Madrid",
+     cypher("MATCH (p:Player)", "WHERE toLower(p.team) CONTAINS $team AND p.specific_position = $specific_position",
+            "RETURN p.name AS name", "ORDER BY rand()", "LIMIT $limit"),
+     {"team": "real madrid", "specific_position": "DC", "limit": 5}),
+    # Los números del nombre del equipo no son el LIMIT
+    ("jugadores del Schalke 04",
+     cypher("MATCH (p:Player)", "WHERE toLower(p.team) CONTAINS $team",
+            "RETURN p.name AS name", "ORDER BY rand()", "LIMIT $limit"),
+     {"team": "schalke 04", "limit": 5}),
+    ("3 jugadores del Paris SG",
+     cypher("MATCH (p:Player)", "WHERE toLower(p.team) CONTAINS $team",
+            "RETURN p.name AS name", "ORDER BY rand()", "LIMIT $limit"),
+     {"team": "paris sg", "limit": 3}),
+    ("delanteros argentinos",
+     cypher("MATCH (p:Player)", "WHERE p.nationality = $nationality AND p.position = $position",
+            "RETURN p.name AS name", "ORDER BY rand()", "LIMIT $limit"),
+     {"nationality": "Argentina", "position": "Delantero", "limit": 5}),
+    ("top 3 goleadores del Real Madrid",
+     cypher("MATCH (p:Player)", "WHERE toLower(p.team) CONTAINS $team", "AND p.goals IS NOT NULL",
+            "RETURN p.name AS name, p.goals AS value", "ORDER BY value DESC, name", "LIMIT $limit"),
+     {"team": "real madrid", "limit": 3}),
+    ("los 10 jugadores más jóvenes de la Premier",
+     cypher("MATCH (p:Player)", "WHERE p.league = $league", "AND p.age IS NOT NULL",
+            "RETURN p.name AS name, p.age AS value", "ORDER BY value ASC, name", "LIMIT $limit"),
+     {"league": "Premier", "limit": 10}),
+    ("los 4 jugadores con menos tarjetas amarillas en LaLiga",
+     cypher("MATCH (p:Player)", "WHERE p.league = $league", "AND p.yellow_cards IS NOT NULL",
+            "RETURN p.name AS name, p.yellow_cards AS value", "ORDER BY value ASC, name", "LIMIT $limit"),
+     {"league": "LaLiga", "limit": 4}),
+    ("porteros con más paradas",
+     cypher("MATCH (p:Player)", "WHERE p.position = $position", "AND p.saves_per_game IS NOT NULL",
+            "RETURN p.name AS name, p.saves_per_game AS value", "ORDER BY value DESC, name", "LIMIT $limit"),
+     {"position": "Portero", "limit": 5}),
+    # El 1 de "Ligue 1" tampoco es el LIMIT
+    ("equipos de la Ligue 1",
+     cypher("MATCH (p:Player)", "WHERE p.league = $league",
+            "RETURN DISTINCT p.team AS name", "ORDER BY rand()", "LIMIT $limit"),
+     {"league": "Ligue 1", "limit": 5}),
+    ("nacionalidades de la Serie A",
+     cypher("MATCH (p:Player)", "WHERE p.league = $league",
+            "RETURN DISTINCT p.nationality AS name", "ORDER BY rand()", "LIMIT $limit"),
+     {"league": "Serie A", "limit": 5}),
+    ("jugadores franceses lesionados",
+     cypher("MATCH (p:Player)", 'WHERE p.nationality = $nationality AND p.injured IS NOT NULL AND p.injured <> "No"',
+            "RETURN p.name AS name", "ORDER BY rand()", "LIMIT $limit"),
+     {"nationality": "Francesa", "limit": 5}),
+])
+def test_pregunta_a_cypher(pregunta, expected_cypher, expected_params):
+    plantilla = compilar_pregunta(pregunta)
+    assert plantilla is not None
+    assert plantilla["cypher"] == expected_cypher
+    assert plantilla["params"] == expected_params
+
+
+@pytest.mark.parametrize("pregunta", [
+    "los 5 mejores porteros del Real Madrid",  # "mejores" sin estadística: lo decide el LLM
+    "los peores defensas de la Premier",
+    "promedio de goles de los delanteros",
+    "cuántos jugadores hay en LaLiga",
+    "jugadores",
+    "hola",
+    "equipos con más goles",
+])
+def test_lo_que_no_encaja_va_al_llm(pregunta):
+    assert compilar_pregunta(pregunta) is None
+
+
+def test_formatear_filas():
+    ranking = compilar_pregunta("top 2 goleadores de la Premier")
+    assert formatear_filas(ranking, [{"name": "A", "value": 20}]) == ["A (goles: 20)"]
+    listing = compilar_pregunta("delanteros argentinos")
+    assert formatear_filas(listing, [{"name": "A"}, {"name": "B"}]) == ["A", "B"]
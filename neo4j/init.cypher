@@ -1,6 +1,29 @@
+// Esquema del grafo de fútbol (el backend lo aplica también al arrancar: app/schema_module.py)
+
 // Constraints de ejemplo
 CREATE CONSTRAINT IF NOT EXISTS
 FOR (e:Exercise) REQUIRE e.name IS UNIQUE;
 
+// Restricciones de unicidad (crean además el índice que usan los MERGE)
+CREATE CONSTRAINT player_id_unique IF NOT EXISTS
+FOR (p:Player) REQUIRE p.player_id IS UNIQUE;
+CREATE CONSTRAINT team_name_unique IF NOT EXISTS
+FOR (t:Team) REQUIRE t.name IS UNIQUE;
+CREATE CONSTRAINT league_name_unique IF NOT EXISTS
+FOR (l:League) REQUIRE l.name IS UNIQUE;
+CREATE CONSTRAINT country_name_unique IF NOT EXISTS
+FOR (c:Country) REQUIRE c.name IS UNIQUE;
+CREATE CONSTRAINT player_stats_scope_unique IF NOT EXISTS
+FOR (s:PlayerStats) REQUIRE s.scope IS UNIQUE;
+CREATE CONSTRAINT meta_name_unique IF NOT EXISTS
+FOR (m:Meta) REQUIRE m.name IS UNIQUE;
+
+// Índices de rango para los filtros del seleccionador y de las consultas
+CREATE INDEX player_nationality IF NOT EXISTS FOR (p:Player) ON (p.nationality);
+CREATE INDEX player_position IF NOT EXISTS FOR (p:Player) ON (p.position);
+CREATE INDEX player_specific_position IF NOT EXISTS FOR (p:Player) ON (p.specific_position);
+CREATE INDEX player_injured IF NOT EXISTS FOR (p:Player) ON (p.injured);
+CREATE INDEX player_graph_dirty IF NOT EXISTS FOR (p:Player) ON (p.graph_dirty);
+
 // Semillas mínimas (opcional)
 MERGE (:TrainingType {name:"Running"});